@@ -0,0 +1,215 @@
+"""
+Benchmarks the driver lifecycle (launch, cookie injection, navigation, quit) offline.
+
+By default every launch goes through private/fake_chromedriver.py, a local stand-in
+speaking the W3C WebDriver protocol, and pages come from a local fixture site, so
+the numbers measure init_selenium's own overhead and catch regressions without
+Chrome or internet access. Use --real to run the same scenarios with the installed
+Chrome and ChromeDriver.
+
+    python private/bench_driver_lifecycle.py --launches 20
+    python private/bench_driver_lifecycle.py --json results.json
+    python private/bench_driver_lifecycle.py --baseline results.json --tolerance 0.2
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from init_selenium import DriverInit, DriverPool, DriverMetrics, WINDOW_MIN, WINDOW_MAX, WINDOW_FAST
+from init_selenium.session import set_cookies
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+# Keep per-launch log lines out of the report
+logging.getLogger("init_selenium").setLevel(logging.WARNING)
+logging.getLogger("uc").setLevel(logging.WARNING)
+
+FAKE_DRIVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_chromedriver.py")
+
+# Scenario name -> (create_driver arguments, pooled)
+SCENARIOS = {
+    "cold-plain-headless": ({"window_size": WINDOW_MIN}, False),
+    "cold-plain-headed": ({"window_size": WINDOW_MAX}, False),
+    "cold-plain-fast": ({"window_size": WINDOW_FAST}, False),
+    "cold-undetectable-headless": ({"window_size": WINDOW_MIN, "undetectable": True}, False),
+    "pooled-plain-headless": ({"window_size": WINDOW_MIN}, True),
+    "pooled-plain-fast": ({"window_size": WINDOW_FAST}, True),
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves small deterministic pages: /page/N links to /page/N+1"""
+
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        try:
+            page = int(self.path.rstrip("/").rsplit("/", 1)[-1])
+        except ValueError:
+            page = 0
+        links = "".join(f'<li><a href="/page/{page + i}">Item {page + i}</a></li>' for i in range(1, 21))
+        body = f"<html><head><title>Fixture page {page}</title></head><body><ul>{links}</ul></body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_fixture_site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def process_rss(pid: int) -> int:
+    """Resident memory in bytes of a process and its children, 0 if it cannot be read"""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    if psutil:
+        try:
+            process = psutil.Process(pid)
+            return sum(p.memory_info().rss for p in [process] + process.children(recursive=True))
+        except psutil.Error:
+            return 0
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def session_rss(driver) -> int:
+    pid = getattr(driver, "browser_pid", None)
+    service = getattr(driver, "service", None)
+    if pid is None and service is not None and getattr(service, "process", None):
+        pid = service.process.pid
+    return process_rss(pid) if pid else 0
+
+
+def run_session(driver, base_url: str, navigations: int):
+    set_cookies(driver, [{"name": f"bench_{i}", "value": str(i)} for i in range(20)], default_url=base_url)
+    for page in range(navigations):
+        driver.get(f"{base_url}/page/{page}")
+
+
+def run_scenario(name: str, real: bool, launches: int, navigations: int, base_url: str):
+    kwargs, pooled = SCENARIOS[name]
+    metrics = DriverMetrics()
+    driver_init = DriverInit(drivers_route=None if real else FAKE_DRIVER, metrics=metrics)
+    memory = []
+
+    start = time.perf_counter()
+    if pooled:
+        with DriverPool(driver_init, size=2, **kwargs) as pool:
+            # Let the pool warm up before measuring steady-state leases
+            with pool.lease():
+                pass
+            start = time.perf_counter()
+            for _ in range(launches):
+                with pool.lease() as (driver, wait):
+                    run_session(driver, base_url, navigations)
+                    memory.append(session_rss(driver))
+    else:
+        for _ in range(launches):
+            driver, wait = driver_init.create_driver(initial_url=f"{base_url}/page/0", **kwargs)
+            try:
+                run_session(driver, base_url, navigations)
+                memory.append(session_rss(driver))
+            finally:
+                driver.quit()
+    elapsed = time.perf_counter() - start
+
+    summary = metrics.summary()
+    return {
+        "scenario": name,
+        "sessions_per_second": launches / elapsed,
+        "launch": {stage: values["p50"] for stage, values in summary.get("launch", {}).items()},
+        "navigation_p50": summary.get("navigation", {}).get("get", {}).get("p50"),
+        "navigation_p95": summary.get("navigation", {}).get("get", {}).get("p95"),
+        "rss_mb": statistics.mean(memory) / 2 ** 20 if memory else 0.0,
+    }
+
+
+def print_report(results):
+    print(f"{'scenario':<28} {'sessions/s':>10} {'spawn p50':>10} {'total p50':>10} {'get p50':>9} {'get p95':>9} {'RSS MB':>8}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['scenario']:<28} skipped: {result['error']}")
+            continue
+        launch = result["launch"]
+        print(f"{result['scenario']:<28} {result['sessions_per_second']:>10.2f} "
+              f"{(launch.get('spawn') or 0) * 1000:>8.1f}ms {(launch.get('total') or 0) * 1000:>8.1f}ms "
+              f"{(result['navigation_p50'] or 0) * 1000:>7.1f}ms {(result['navigation_p95'] or 0) * 1000:>7.1f}ms "
+              f"{result['rss_mb']:>8.1f}")
+
+
+def compare(results, baseline_path: str, tolerance: float) -> bool:
+    """Returns False if any scenario is slower than the baseline beyond the tolerance"""
+    with open(baseline_path) as baseline_file:
+        baseline = {result["scenario"]: result for result in json.load(baseline_file)}
+
+    ok = True
+    for result in results:
+        previous = baseline.get(result["scenario"])
+        if not previous or "error" in result or "error" in previous:
+            continue
+        floor = previous["sessions_per_second"] * (1 - tolerance)
+        if result["sessions_per_second"] < floor:
+            print(f"REGRESSION {result['scenario']}: {result['sessions_per_second']:.2f} sessions/s, "
+                  f"baseline {previous['sessions_per_second']:.2f}")
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--real", action="store_true", help="use the installed Chrome and ChromeDriver")
+    parser.add_argument("--launches", type=int, default=10)
+    parser.add_argument("--navigations", type=int, default=3)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only these scenarios")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="fail if slower than the results in this file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server, base_url = start_fixture_site()
+    results = []
+    try:
+        for name in args.scenario or SCENARIOS:
+            try:
+                results.append(run_scenario(name, args.real, args.launches, args.navigations, base_url))
+            except Exception as e:
+                # undetected_chromedriver always needs a real Chrome binary
+                results.append({"scenario": name, "error": str(e).splitlines()[0] if str(e) else repr(e)})
+    finally:
+        server.shutdown()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+    if args.baseline and not compare(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Stand-in for chromedriver speaking enough of the W3C WebDriver protocol for
+DriverInit.create_driver, cookies, navigation and CDP commands, without a browser.
+Navigation fetches the page with urllib, so it can be pointed at a local fixture site.
+A `--proxy-server=` Chrome argument is honoured, so caching proxies can be tested too.
+Sessions requesting browserName "firefox" answer like geckodriver, without CDP.
+With the `goog:loggingPrefs` performance log enabled, every navigation records CDP
+Network and Page events, and Page.captureScreenshot returns a PNG of the page title.
+
+Usage: fake_chromedriver.py --port=9515 (or --port 9515)
+The FAKE_CHROMEDRIVER_STARTUP_DELAY and FAKE_CHROMEDRIVER_COMMAND_DELAY environment
+variables (seconds) simulate browser start-up and per-command latency.
+Navigating to a URL with a `fake_hang=SECONDS` query parameter makes the driver hang
+for that long, and `fake_crash=1` makes it exit, to test supervisors offline.
+`fake_crash_once=PATH` exits only if PATH does not exist yet, creating it first.
+Every window keeps its navigation history for Page.getNavigationHistory, and the
+origins passed to Storage.clearDataForOrigin are returned by FakeDriver.getClearedOrigins.
+A script containing `fake_throw('message')` fails with a javascript error carrying that message.
+"""
+import base64
+import json
+import os
+import re
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TITLE_PATTERN = re.compile(rb"<title>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+THROW_PATTERN = re.compile(r"fake_throw\(['\"](.*?)['\"]\)")
+
+
+class FakeSession:
+
+    def __init__(self, capabilities, proxy_server=None, performance_log=False):
+        self.id = uuid.uuid4().hex
+        # Performance log entries, read and cleared by POST /se/log; None when the log is off
+        self.performance = [] if performance_log else None
+        self.capabilities = capabilities
+        self.opener = urllib.request.build_opener(
+            urllib.request.ProxyHandler({"http": proxy_server, "https": proxy_server})
+        ) if proxy_server else urllib.request.build_opener()
+        self.cookies = {}
+        self.handles = [uuid.uuid4().hex.upper()]
+        self.current_handle = self.handles[0]
+        # handle -> [url, title, source], every window keeps its own page
+        self.pages = {self.current_handle: ["data:,", "", ""]}
+        self.history = {self.current_handle: ["data:,"]}
+        self.cleared_origins = []
+        self.window_rect = {"x": 0, "y": 0, "width": 1200, "height": 800}
+        self.timeouts = {"implicit": 0, "pageLoad": 300000, "script": 30000}
+
+    def _page_property(index):
+        return property(lambda self: self.pages[self.current_handle][index],
+                        lambda self, value: self.pages[self.current_handle].__setitem__(index, value))
+
+    url = _page_property(0)
+    title = _page_property(1)
+    source = _page_property(2)
+    del _page_property
+
+    def open_window(self, url):
+        handle = uuid.uuid4().hex.upper()
+        self.handles.append(handle)
+        self.pages[handle] = [url, "", ""]
+        self.history[handle] = [url]
+        return handle
+
+    def close_window(self, handle):
+        self.handles.remove(handle)
+        self.pages.pop(handle, None)
+        self.history.pop(handle, None)
+
+    def navigate(self, url):
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+        if "fake_crash" in query:
+            os._exit(1)
+        if "fake_crash_once" in query:
+            # The marker file outlives this process, so the relaunched driver loads the page
+            marker = query["fake_crash_once"][0]
+            if not os.path.exists(marker):
+                open(marker, "w").close()
+                os._exit(1)
+        if "fake_hang" in query:
+            time.sleep(float(query["fake_hang"][0]))
+
+        self.url = url
+        self.history[self.current_handle].append(url)
+        if url.startswith(("http://", "https://")):
+            timeout = self.timeouts["pageLoad"] / 1000
+            request_id = uuid.uuid4().hex
+            start = time.monotonic()
+            self._event("Network.requestWillBeSent", requestId=request_id, timestamp=start, wallTime=time.time(),
+                        request={"url": url, "method": "GET", "headers": {"User-Agent": "fake"}}, type="Document")
+            with self.opener.open(url, timeout=timeout) as response:
+                headers_end = time.monotonic()
+                body = response.read()
+                self._event("Network.responseReceived", requestId=request_id, timestamp=headers_end, response={
+                    "url": url, "status": response.status, "statusText": response.reason,
+                    "headers": dict(response.headers.items()), "mimeType": response.headers.get_content_type(),
+                    "protocol": "http/1.1", "remoteIPAddress": "127.0.0.1",
+                    "timing": {"requestTime": start, "dnsStart": -1, "dnsEnd": -1, "connectStart": 0,
+                               "connectEnd": 0.5, "sslStart": -1, "sslEnd": -1, "sendStart": 0.5, "sendEnd": 0.6,
+                               "receiveHeadersEnd": (headers_end - start) * 1000},
+                })
+            finished = time.monotonic()
+            self._event("Network.dataReceived", requestId=request_id, timestamp=finished, dataLength=len(body))
+            self._event("Network.loadingFinished", requestId=request_id, timestamp=finished,
+                        encodedDataLength=len(body))
+            self._event("Page.domContentEventFired", timestamp=finished)
+            self._event("Page.loadEventFired", timestamp=finished)
+            match = TITLE_PATTERN.search(body)
+            self.title = match.group(1).decode(errors="replace").strip() if match else ""
+            self.source = body.decode(errors="replace")
+        else:
+            self.title, self.source = "", ""
+
+    def _event(self, method, **params):
+        if self.performance is not None:
+            message = json.dumps({"message": {"method": method, "params": params}, "webview": self.current_handle})
+            self.performance.append({"level": "INFO", "message": message, "timestamp": int(time.time() * 1000)})
+
+    def screenshot(self):
+        """Base64 PNG, a 1x1 grey image whose shade depends on the page title"""
+        def chunk(kind, data):
+            return len(data).to_bytes(4, "big") + kind + data + zlib.crc32(kind + data).to_bytes(4, "big")
+
+        shade = zlib.crc32(self.title.encode()) % 256
+        png = (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", bytes([0, 0, 0, 1, 0, 0, 0, 1, 8, 0, 0, 0, 0]))
+               + chunk(b"IDAT", zlib.compress(bytes([0, shade]))) + chunk(b"IEND", b""))
+        return base64.b64encode(png).decode()
+
+
+class FakeDriverHandler(BaseHTTPRequestHandler):
+    disable_nagle_algorithm = True
+    sessions = {}
+    command_delay = 0.0
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, value, status=200):
+        body = json.dumps({"value": value}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, error, message, status=404):
+        self._send({"error": error, "message": message, "stacktrace": ""}, status)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method):
+        if self.command_delay:
+            time.sleep(self.command_delay)
+        path = self.path.rstrip("/")
+        body = self._body() if method == "POST" else {}
+
+        if path == "/status":
+            return self._send({"ready": True, "message": "fake chromedriver ready"})
+        if path == "/shutdown":
+            # Stop accepting connections first, so the client sees the port closed right away
+            self.server.socket.close()
+            self._send(None)
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if path == "/session" and method == "POST":
+            return self._new_session(body)
+
+        match = re.match(r"^/session/([^/]+)(/.*)?$", path)
+        if not match or match.group(1) not in self.sessions:
+            return self._error("invalid session id", "No such session")
+        session = self.sessions[match.group(1)]
+        command = match.group(2) or ""
+
+        if command == "" and method == "DELETE":
+            del self.sessions[session.id]
+            return self._send(None)
+        try:
+            return self._session_command(session, method, command, body)
+        except Exception as e:
+            return self._error("unknown error", str(e), 500)
+
+    def _new_session(self, body):
+        requested = body.get("capabilities", {}).get("alwaysMatch", {})
+        capabilities = {
+            "browserName": "chrome",
+            "browserVersion": "120.0.0.0",
+            "platformName": sys.platform,
+            "pageLoadStrategy": requested.get("pageLoadStrategy", "normal"),
+            "goog:chromeOptions": {"debuggerAddress": "localhost:0"},
+            "chrome": {"chromedriverVersion": "120.0.0.0 (fake)"},
+        }
+        if requested.get("browserName") == "firefox":
+            # Answers like geckodriver: no Chrome capabilities and no CDP endpoint
+            capabilities = {key: value for key, value in capabilities.items()
+                            if key not in ("goog:chromeOptions", "chrome")}
+            capabilities.update({"browserName": "firefox", "moz:geckodriverVersion": "0.34.0 (fake)"})
+        arguments = requested.get("goog:chromeOptions", {}).get("args", [])
+        proxy_server = next(
+            (argument.split("=", 1)[1] for argument in arguments if argument.startswith("--proxy-server=")), None
+        )
+        performance_log = "performance" in requested.get("goog:loggingPrefs", {})
+        session = FakeSession(capabilities, proxy_server, performance_log)
+        self.sessions[session.id] = session
+        self._send({"sessionId": session.id, "capabilities": capabilities})
+
+    def _session_command(self, session, method, command, body):
+        if command == "/url":
+            if method == "POST":
+                session.navigate(body["url"])
+                return self._send(None)
+            return self._send(session.url)
+        if command == "/title":
+            return self._send(session.title)
+        if command == "/source":
+            return self._send(session.source)
+        if command == "/timeouts":
+            session.timeouts.update(body)
+            return self._send(None)
+        if command == "/cookie":
+            if method == "POST":
+                cookie = body["cookie"]
+                session.cookies[cookie["name"]] = cookie
+                return self._send(None)
+            if method == "DELETE":
+                session.cookies.clear()
+                return self._send(None)
+            return self._send(list(session.cookies.values()))
+        if command.startswith("/cookie/"):
+            name = urllib.parse.unquote(command[len("/cookie/"):])
+            if method == "DELETE":
+                session.cookies.pop(name, None)
+                return self._send(None)
+            if name not in session.cookies:
+                return self._error("no such cookie", name)
+            return self._send(session.cookies[name])
+        if command == "/window":
+            if method == "GET":
+                return self._send(session.current_handle)
+            if method == "POST":
+                session.current_handle = body.get("handle", session.current_handle)
+                return self._send(None)
+            session.close_window(session.current_handle)
+            return self._send(session.handles)
+        if command == "/window/handles":
+            return self._send(session.handles)
+        if command == "/window/rect":
+            if method == "POST":
+                session.window_rect.update({k: v for k, v in body.items() if v is not None})
+            return self._send(session.window_rect)
+        if command in ("/window/maximize", "/window/minimize", "/window/fullscreen"):
+            return self._send(session.window_rect)
+        if command in ("/execute/sync", "/execute/async"):
+            script = body.get("script", "")
+            thrown = THROW_PATTERN.search(script)
+            if thrown:
+                return self._error("javascript error", thrown.group(1), status=500)
+            # Pages load synchronously, so they are always complete
+            return self._send("complete" if "readyState" in script else None)
+        if command == "/goog/cdp/execute" and session.capabilities["browserName"] == "firefox":
+            return self._error("unknown command", f"{method} {command} is not supported by Firefox")
+        if command == "/goog/cdp/execute":
+            return self._send(self._cdp(session, body.get("cmd"), body.get("params") or {}))
+        if command == "/screenshot":
+            return self._send(session.screenshot())
+        if command == "/se/log":
+            if body.get("type") != "performance" or session.performance is None:
+                return self._send([])
+            entries, session.performance = session.performance, []
+            return self._send(entries)
+        return self._error("unknown command", f"{method} {command} is not implemented by the fake driver")
+
+    @staticmethod
+    def _cdp(session, cmd, params):
+        if cmd == "Network.getAllCookies":
+            return {"cookies": list(session.cookies.values())}
+        if cmd == "Network.setCookies":
+            for cookie in params.get("cookies", []):
+                session.cookies[cookie["name"]] = cookie
+        if cmd == "Network.clearBrowserCookies":
+            session.cookies.clear()
+        if cmd == "Page.navigate":
+            session.navigate(params["url"])
+            return {"frameId": session.current_handle, "loaderId": uuid.uuid4().hex.upper()}
+        if cmd == "Target.createBrowserContext":
+            return {"browserContextId": uuid.uuid4().hex.upper()}
+        if cmd == "Target.createTarget":
+            return {"targetId": session.open_window(params.get("url", "about:blank"))}
+        if cmd == "Target.closeTarget":
+            session.close_window(params["targetId"])
+            return {"success": True}
+        if cmd == "Page.captureScreenshot":
+            return {"data": session.screenshot()}
+        if cmd == "Storage.getCookies":
+            return {"cookies": list(session.cookies.values())}
+        if cmd == "Storage.clearDataForOrigin":
+            session.cleared_origins.append(params["origin"])
+        if cmd == "FakeDriver.getClearedOrigins":
+            return {"origins": session.cleared_origins}
+        if cmd == "Page.getNavigationHistory":
+            urls = session.history[session.current_handle]
+            return {"currentIndex": len(urls) - 1,
+                    "entries": [{"id": index, "url": url, "title": ""} for index, url in enumerate(urls)]}
+        if cmd == "Page.resetNavigationHistory":
+            session.history[session.current_handle] = [session.url]
+        return {}
+
+
+def main(argv):
+    port = 9515
+    for index, arg in enumerate(argv):
+        if arg.startswith("--port="):
+            port = int(arg.split("=", 1)[1])
+        elif arg == "--port" and index + 1 < len(argv):
+            # geckodriver's form, so FirefoxBackend can launch the fake too
+            port = int(argv[index + 1])
+    startup_delay = float(os.environ.get("FAKE_CHROMEDRIVER_STARTUP_DELAY", "0"))
+    FakeDriverHandler.command_delay = float(os.environ.get("FAKE_CHROMEDRIVER_COMMAND_DELAY", "0"))
+
+    # Simulates the browser start-up cost before the port accepts connections
+    time.sleep(startup_delay)
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeDriverHandler)
+    server.daemon_threads = True
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
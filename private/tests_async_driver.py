@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from init_selenium.async_driver import AsyncDriverInit
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+class StubDriver:
+
+    def __init__(self):
+        self.quit_event = threading.Event()
+
+    def quit(self):
+        self.quit_event.set()
+
+
+class StubInitializer:
+    """Stands in for DriverInit: each launch takes the next delay and returns a StubDriver"""
+
+    def __init__(self, *delays: float):
+        self.delays = list(delays)
+        self.drivers = []
+        self._lock = threading.Lock()
+
+    def create_driver(self, **kwargs):
+        with self._lock:
+            delay = self.delays.pop(0)
+        time.sleep(delay)
+        driver = StubDriver()
+        with self._lock:
+            self.drivers.append(driver)
+        return driver, None
+
+
+class TestAsyncDriverInit(unittest.TestCase):
+
+    def run_cancelled(self, initializer: StubInitializer, coroutine, timeout: float):
+        async def main():
+            async with AsyncDriverInit(initializer, max_workers=4) as async_init:
+                with self.assertRaises(asyncio.TimeoutError):
+                    await asyncio.wait_for(coroutine(async_init), timeout)
+        asyncio.run(main())
+
+    def test_launch_many(self):
+        async def main():
+            async with AsyncDriverInit(StubInitializer(0, 0, 0), max_workers=2) as async_init:
+                return await async_init.launch_many(3)
+        sessions = asyncio.run(main())
+        self.assertEqual(len(sessions), 3)
+        self.assertTrue(all(isinstance(driver, StubDriver) for driver, _ in sessions))
+
+    def test_cancelled_create_driver_quits_the_browser(self):
+        initializer = StubInitializer(0.3)
+        self.run_cancelled(initializer, lambda async_init: async_init.create_driver(), timeout=0.05)
+        # aclose waited for the launch, whose browser was quit as soon as it was up
+        self.assertEqual(len(initializer.drivers), 1)
+        self.assertTrue(initializer.drivers[0].quit_event.wait(5))
+
+    def test_cancelled_launch_many_quits_every_browser(self):
+        # The first launch returns before the timeout, two are still running and the last never starts
+        initializer = StubInitializer(0, 0.3, 0.3, 0)
+        self.run_cancelled(initializer, lambda async_init: async_init.launch_many(4, concurrency=2), timeout=0.1)
+        self.assertEqual(len(initializer.drivers), 3)
+        for driver in initializer.drivers:
+            self.assertTrue(driver.quit_event.wait(5))
+
+
+if __name__ == "__main__":
+    unittest.main()
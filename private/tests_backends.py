@@ -0,0 +1,180 @@
+import importlib.util
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SELENIUM = importlib.util.find_spec("selenium") is not None
+if SELENIUM:
+    from init_selenium import (
+        DriverInit, LaunchProfile, SessionSnapshot, ChromeBackend, UndetectedChromeBackend, FirefoxBackend,
+        RemoteBackend, WINDOW_MIN, BLOCK_IMAGES, BLOCK_FONTS,
+    )
+    from init_selenium.backends import default_backend, driver_supports_cdp
+    from bench_driver_lifecycle import FAKE_DRIVER, start_fixture_site
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logging.getLogger("urllib3").setLevel(logging.ERROR)
+
+
+def start_fake_grid():
+    """Runs the fake driver as a standalone endpoint, the way a Selenium Grid is reached"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen([sys.executable, FAKE_DRIVER, f"--port={port}"])
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("The fake driver did not start")
+
+
+class BackendTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base_url = start_fixture_site()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def launch(self, backend, **kwargs):
+        driver, wait = DriverInit(drivers_route=FAKE_DRIVER).create_driver(
+            backend=backend, window_size=WINDOW_MIN, **kwargs
+        )
+        self.addCleanup(driver.quit)
+        return driver
+
+    def cookie_names(self, driver):
+        return sorted(cookie["name"] for cookie in driver.get_cookies())
+
+
+@unittest.skipUnless(SELENIUM, "selenium is not installed")
+class TestChromeBackend(BackendTestCase):
+
+    def test_capabilities(self):
+        backend = ChromeBackend()
+        self.assertTrue(backend.supports_cdp)
+        self.assertTrue(backend.supports_user_data)
+        options = backend.build_options(LaunchProfile(window_size=WINDOW_MIN), "/tmp/profile")
+        self.assertIn("--user-data-dir=/tmp/profile", options.arguments)
+
+    def test_cookies_and_snapshots_go_through_cdp(self):
+        snapshot = SessionSnapshot(cookies=[{"name": "restored", "value": "1", "domain": "127.0.0.1"}])
+        driver = self.launch(ChromeBackend(), session=snapshot, initial_url=f"{self.base_url}/page/1",
+                             cookies=[{"name": "batched", "value": "2"}], block_resources=[BLOCK_IMAGES])
+        self.assertEqual(driver.title, "Fixture page 1")
+        self.assertEqual(self.cookie_names(driver), ["batched", "restored"])
+        # Set through Network.setCookies, which binds cookies without a domain to the current URL
+        batched = next(cookie for cookie in driver.get_cookies() if cookie["name"] == "batched")
+        self.assertEqual(batched["url"], f"{self.base_url}/page/1")
+
+
+@unittest.skipUnless(SELENIUM, "selenium is not installed")
+class TestUndetectedChromeBackend(unittest.TestCase):
+    """undetected_chromedriver patches the driver binary and starts Chrome itself, so it is not launched here"""
+
+    def test_selected_for_undetectable_profiles(self):
+        self.assertIsInstance(default_backend(LaunchProfile(undetectable=True)), UndetectedChromeBackend)
+        self.assertIs(type(default_backend(LaunchProfile())), ChromeBackend)
+
+    def test_capabilities(self):
+        backend = UndetectedChromeBackend()
+        self.assertTrue(backend.supports_cdp)
+        self.assertTrue(backend.supports_user_data)
+        options = backend.build_options(LaunchProfile(undetectable=True), "/tmp/profile")
+        self.assertIn("--user-data-dir=/tmp/profile", options.arguments)
+        self.assertNotIn("excludeSwitches", options.experimental_options)
+
+
+@unittest.skipUnless(SELENIUM, "selenium is not installed")
+class TestFirefoxBackend(BackendTestCase):
+    """The fake driver answers geckodriver's command line, so FirefoxBackend launches it too"""
+
+    def test_capabilities(self):
+        backend = FirefoxBackend()
+        self.assertFalse(backend.supports_cdp)
+        self.assertFalse(backend.supports_user_data)
+
+    def test_profile_maps_to_preferences(self):
+        profile = LaunchProfile(window_size=WINDOW_MIN, block_resources=(BLOCK_IMAGES,), user_agent="agent/1.0",
+                                proxy_server="http://127.0.0.1:8899")
+        options = FirefoxBackend().build_options(profile)
+        self.assertIn("-headless", options.arguments)
+        self.assertEqual(options.preferences["permissions.default.image"], 2)
+        self.assertEqual(options.preferences["general.useragent.override"], "agent/1.0")
+        self.assertEqual(options.preferences["network.proxy.ssl"], "127.0.0.1")
+        self.assertEqual(options.preferences["network.proxy.ssl_port"], 8899)
+        self.assertTrue(options.accept_insecure_certs)
+
+    def test_cookies_fall_back_to_add_cookie(self):
+        driver = self.launch(FirefoxBackend(driver_path=FAKE_DRIVER), initial_url=f"{self.base_url}/page/2",
+                             cookies=[{"name": "one", "value": "1"}, {"name": "two", "value": "2"}])
+        # Every Selenium driver has execute_cdp_cmd, the capabilities tell whether it works
+        self.assertFalse(driver_supports_cdp(driver))
+        self.assertEqual(driver.title, "Fixture page 2")
+        self.assertEqual(self.cookie_names(driver), ["one", "two"])
+
+    def test_cdp_only_stages_are_skipped(self):
+        with self.assertLogs("init_selenium.init_driver", logging.WARNING) as logs:
+            self.launch(FirefoxBackend(driver_path=FAKE_DRIVER), block_resources=[BLOCK_FONTS])
+        self.assertTrue(any("has no CDP" in line for line in logs.output))
+
+        with self.assertRaises(ValueError):
+            self.launch(FirefoxBackend(driver_path=FAKE_DRIVER), session=SessionSnapshot())
+
+
+@unittest.skipUnless(SELENIUM, "selenium is not installed")
+class TestRemoteBackend(BackendTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.grid, cls.grid_url = start_fake_grid()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.grid.kill()
+        cls.grid.wait()
+        super().tearDownClass()
+
+    def test_chrome_keeps_cdp(self):
+        backend = RemoteBackend(self.grid_url, browser="chrome")
+        self.assertTrue(backend.supports_cdp)
+        self.assertFalse(backend.supports_user_data)
+        driver = self.launch(backend, initial_url=f"{self.base_url}/page/3", cookies=[{"name": "remote", "value": "1"}])
+
+        self.assertTrue(driver_supports_cdp(driver))
+        handle = driver.execute_cdp_cmd("Target.createTarget", {"url": "about:blank"})["targetId"]
+        self.assertIn(handle, driver.window_handles)
+        self.assertEqual(self.cookie_names(driver), ["remote"])
+
+    def test_firefox_has_no_cdp(self):
+        backend = RemoteBackend(self.grid_url, browser="firefox")
+        self.assertFalse(backend.supports_cdp)
+        driver = self.launch(backend, initial_url=f"{self.base_url}/page/4",
+                             cookies=[{"name": "remote", "value": "1"}])
+        self.assertFalse(driver_supports_cdp(driver))
+        self.assertEqual(driver.title, "Fixture page 4")
+        self.assertEqual(self.cookie_names(driver), ["remote"])
+
+    def test_unknown_browser(self):
+        with self.assertRaises(ValueError):
+            RemoteBackend(self.grid_url, browser="safari")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import importlib.util
+import logging
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SELENIUM = importlib.util.find_spec("selenium") is not None
+if SELENIUM:
+    from selenium.common.exceptions import NoSuchElementException
+    from init_selenium import DriverInit, Crawler, WINDOW_MIN
+    from bench_driver_lifecycle import FAKE_DRIVER, start_fixture_site
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logging.getLogger("urllib3").setLevel(logging.ERROR)
+
+
+def title(driver, wait, url):
+    return driver.title
+
+
+@unittest.skipUnless(SELENIUM, "selenium is not installed")
+class TestCrawler(unittest.TestCase):
+    """Runs against private/fake_chromedriver.py"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base_url = start_fixture_site()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def crawler(self, workers: int = 2, **kwargs) -> "Crawler":
+        return Crawler(DriverInit(drivers_route=FAKE_DRIVER), workers=workers, window_size=WINDOW_MIN, **kwargs)
+
+    def counting_launches(self, crawler: "Crawler") -> list:
+        launches = []
+        launch = crawler._launch
+
+        def counted():
+            launches.append(1)
+            return launch()
+
+        crawler._launch = counted
+        return launches
+
+    def test_results_for_every_url(self):
+        urls = [f"{self.base_url}/page/{page}" for page in range(1, 5)]
+        results = list(self.crawler().run(urls, title))
+        self.assertEqual(sorted(result.url for result in results), urls)
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(sorted(result.value for result in results), [f"Fixture page {page}" for page in range(1, 5)])
+
+    def test_url_source_error_is_raised_after_queued_urls(self):
+        def urls():
+            yield f"{self.base_url}/page/1"
+            yield f"{self.base_url}/page/2"
+            raise OSError("URL file went away")
+
+        visited = []
+        with self.assertLogs("init_selenium.crawl", logging.ERROR):
+            with self.assertRaisesRegex(OSError, "URL file went away"):
+                for result in self.crawler(retries=0).run(urls(), title):
+                    visited.append(result.value)
+        self.assertEqual(sorted(visited), ["Fixture page 1", "Fixture page 2"])
+
+    def test_callback_errors_fail_without_relaunch(self):
+        def missing(driver, wait, url):
+            raise NoSuchElementException("no such element: #not-on-the-page")
+
+        crawler = self.crawler(workers=1, retries=2, backoff=0)
+        launches = self.counting_launches(crawler)
+        [result] = crawler.run([f"{self.base_url}/page/1"], missing)
+        self.assertIsInstance(result.error, NoSuchElementException)
+        self.assertEqual(result.attempts, 1)
+        self.assertEqual(len(launches), 1)
+
+    def test_lost_session_is_relaunched_and_retried(self):
+        calls = []
+
+        def crash_once(driver, wait, url):
+            calls.append(url)
+            if len(calls) == 1:
+                driver.quit()
+            return driver.title
+
+        crawler = self.crawler(workers=1, retries=2, backoff=0)
+        launches = self.counting_launches(crawler)
+        [result] = crawler.run([f"{self.base_url}/page/2"], crash_once)
+        self.assertTrue(result.ok)
+        self.assertEqual(result.value, "Fixture page 2")
+        self.assertEqual(result.attempts, 2)
+        self.assertEqual(len(launches), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import importlib.util
+import itertools
+import logging
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SELENIUM = importlib.util.find_spec("selenium") is not None
+if SELENIUM:
+    from init_selenium import DriverInit, Fleet, WINDOW_MIN
+    from bench_driver_lifecycle import FAKE_DRIVER, start_fixture_site
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logging.getLogger("urllib3").setLevel(logging.ERROR)
+
+
+def title(driver, wait, url):
+    # Module-level so worker processes can unpickle it
+    return driver.title
+
+
+@unittest.skipUnless(SELENIUM, "selenium is not installed")
+class TestFleet(unittest.TestCase):
+    """Spawns worker processes that drive private/fake_chromedriver.py"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base_url = start_fixture_site()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def fleet(self, **kwargs) -> "Fleet":
+        return Fleet(DriverInit(drivers_route=FAKE_DRIVER), processes=2, drivers_per_process=1, retries=0,
+                     join_timeout=10, window_size=WINDOW_MIN, **kwargs)
+
+    def page(self, number: int) -> str:
+        return f"{self.base_url}/page/{number}"
+
+    def endless_pages(self):
+        for number in itertools.count(1):
+            yield self.page(number)
+
+    def test_results_are_streamed(self):
+        urls = [self.page(number) for number in range(1, 7)]
+        results = list(self.fleet().run(urls, title))
+        self.assertEqual(sorted(result.url for result in results), sorted(urls))
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual({result.url: result.value for result in results},
+                         {self.page(number): f"Fixture page {number}" for number in range(1, 7)})
+
+    def test_url_source_error_reaches_the_caller(self):
+        def urls():
+            yield self.page(1)
+            yield self.page(2)
+            raise OSError("URL file went away")
+
+        results = []
+        with self.assertLogs("init_selenium.fleet", logging.ERROR):
+            with self.assertRaisesRegex(OSError, "URL file went away"):
+                for result in self.fleet().run(urls(), title):
+                    results.append(result)
+        self.assertEqual(sorted(result.value for result in results), ["Fixture page 1", "Fixture page 2"])
+
+    def test_drain_finishes_queued_urls(self):
+        fleet = self.fleet(queue_size=4)
+        results = []
+        for result in fleet.run(self.endless_pages(), title):
+            results.append(result)
+            if len(results) == 1:
+                fleet.drain()
+        # The endless source stopped being read, what was already queued still completed
+        self.assertGreater(len(results), 1)
+        self.assertTrue(all(result.ok for result in results))
+
+    def test_cancel_stops_the_fleet(self):
+        fleet = self.fleet(queue_size=4)
+        results = []
+        for result in fleet.run(self.endless_pages(), title):
+            results.append(result)
+            if len(results) == 1:
+                fleet.cancel()
+        self.assertGreaterEqual(len(results), 1)
+        self.assertIsNone(fleet._stop)
+
+        # A cancelled fleet can run again
+        self.assertEqual([result.value for result in fleet.run([self.page(3)], title)], ["Fixture page 3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
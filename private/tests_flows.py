@@ -0,0 +1,114 @@
+import importlib.util
+import logging
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from init_selenium.flows import Flow, FlowStep, any_of, url_matches
+
+SELENIUM = importlib.util.find_spec("selenium") is not None
+if SELENIUM:
+    from selenium.common.exceptions import InvalidSelectorException, NoSuchElementException, TimeoutException
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+class StubDriver:
+    """Just enough of a driver for flow conditions: a URL and elements that appear after `delay` seconds"""
+
+    def __init__(self, url: str = "https://example.test/login", delay: float = 0):
+        self.current_url = url
+        self.ready_at = time.monotonic() + delay
+        self.lookups = 0
+
+    def find_element(self, by: str, selector: str):
+        self.lookups += 1
+        if selector.startswith("!"):
+            raise InvalidSelectorException(f"invalid selector: {selector}")
+        if time.monotonic() < self.ready_at:
+            raise NoSuchElementException(f"no such element: {selector}")
+        return selector
+
+
+def element(selector: str):
+    return lambda driver: driver.find_element("css selector", selector)
+
+
+def navigate(url: str, after: float = 0):
+    def action(driver, value):
+        time.sleep(after)
+        driver.current_url = url
+    return action
+
+
+@unittest.skipUnless(SELENIUM, "selenium is not installed")
+class TestFlow(unittest.TestCase):
+
+    def flow(self, steps, timeout: float) -> Flow:
+        return Flow(steps, timeout=timeout, min_poll=0.01, max_poll=0.05)
+
+    def test_step_continues_as_soon_as_its_condition_holds(self):
+        driver = StubDriver(delay=0.2)
+        received = []
+        flow = self.flow([
+            FlowStep("email", element("#email"), lambda driver, value: received.append(value)),
+            FlowStep("done", url_matches("/login")),
+        ], timeout=5)
+
+        timings = flow.run(driver)
+        self.assertEqual(received, ["#email"])
+        self.assertGreaterEqual(timings["email"], 0.2)
+        self.assertLess(timings["email"], 0.35)
+        self.assertLess(timings["done"], 0.05)
+
+    def test_budget_is_shared_by_every_step(self):
+        flow = self.flow([
+            FlowStep("submit", url_matches("/login"), navigate("https://example.test/code", after=0.25)),
+            FlowStep("home", url_matches("/home")),
+        ], timeout=0.3)
+        start = time.monotonic()
+        with self.assertRaisesRegex(TimeoutException, "'home'"):
+            flow.run(StubDriver())
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_interactive_actions_do_not_use_the_budget(self):
+        def run(interactive: bool):
+            # The person takes 0.4 s to type the code, the inbox shows up 0.1 s later
+            flow = self.flow([
+                FlowStep("code", url_matches("/login"), navigate("https://example.test/code", after=0.4),
+                         interactive=interactive),
+                FlowStep("inbox", element("#inbox")),
+            ], timeout=0.3)
+            return flow.run(StubDriver(delay=0.5))
+
+        self.assertEqual(list(run(interactive=True)), ["code", "inbox"])
+        with self.assertRaisesRegex(TimeoutException, "'inbox'"):
+            run(interactive=False)
+
+    def test_optional_step_is_skipped(self):
+        flow = self.flow([
+            FlowStep("cookie banner", element("#accept"), optional=True, timeout=0.1),
+            FlowStep("login", url_matches("/login")),
+        ], timeout=5)
+        self.assertEqual(list(flow.run(StubDriver(delay=10))), ["login"])
+
+    def test_invalid_selector_fails_fast(self):
+        driver = StubDriver()
+        flow = self.flow([FlowStep("typo", element("!#email"))], timeout=5)
+        start = time.monotonic()
+        with self.assertRaises(InvalidSelectorException):
+            flow.run(driver)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(driver.lookups, 1)
+
+        with self.assertRaises(InvalidSelectorException):
+            self.flow([FlowStep("either", any_of(element("#missing"), element("!#typo")))], timeout=5).run(
+                StubDriver(delay=10)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
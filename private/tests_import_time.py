@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+import statistics
+import unittest
+import logging
+import json
+
+# Configure logging with a more detailed format
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SRC_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Regression thresholds for `import init_selenium`, overridable through the environment
+MAX_IMPORT_SECONDS = float(os.environ.get("INIT_SELENIUM_MAX_IMPORT_SECONDS", "0.05"))
+MAX_NEW_MODULES = int(os.environ.get("INIT_SELENIUM_MAX_NEW_MODULES", "15"))
+RUNS = int(os.environ.get("INIT_SELENIUM_IMPORT_RUNS", "7"))
+
+MEASURE_SCRIPT = """
+import json, sys, time
+before = set(sys.modules)
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+new_modules = sorted(set(sys.modules) - before)
+print(json.dumps({{"seconds": elapsed, "modules": new_modules}}))
+"""
+
+
+def measure_import(statement: str, runs: int = RUNS):
+    """
+    Runs an import statement in fresh interpreters
+    Returns (median seconds, list of modules loaded by the statement)
+    """
+    env = dict(os.environ, PYTHONPATH=SRC_PATH + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    timings = []
+    modules = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", MEASURE_SCRIPT.format(statement=statement)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        modules = result["modules"]
+    return statistics.median(timings), modules
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_package_import_is_cheap(self):
+        """`import init_selenium` must not load selenium or any driver backend"""
+        seconds, modules = measure_import("import init_selenium")
+        logger.info("import init_selenium: %.1f ms, %d new modules", seconds * 1000, len(modules))
+
+        heavy = [name for name in modules if name.split(".")[0] in (
+            "selenium", "undetected_chromedriver", "chromedriver_autoinstaller", "webdriver_manager"
+        )]
+        self.assertEqual(heavy, [], "Backends must be imported lazily")
+        self.assertLessEqual(len(modules), MAX_NEW_MODULES, f"Too many modules loaded: {modules}")
+        self.assertLessEqual(seconds, MAX_IMPORT_SECONDS)
+
+    def test_lazy_attribute_access(self):
+        """Public names resolve on first access"""
+        seconds, modules = measure_import("from init_selenium import LaunchProfile, WINDOW_MAX")
+        logger.info("from init_selenium import LaunchProfile: %.1f ms, %d new modules", seconds * 1000, len(modules))
+        self.assertIn("init_selenium.profile", modules)
+        self.assertNotIn("init_selenium.init_driver", modules)
+
+    def test_init_driver_does_not_need_selenium(self):
+        """LanguageManager and DriverInit import without loading selenium, which is only needed to launch"""
+        seconds, modules = measure_import("from init_selenium import LanguageManager, DriverInit, SessionSnapshot, Flow")
+        logger.info("from init_selenium import LanguageManager: %.1f ms, %d new modules", seconds * 1000, len(modules))
+        self.assertIn("init_selenium.init_driver", modules)
+        self.assertEqual([name for name in modules if name.split(".")[0] == "selenium"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
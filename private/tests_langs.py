@@ -0,0 +1,59 @@
+import logging
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from init_selenium.langs import LANGUAGES, accept_languages, language_code, language_name, normalize_tag
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+class TestLanguageLookup(unittest.TestCase):
+
+    def test_names_and_codes(self):
+        self.assertEqual(language_code("English"), "en")
+        self.assertEqual(language_code("en"), "en")
+        self.assertEqual(language_code("Chinese (Traditional)"), "zh-Hant")
+        self.assertEqual(LANGUAGES["langs"]["Spanish"], "es")
+
+    def test_aliases(self):
+        # Legacy ISO 639 codes and alternative names resolve to the canonical code
+        self.assertEqual(language_code("iw"), "he")
+        self.assertEqual(language_code("in"), "id")
+        self.assertEqual(language_code("Bangla"), "bn")
+        self.assertEqual(accept_languages("iw"), ("he",))
+
+    def test_case_is_ignored(self):
+        self.assertEqual(language_code("  ENGLISH "), "en")
+        self.assertEqual(language_code("bangla"), "bn")
+        self.assertEqual(language_code("ZH-HANS"), "zh-Hans")
+        self.assertEqual(language_name("ZH-hant"), "Chinese (Traditional)")
+        self.assertEqual(language_name("zh_Hans"), "Chinese (Simplified)")
+
+    def test_regions_and_scripts(self):
+        self.assertEqual(normalize_tag("EN_us"), "en-US")
+        self.assertEqual(normalize_tag("zh-hant-tw"), "zh-Hant-TW")
+        self.assertEqual(normalize_tag("es-419"), "es-419")
+        self.assertEqual(language_code("pt_br"), "pt-BR")
+        self.assertEqual(language_code("iw-IL"), "he-IL")
+        self.assertEqual(accept_languages("EN-us"), ("en-US", "en"))
+        self.assertEqual(accept_languages("zh-hant-tw"), ("zh-Hant-TW", "zh-Hant", "zh"))
+        self.assertEqual(accept_languages("English"), ("en",))
+
+    def test_unknown_languages(self):
+        for language in ("Klingon", "xx", "xx-YY", ""):
+            with self.subTest(language=language), self.assertRaises(KeyError):
+                language_code(language)
+        with self.assertRaises(KeyError):
+            accept_languages("tlh-Latn")
+        with self.assertRaises(KeyError):
+            language_name("xx")
+        # Region tags are not in the name table, only their language is
+        with self.assertRaises(KeyError):
+            language_name("en-US")
+
+
+if __name__ == "__main__":
+    unittest.main()
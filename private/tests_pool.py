@@ -0,0 +1,90 @@
+import importlib.util
+import logging
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SELENIUM = importlib.util.find_spec("selenium") is not None
+if SELENIUM:
+    from selenium.common.exceptions import WebDriverException
+    from init_selenium import DriverInit, DriverPool, WINDOW_MIN
+    from bench_driver_lifecycle import FAKE_DRIVER, start_fixture_site
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logging.getLogger("urllib3").setLevel(logging.ERROR)
+
+
+@unittest.skipUnless(SELENIUM, "selenium is not installed")
+class TestDriverPool(unittest.TestCase):
+    """Runs against private/fake_chromedriver.py, which records the origins whose storage is cleared"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base_url = start_fixture_site()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def pool(self, **kwargs) -> "DriverPool":
+        pool = DriverPool(DriverInit(drivers_route=FAKE_DRIVER), size=1, checkout_timeout=30,
+                          window_size=WINDOW_MIN, **kwargs)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_checkin_resets_visited_origins(self):
+        pool = self.pool()
+        other_origin = self.base_url.replace("127.0.0.1", "localhost")
+        with pool.lease() as (driver, wait):
+            driver.get(f"{self.base_url}/page/1")
+            driver.add_cookie({"name": "tracker", "value": "1", "domain": ".example.test"})
+            driver.execute_cdp_cmd("Target.createTarget", {"url": f"{other_origin}/page/2"})
+            self.assertEqual(len(driver.window_handles), 2)
+
+        item = pool.checkout()
+        driver = item.driver
+        cleared = driver.execute_cdp_cmd("FakeDriver.getClearedOrigins", {})["origins"]
+        self.assertEqual(sorted(cleared), sorted([
+            self.base_url, other_origin, "http://example.test", "https://example.test",
+        ]))
+        self.assertNotIn("*", cleared)
+        self.assertEqual(len(driver.window_handles), 1)
+        self.assertEqual(driver.current_url, "about:blank")
+        self.assertEqual(driver.get_cookies(), [])
+        self.assertEqual(item.uses, 2)
+
+        # The history was reset, so a lease that visits nothing clears nothing
+        pool.checkin(item)
+        self.assertEqual(driver.execute_cdp_cmd("FakeDriver.getClearedOrigins", {})["origins"], cleared)
+
+    def test_max_uses_recycles_driver(self):
+        pool = self.pool(max_uses=2)
+        first = pool.checkout()
+        session_id = first.driver.session_id
+        pool.checkin(first)
+        second = pool.checkout()
+        self.assertEqual(second.driver.session_id, session_id)
+        pool.checkin(second)
+
+        third = pool.checkout()
+        self.assertNotEqual(third.driver.session_id, session_id)
+        self.assertEqual(third.uses, 1)
+        pool.checkin(third)
+
+    def test_failed_lease_is_discarded(self):
+        pool = self.pool()
+        with self.assertRaises(WebDriverException):
+            with pool.lease() as (driver, wait):
+                session_id = driver.session_id
+                raise WebDriverException("broken")
+
+        with pool.lease() as (driver, wait):
+            self.assertNotEqual(driver.session_id, session_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
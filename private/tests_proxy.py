@@ -0,0 +1,300 @@
+import http.client
+import importlib.util
+import logging
+import os
+import socket
+import ssl
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from init_selenium.proxy import CachingProxy, ContentStore, CertificateAuthority, FORCE
+
+CRYPTOGRAPHY = importlib.util.find_spec("cryptography") is not None
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    """Fixture origin counting the requests it serves per path"""
+    protocol_version = "HTTP/1.1"
+    requests = {}
+    lock = threading.Lock()
+    # Holds back the second event of /stream until set
+    release = threading.Event()
+
+    def do_GET(self):
+        with self.lock:
+            self.requests[self.path] = self.requests.get(self.path, 0) + 1
+        if self.path == "/ws" and self.headers.get("Upgrade") == "websocket":
+            return self.echo_websocket()
+        if self.path == "/stream":
+            return self.event_stream()
+        if self.path == "/large-unsized":
+            return self.unsized({"Cache-Control": "max-age=60"}, b"x" * 5000)
+        headers = {"Content-Type": "text/plain"}
+        if self.path == "/cached":
+            headers["Cache-Control"] = "max-age=60"
+        elif self.path == "/nostore":
+            headers["Cache-Control"] = "no-store"
+        elif self.path == "/etag":
+            headers["Cache-Control"] = "max-age=1"
+            headers["ETag"] = '"v1"'
+            if self.headers.get("If-None-Match") == '"v1"':
+                return self.reply(304, headers, b"")
+        elif self.path == "/large":
+            headers["Cache-Control"] = "max-age=60"
+            return self.reply(200, headers, b"x" * 5000)
+        self.reply(200, headers, f"body of {self.path}".encode())
+
+    def echo_websocket(self):
+        self.send_response(101)
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.end_headers()
+        self.wfile.flush()
+        self.connection.sendall(self.connection.recv(64))
+        self.close_connection = True
+
+    def event_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(b"data: 1\n\n")
+        self.wfile.flush()
+        self.release.wait(5)
+        self.wfile.write(b"data: 2\n\n")
+        self.close_connection = True
+
+    def unsized(self, headers: dict, body: bytes):
+        """A body without Content-Length, ended by closing the connection"""
+        self.send_response(200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.close_connection = True
+
+    def reply(self, status: int, headers: dict, body: bytes):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_origin(context: "ssl.SSLContext" = None):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OriginHandler)
+    server.daemon_threads = True
+    if context is not None:
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+
+def start_echo_server():
+    """Plain TCP server echoing the first bytes of every connection, like a ws:// endpoint"""
+    server = socket.create_server(("127.0.0.1", 0))
+
+    def serve():
+        while True:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                return
+            with connection:
+                connection.sendall(connection.recv(64))
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server, server.getsockname()[1]
+
+
+def read_head(connection: socket.socket) -> bytes:
+    """Reads a response head byte by byte, so nothing after it is consumed"""
+    head = b""
+    while not head.endswith(b"\r\n\r\n"):
+        byte = connection.recv(1)
+        if not byte:
+            break
+        head += byte
+    return head
+
+
+class TestCachingProxy(unittest.TestCase):
+    """Everything runs on loopback: a fixture origin, the proxy and http.client as the browser"""
+
+    def setUp(self):
+        OriginHandler.requests = {}
+        OriginHandler.release.clear()
+        self.origin, self.origin_port = start_origin()
+        self.addCleanup(self.origin.server_close)
+        self.addCleanup(self.origin.shutdown)
+        root = tempfile.mkdtemp()
+        # localhost and 127.0.0.1 reach the same origin, the FORCE rule only matches the first
+        self.proxy = CachingProxy(ContentStore(os.path.join(root, "http")), rules={"localhost": FORCE},
+                                  intercept_https=False).start()
+        self.addCleanup(self.proxy.close)
+
+    def get(self, host: str, path: str):
+        proxy_port = int(self.proxy.url.rpartition(":")[2])
+        connection = http.client.HTTPConnection("127.0.0.1", proxy_port, timeout=10)
+        try:
+            connection.request("GET", f"http://{host}:{self.origin_port}{path}")
+            response = connection.getresponse()
+            return response.status, response.getheader("X-Cache"), response.read()
+        finally:
+            connection.close()
+
+    def test_hit_after_miss(self):
+        self.assertEqual(self.get("127.0.0.1", "/cached"), (200, "MISS", b"body of /cached"))
+        self.assertEqual(self.get("127.0.0.1", "/cached"), (200, "HIT", b"body of /cached"))
+        self.assertEqual(OriginHandler.requests["/cached"], 1)
+        self.assertEqual(self.proxy.stats["hits"], 1)
+        self.assertEqual(self.proxy.stats["misses"], 1)
+        self.assertEqual(self.proxy.stats["bytes_from_cache"], len(b"body of /cached"))
+
+    def test_no_store_is_not_cached(self):
+        self.get("127.0.0.1", "/nostore")
+        self.assertEqual(self.get("127.0.0.1", "/nostore")[1], "MISS")
+        self.assertEqual(OriginHandler.requests["/nostore"], 2)
+        self.assertEqual(self.proxy.stats["stored"], 0)
+
+    def test_force_rule_caches_no_store(self):
+        self.assertEqual(self.get("localhost", "/nostore")[1], "MISS")
+        self.assertEqual(self.get("localhost", "/nostore")[1], "HIT")
+        self.assertEqual(OriginHandler.requests["/nostore"], 1)
+
+    def test_stale_response_is_revalidated(self):
+        self.assertEqual(self.get("127.0.0.1", "/etag"), (200, "MISS", b"body of /etag"))
+        time.sleep(1.2)
+        self.assertEqual(self.get("127.0.0.1", "/etag"), (200, "REVALIDATED", b"body of /etag"))
+        # The 304 refreshed the entry, so it is fresh again
+        self.assertEqual(self.get("127.0.0.1", "/etag")[1], "HIT")
+        self.assertEqual(OriginHandler.requests["/etag"], 2)
+        self.assertEqual(self.proxy.stats["revalidated"], 1)
+        self.assertEqual(self.proxy.stats["misses"], 1)
+
+    def test_uncached_response_is_streamed(self):
+        proxy_port = int(self.proxy.url.rpartition(":")[2])
+        connection = http.client.HTTPConnection("127.0.0.1", proxy_port, timeout=10)
+        self.addCleanup(connection.close)
+        connection.request("GET", f"http://127.0.0.1:{self.origin_port}/stream")
+        response = connection.getresponse()
+        self.assertEqual(response.getheader("Transfer-Encoding"), "chunked")
+        # The first event arrives while the origin still holds the second one back
+        self.assertEqual(response.read1(), b"data: 1\n\n")
+        self.assertFalse(OriginHandler.release.is_set())
+        OriginHandler.release.set()
+        self.assertEqual(response.read(), b"data: 2\n\n")
+        self.assertEqual(self.proxy.stats["stored"], 0)
+
+    def test_large_responses_are_streamed_not_stored(self):
+        self.proxy.max_object_bytes = 1000
+        for path in ("/large", "/large-unsized"):
+            for _ in range(2):
+                self.assertEqual(self.get("127.0.0.1", path), (200, "MISS", b"x" * 5000))
+            self.assertEqual(OriginHandler.requests[path], 2)
+        self.assertEqual(self.proxy.stats["stored"], 0)
+
+    def test_websocket_upgrade_is_passed_through(self):
+        proxy_port = int(self.proxy.url.rpartition(":")[2])
+        with socket.create_connection(("127.0.0.1", proxy_port), timeout=10) as connection:
+            connection.sendall(
+                f"GET http://127.0.0.1:{self.origin_port}/ws HTTP/1.1\r\n"
+                f"Host: 127.0.0.1:{self.origin_port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n\r\n".encode()
+            )
+            self.assertTrue(read_head(connection).startswith(b"HTTP/1.1 101"))
+            connection.sendall(b"ping")
+            self.assertEqual(connection.recv(64), b"ping")
+        self.assertEqual(self.proxy.stats["upgraded"], 1)
+
+    @unittest.skipUnless(CRYPTOGRAPHY, "cryptography is not installed")
+    def test_plain_tunnels_are_not_intercepted(self):
+        echo, echo_port = start_echo_server()
+        self.addCleanup(echo.close)
+        root = tempfile.mkdtemp()
+        proxy = CachingProxy(ContentStore(os.path.join(root, "http")), intercept_https=True,
+                             authority=CertificateAuthority(os.path.join(root, "ca"))).start()
+        self.addCleanup(proxy.close)
+        proxy_port = int(proxy.url.rpartition(":")[2])
+
+        with socket.create_connection(("127.0.0.1", proxy_port), timeout=10) as connection:
+            connection.sendall(f"CONNECT 127.0.0.1:{echo_port} HTTP/1.1\r\n\r\n".encode())
+            self.assertTrue(read_head(connection).startswith(b"HTTP/1.1 200"))
+            # Not a TLS ClientHello, so the bytes go to the origin untouched
+            connection.sendall(b"GET / HTTP/1.1\r\n")
+            self.assertEqual(connection.recv(64), b"GET / HTTP/1.1\r\n")
+        self.assertEqual(proxy.stats["tunnels"], 1)
+        self.assertEqual(proxy.stats["intercepted"], 0)
+
+    @unittest.skipUnless(CRYPTOGRAPHY, "cryptography is not installed")
+    def test_https_is_intercepted_and_cached(self):
+        root = tempfile.mkdtemp()
+        origin_ca = CertificateAuthority(os.path.join(root, "origin-ca"))
+        origin, origin_port = start_origin(origin_ca.context_for("127.0.0.1"))
+        self.addCleanup(origin.server_close)
+        self.addCleanup(origin.shutdown)
+        proxy = CachingProxy(ContentStore(os.path.join(root, "http")), authority=CertificateAuthority(
+            os.path.join(root, "proxy-ca")), verify=origin_ca.ca_path).start()
+        self.addCleanup(proxy.close)
+        proxy_port = int(proxy.url.rpartition(":")[2])
+        # The browser side trusts the proxy's CA, not the origin's
+        context = ssl.create_default_context(cafile=proxy.authority.ca_path)
+
+        results = []
+        for _ in range(2):
+            connection = http.client.HTTPSConnection("127.0.0.1", proxy_port, timeout=10, context=context)
+            connection.set_tunnel("127.0.0.1", origin_port)
+            try:
+                connection.request("GET", "/cached")
+                response = connection.getresponse()
+                results.append((response.status, response.getheader("X-Cache"), response.read()))
+            finally:
+                connection.close()
+
+        self.assertEqual(results, [(200, "MISS", b"body of /cached"), (200, "HIT", b"body of /cached")])
+        self.assertEqual(OriginHandler.requests["/cached"], 1)
+        self.assertEqual(proxy.stats["intercepted"], 2)
+        self.assertEqual(proxy.stats["tunnels"], 0)
+
+    @unittest.skipUnless(CRYPTOGRAPHY, "cryptography is not installed")
+    def test_wss_upgrade_inside_intercepted_tunnel(self):
+        root = tempfile.mkdtemp()
+        origin_ca = CertificateAuthority(os.path.join(root, "origin-ca"))
+        origin, origin_port = start_origin(origin_ca.context_for("127.0.0.1"))
+        self.addCleanup(origin.server_close)
+        self.addCleanup(origin.shutdown)
+        proxy = CachingProxy(ContentStore(os.path.join(root, "http")), authority=CertificateAuthority(
+            os.path.join(root, "proxy-ca")), verify=origin_ca.ca_path).start()
+        self.addCleanup(proxy.close)
+        proxy_port = int(proxy.url.rpartition(":")[2])
+        context = ssl.create_default_context(cafile=proxy.authority.ca_path)
+
+        with socket.create_connection(("127.0.0.1", proxy_port), timeout=10) as raw:
+            raw.sendall(f"CONNECT 127.0.0.1:{origin_port} HTTP/1.1\r\n\r\n".encode())
+            self.assertTrue(read_head(raw).startswith(b"HTTP/1.1 200"))
+            with context.wrap_socket(raw, server_hostname="127.0.0.1") as connection:
+                connection.sendall(
+                    f"GET /ws HTTP/1.1\r\nHost: 127.0.0.1:{origin_port}\r\n"
+                    "Upgrade: websocket\r\nConnection: Upgrade\r\n\r\n".encode()
+                )
+                self.assertTrue(read_head(connection).startswith(b"HTTP/1.1 101"))
+                connection.sendall(b"ping")
+                self.assertEqual(connection.recv(64), b"ping")
+        self.assertEqual(proxy.stats["intercepted"], 1)
+        self.assertEqual(proxy.stats["upgraded"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
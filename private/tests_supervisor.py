@@ -0,0 +1,129 @@
+import importlib.util
+import logging
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SELENIUM = importlib.util.find_spec("selenium") is not None
+if SELENIUM:
+    from selenium.common.exceptions import WebDriverException
+    from init_selenium import DriverInit, Supervisor, SessionRestarted, WINDOW_MIN
+    from bench_driver_lifecycle import FAKE_DRIVER, start_fixture_site
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logging.getLogger("urllib3").setLevel(logging.ERROR)
+
+
+@unittest.skipUnless(SELENIUM, "selenium is not installed")
+class TestSupervisor(unittest.TestCase):
+    """Runs against private/fake_chromedriver.py, whose fake_hang and fake_crash URLs wedge or kill it"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base_url = start_fixture_site()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def supervise(self, **kwargs) -> "Supervisor":
+        options = dict(command_timeout=1, navigation_timeout=1, grace=0.5, probe_interval=60, probe_timeout=1,
+                       window_size=WINDOW_MIN)
+        options.update(kwargs)
+        supervisor = Supervisor(DriverInit(drivers_route=FAKE_DRIVER), **options).start()
+        self.addCleanup(supervisor.close)
+        return supervisor
+
+    def test_hang_hits_deadline_and_restarts(self):
+        supervisor = self.supervise()
+        driver = supervisor.driver
+        driver.get(f"{self.base_url}/page/1")
+        session_id = driver.session_id
+
+        start = time.monotonic()
+        with self.assertRaises(SessionRestarted):
+            # CDP commands are not navigations, so they are not retried
+            driver.execute_cdp_cmd("Page.navigate", {"url": f"{self.base_url}/page/2?fake_hang=30"})
+        self.assertLess(time.monotonic() - start, 10, "The deadline should end the hang well before it finishes")
+
+        self.assertNotEqual(driver.session_id, session_id)
+        self.assertEqual(supervisor.stats["hangs"], 1)
+        self.assertEqual(supervisor.stats["restarts"], 1)
+        # The replacement is sent back to the last page
+        self.assertEqual(driver.title, "Fixture page 1")
+
+    def test_crash_fails_over(self):
+        supervisor = self.supervise()
+        driver = supervisor.driver
+        driver.get(f"{self.base_url}/page/3")
+        session_id = driver.session_id
+
+        with self.assertRaises(SessionRestarted):
+            driver.execute_cdp_cmd("Page.navigate", {"url": f"{self.base_url}/page/4?fake_crash=1"})
+
+        self.assertNotEqual(driver.session_id, session_id)
+        self.assertEqual(supervisor.stats["crashes"], 1)
+        self.assertEqual(supervisor.stats["hangs"], 0)
+        self.assertEqual(driver.current_url, f"{self.base_url}/page/3")
+
+    def test_navigation_is_retried_on_new_session(self):
+        supervisor = self.supervise()
+        driver = supervisor.driver
+        session_id = driver.session_id
+        marker = os.path.join(tempfile.mkdtemp(), "crashed")
+        url = f"{self.base_url}/page/5?fake_crash_once={marker}"
+
+        driver.get(url)
+
+        self.assertTrue(os.path.exists(marker), "The first attempt should have crashed the driver")
+        self.assertNotEqual(driver.session_id, session_id)
+        self.assertEqual(driver.current_url, url)
+        self.assertEqual(supervisor.stats["retried_navigations"], 1)
+        self.assertEqual(supervisor.stats["crashes"], 1)
+
+    def test_max_restarts_exhausted(self):
+        supervisor = self.supervise(max_restarts=1)
+        driver = supervisor.driver
+        crash = {"url": f"{self.base_url}/page/6?fake_crash=1"}
+
+        with self.assertRaises(SessionRestarted):
+            driver.execute_cdp_cmd("Page.navigate", crash)
+        with self.assertRaises(WebDriverException) as raised:
+            driver.execute_cdp_cmd("Page.navigate", crash)
+        self.assertNotIsInstance(raised.exception, SessionRestarted)
+
+        self.assertEqual(supervisor.stats["restarts"], 1)
+        self.assertEqual(supervisor.stats["crashes"], 2)
+        with self.assertRaises(WebDriverException):
+            supervisor.current_driver()
+
+    def test_probes_replace_idle_crashed_session(self):
+        supervisor = self.supervise(probe_interval=0.2)
+        driver = supervisor.driver
+        driver.get(f"{self.base_url}/page/7")
+        time.sleep(0.6)
+        self.assertGreaterEqual(supervisor.stats["probes"], 1)
+        self.assertEqual(supervisor.stats["failed_probes"], 0)
+
+        session_id = driver.session_id
+        os.kill(driver.service.process.pid, 9)
+        deadline = time.monotonic() + 10
+        # The probe counts its failure once the replacement session is up
+        while supervisor.stats["failed_probes"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        self.assertEqual(supervisor.stats["restarts"], 1)
+        self.assertEqual(supervisor.stats["failed_probes"], 1)
+        self.assertEqual(supervisor.stats["crashes"], 1)
+        self.assertGreater(supervisor.stats["restart_seconds"], 0)
+        self.assertNotEqual(driver.session_id, session_id)
+        self.assertEqual(driver.title, "Fixture page 7")
+
+
+if __name__ == "__main__":
+    unittest.main()
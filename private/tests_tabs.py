@@ -0,0 +1,97 @@
+import importlib.util
+import logging
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SELENIUM = importlib.util.find_spec("selenium") is not None
+if SELENIUM:
+    from selenium.common.exceptions import NoSuchElementException, TimeoutException
+    from init_selenium import DriverInit, TabPool, WINDOW_MIN
+    from bench_driver_lifecycle import FAKE_DRIVER, start_fixture_site
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logging.getLogger("urllib3").setLevel(logging.ERROR)
+
+
+@unittest.skipUnless(SELENIUM, "selenium is not installed")
+class TestTabPool(unittest.TestCase):
+    """Runs against private/fake_chromedriver.py, whose Target.createTarget opens a window per tab"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base_url = start_fixture_site()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def pool(self, **kwargs) -> "TabPool":
+        pool = TabPool(DriverInit(drivers_route=FAKE_DRIVER), window_size=WINDOW_MIN, **kwargs).start()
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_tabs_load_pages_in_their_own_context(self):
+        pool = self.pool()
+        first = pool.open_tab(f"{self.base_url}/page/1")
+        second = pool.open_tab(f"{self.base_url}/page/2")
+
+        self.assertEqual(first.title, "Fixture page 1")
+        self.assertEqual(second.title, "Fixture page 2")
+        self.assertEqual(first.current_url, f"{self.base_url}/page/1")
+        self.assertNotEqual(first.context_id, second.context_id)
+        self.assertIn(first.handle, pool.driver.window_handles)
+        self.assertEqual(pool.driver.capabilities["pageLoadStrategy"], "none")
+
+    def test_shared_context_without_isolation(self):
+        pool = self.pool(isolate=False)
+        with pool.tab(f"{self.base_url}/page/3") as tab:
+            self.assertIsNone(tab.context_id)
+            self.assertEqual(tab.title, "Fixture page 3")
+
+    def test_until_ignores_missing_elements(self):
+        pool = self.pool()
+        tab = pool.open_tab()
+        calls = []
+
+        def missing(driver):
+            calls.append(driver)
+            raise NoSuchElementException("not there yet")
+
+        with self.assertRaises(TimeoutException):
+            tab.until(missing, timeout=0.2)
+        self.assertGreater(len(calls), 1)
+        with self.assertRaises(NoSuchElementException):
+            tab.until(missing, timeout=0.2, ignored_exceptions=())
+
+        outcomes = iter([NoSuchElementException("loading"), "found"])
+
+        def appears(driver):
+            outcome = next(outcomes)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        self.assertEqual(tab.until(appears, timeout=5), "found")
+
+    def test_closing_a_tab_frees_its_slot(self):
+        pool = self.pool(max_tabs=1)
+        tab = pool.open_tab()
+        handles = len(pool.driver.window_handles)
+        with self.assertRaises(TimeoutError):
+            pool.open_tab(timeout=0.1)
+
+        tab.close()
+        self.assertTrue(tab.closed)
+        self.assertEqual(len(pool.driver.window_handles), handles - 1)
+        with pool.tab() as replacement:
+            self.assertEqual(pool.tabs, [replacement])
+        self.assertEqual(pool.tabs, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import importlib.util
+import logging
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SELENIUM = importlib.util.find_spec("selenium") is not None
+if SELENIUM:
+    from selenium.common.exceptions import JavascriptException, TimeoutException
+    from selenium.webdriver.remote.command import Command
+    from init_selenium import DriverInit, AdaptiveWait, HostLatencies, WINDOW_MIN
+    from bench_driver_lifecycle import FAKE_DRIVER, start_fixture_site
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logging.getLogger("urllib3").setLevel(logging.ERROR)
+
+
+@unittest.skipUnless(SELENIUM, "selenium is not installed")
+class TestAdaptiveWait(unittest.TestCase):
+    """Runs against private/fake_chromedriver.py, whose fake_throw('...') makes a script fail"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.base_url = start_fixture_site()
+        cls.driver, _ = DriverInit(drivers_route=FAKE_DRIVER).create_driver(window_size=WINDOW_MIN)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.driver.quit()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_polls_back_off_exponentially(self):
+        wait = AdaptiveWait(self.driver, timeout=5, poll_frequency=0.16, min_poll=0.01, backoff=2)
+        pauses = []
+        wait._pause = pauses.append
+        calls = iter(range(7))
+
+        self.assertEqual(wait.until(lambda driver: next(calls) == 6), True)
+        self.assertEqual(len(pauses), 6)
+        for pause, expected in zip(pauses, [0.01, 0.02, 0.04, 0.08, 0.16, 0.16]):
+            self.assertAlmostEqual(pause, expected)
+
+    def test_script_errors_raise_at_once(self):
+        wait = AdaptiveWait(self.driver, timeout=5)
+        start = time.monotonic()
+        with self.assertRaises(JavascriptException):
+            wait.until_script("fake_throw('SyntaxError: Unexpected token )')")
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_navigation_errors_keep_waiting(self):
+        wait = AdaptiveWait(self.driver, timeout=0.3)
+        with self.assertRaises(TimeoutException):
+            wait.until_script("fake_throw('javascript error: document unloaded while waiting for result')")
+
+    def test_host_is_read_again_after_navigation(self):
+        self.driver.get(f"{self.base_url}/page/1")
+        latencies = HostLatencies()
+        wait = AdaptiveWait(self.driver, timeout=5, latencies=latencies)
+        executor = self.driver.command_executor
+        url_reads = []
+        execute = executor.execute
+
+        def counting_execute(driver_command, params=None):
+            if driver_command == Command.GET_CURRENT_URL:
+                url_reads.append(driver_command)
+            return execute(driver_command, params)
+
+        executor.execute = counting_execute
+        self.addCleanup(setattr, executor, "execute", execute)
+
+        wait.until(lambda driver: True)
+        wait.until(lambda driver: True)
+        self.assertEqual(len(url_reads), 1)
+        self.assertEqual(set(latencies.hosts), {"127.0.0.1"})
+
+        self.driver.get(f"{self.base_url.replace('127.0.0.1', 'localhost')}/page/2")
+        wait.until(lambda driver: True)
+        self.assertEqual(len(url_reads), 2)
+        self.assertEqual(set(latencies.hosts), {"127.0.0.1", "localhost"})
+
+        self.driver.switch_to.window(self.driver.current_window_handle)
+        url_reads.clear()
+        wait.until(lambda driver: True)
+        self.assertEqual(len(url_reads), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
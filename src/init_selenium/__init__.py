@@ -1,20 +1,164 @@
-from init_selenium.init_driver import (
-    DriverInit,
-    LanguageManager,
-    WINDOW_MIN,
-    WINDOW_MAX,
-    SPANISH,
-    ENGLISH_USA,
-)
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# Public names and the module that defines them. Modules are imported on first
+# attribute access, so `import init_selenium` does not load selenium or any backend
+_EXPORTS = {
+    'DriverInit': 'init_selenium.init_driver',
+    'LanguageManager': 'init_selenium.init_driver',
+    'Identity': 'init_selenium.identity',
+    'IdentityPool': 'init_selenium.identity',
+    'Backend': 'init_selenium.backends',
+    'ChromeBackend': 'init_selenium.backends',
+    'UndetectedChromeBackend': 'init_selenium.backends',
+    'FirefoxBackend': 'init_selenium.backends',
+    'RemoteBackend': 'init_selenium.backends',
+    'WINDOW_MIN': 'init_selenium.profile',
+    'WINDOW_MAX': 'init_selenium.profile',
+    'WINDOW_FAST': 'init_selenium.profile',
+    'SPANISH': 'init_selenium.profile',
+    'ENGLISH_USA': 'init_selenium.profile',
+    'BLOCK_IMAGES': 'init_selenium.profile',
+    'BLOCK_FONTS': 'init_selenium.profile',
+    'BLOCK_MEDIA': 'init_selenium.profile',
+    'BLOCK_STYLESHEETS': 'init_selenium.profile',
+    'BLOCK_ADS': 'init_selenium.profile',
+    'PAGE_LOAD_NORMAL': 'init_selenium.profile',
+    'PAGE_LOAD_EAGER': 'init_selenium.profile',
+    'PAGE_LOAD_NONE': 'init_selenium.profile',
+    'LaunchProfile': 'init_selenium.profile',
+    'SessionSnapshot': 'init_selenium.session',
+    'UserDataStore': 'init_selenium.user_data',
+    'Flow': 'init_selenium.flows',
+    'Extractor': 'init_selenium.extract',
+    'Field': 'init_selenium.extract',
+    'FlowStep': 'init_selenium.flows',
+    'DriverPool': 'init_selenium.pool',
+    'TabPool': 'init_selenium.tabs',
+    'Tab': 'init_selenium.tabs',
+    'Supervisor': 'init_selenium.supervisor',
+    'SessionRestarted': 'init_selenium.supervisor',
+    'AsyncDriverInit': 'init_selenium.async_driver',
+    'Crawler': 'init_selenium.crawl',
+    'CrawlResult': 'init_selenium.crawl',
+    'Fleet': 'init_selenium.fleet',
+    'DriverMetrics': 'init_selenium.metrics',
+    'HostLatencies': 'init_selenium.metrics',
+    'AdaptiveWait': 'init_selenium.wait',
+    'SessionTracker': 'init_selenium.procs',
+    'CommandProfiler': 'init_selenium.profiler',
+    'CachingProxy': 'init_selenium.proxy',
+    'ContentStore': 'init_selenium.proxy',
+    'HostRule': 'init_selenium.proxy',
+    'CertificateAuthority': 'init_selenium.proxy',
+    'ArtifactStore': 'init_selenium.artifacts',
+    'Artifact': 'init_selenium.artifacts',
+    'LANGUAGES': 'init_selenium.langs',
+}
+
+if TYPE_CHECKING:
+    from init_selenium.init_driver import DriverInit, LanguageManager
+    from init_selenium.identity import Identity, IdentityPool
+    from init_selenium.backends import Backend, ChromeBackend, UndetectedChromeBackend, FirefoxBackend, RemoteBackend
+    from init_selenium.profile import (
+        LaunchProfile,
+        WINDOW_MIN,
+        WINDOW_MAX,
+        WINDOW_FAST,
+        SPANISH,
+        ENGLISH_USA,
+        BLOCK_IMAGES,
+        BLOCK_FONTS,
+        BLOCK_MEDIA,
+        BLOCK_STYLESHEETS,
+        BLOCK_ADS,
+        PAGE_LOAD_NORMAL,
+        PAGE_LOAD_EAGER,
+        PAGE_LOAD_NONE,
+    )
+    from init_selenium.session import SessionSnapshot
+    from init_selenium.user_data import UserDataStore
+    from init_selenium.flows import Flow, FlowStep
+    from init_selenium.extract import Extractor, Field
+    from init_selenium.pool import DriverPool
+    from init_selenium.tabs import TabPool, Tab
+    from init_selenium.supervisor import Supervisor, SessionRestarted
+    from init_selenium.async_driver import AsyncDriverInit
+    from init_selenium.crawl import Crawler, CrawlResult
+    from init_selenium.fleet import Fleet
+    from init_selenium.metrics import DriverMetrics, HostLatencies
+    from init_selenium.wait import AdaptiveWait
+    from init_selenium.procs import SessionTracker
+    from init_selenium.profiler import CommandProfiler
+    from init_selenium.proxy import CachingProxy, CertificateAuthority, ContentStore, HostRule
+    from init_selenium.artifacts import ArtifactStore, Artifact
+    from init_selenium.langs import LANGUAGES
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'init_selenium' has no attribute '{name}'")
+    value = getattr(import_module(module), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_EXPORTS))
 
-from init_selenium.langs import LANGUAGES
 
 __version__ = "0.3.0"
 __all__ = [
     'DriverInit',
     'LanguageManager',
+    'Identity',
+    'IdentityPool',
+    'Backend',
+    'ChromeBackend',
+    'UndetectedChromeBackend',
+    'FirefoxBackend',
+    'RemoteBackend',
     'WINDOW_MIN',
     'WINDOW_MAX',
+    'WINDOW_FAST',
     'SPANISH',
     'ENGLISH_USA',
+    'BLOCK_IMAGES',
+    'BLOCK_FONTS',
+    'BLOCK_MEDIA',
+    'BLOCK_STYLESHEETS',
+    'BLOCK_ADS',
+    'PAGE_LOAD_NORMAL',
+    'PAGE_LOAD_EAGER',
+    'PAGE_LOAD_NONE',
+    'LaunchProfile',
+    'SessionSnapshot',
+    'UserDataStore',
+    'Flow',
+    'FlowStep',
+    'Extractor',
+    'Field',
+    'DriverPool',
+    'TabPool',
+    'Tab',
+    'Supervisor',
+    'SessionRestarted',
+    'AsyncDriverInit',
+    'Crawler',
+    'CrawlResult',
+    'Fleet',
+    'DriverMetrics',
+    'HostLatencies',
+    'AdaptiveWait',
+    'SessionTracker',
+    'CommandProfiler',
+    'CachingProxy',
+    'ContentStore',
+    'HostRule',
+    'CertificateAuthority',
+    'ArtifactStore',
+    'Artifact',
+    'LANGUAGES',
 ]
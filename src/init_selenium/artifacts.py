@@ -0,0 +1,525 @@
+from __future__ import annotations
+
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Optional, Dict, List, Any, Callable, Iterable, NamedTuple, TYPE_CHECKING
+from urllib.parse import urlsplit, parse_qsl
+
+from init_selenium.cache import CACHE_DIR
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+
+logger = logging.getLogger(__name__)
+
+ARTIFACTS_DIR = os.path.join(CACHE_DIR, "artifacts")
+
+# Artifact kinds
+HTML = "html"
+SCREENSHOT = "screenshot"
+HAR = "har"
+
+# Codecs for text artifacts, images are stored as captured since they are compressed already
+ZSTD = "zstd"
+GZIP = "gzip"
+NO_CODEC = "none"
+CODEC_SUFFIXES = {ZSTD: ".zst", GZIP: ".gz", NO_CODEC: ""}
+
+HTTP_VERSIONS = {"h2": "HTTP/2", "h3": "HTTP/3", "http/1.0": "HTTP/1.0", "http/1.1": "HTTP/1.1"}
+
+
+class Artifact(NamedTuple):
+    """A stored artifact: path is relative to the store root, sizes are before and after compression"""
+    kind: str
+    name: Optional[str]
+    url: str
+    digest: str
+    path: str
+    size: int
+    stored_size: int
+    deduplicated: bool
+
+
+class _Job(NamedTuple):
+    future: Future
+    kind: str
+    name: Optional[str]
+    url: str
+    session: Optional[str]
+    payload: Any
+    encode: Callable[[Any], bytes]
+    extension: str
+    compress: bool
+    size: int
+
+
+def _zstandard():
+    """Imports zstandard, which is only needed for zstd compression"""
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compression requires zstandard: pip install 'init-selenium[artifacts]'")
+    return zstandard
+
+
+def default_codec() -> str:
+    """zstd when zstandard is installed, gzip otherwise"""
+    try:
+        _zstandard()
+        return ZSTD
+    except ImportError:
+        return GZIP
+
+
+class ArtifactStore:
+    """
+    Background writer pool for page artifacts
+    Payloads are queued as captured and decoded, hashed, compressed and written by `workers`
+    threads. Files are content addressed (objects/ab/<sha256 of the raw content>), so a page
+    captured twice is stored once; every capture is still listed in manifest.jsonl.
+    At most max_pending payloads or max_pending_bytes wait in memory: beyond that submit()
+    blocks until the writers catch up, or drops the payload with drop=True.
+    network_log turns on chromedriver's performance log for HAR capture; it is off by default
+    because chromedriver buffers the log without bound until har() reads it
+    """
+
+    def __init__(self,
+                 root: str = ARTIFACTS_DIR,
+                 workers: int = 2,
+                 max_pending: int = 256,
+                 max_pending_bytes: int = 256 * 2 ** 20,
+                 codec: Optional[str] = None,
+                 level: Optional[int] = None,
+                 drop: bool = False,
+                 network_log: bool = False,
+                 ):
+        codec = codec or default_codec()
+        if codec not in CODEC_SUFFIXES:
+            raise ValueError(f"codec must be one of {', '.join(CODEC_SUFFIXES)}")
+        if codec == ZSTD:
+            _zstandard()
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+
+        self.root = root
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_pending_bytes = max_pending_bytes
+        self.codec = codec
+        self.level = level
+        self.drop = drop
+        self.network_log = network_log
+        self.stats: Dict[str, float] = dict.fromkeys(
+            ("submitted", "written", "deduplicated", "dropped", "failed",
+             "bytes_in", "bytes_stored", "blocked_seconds"), 0
+        )
+        self._setup()
+
+    def _setup(self):
+        self._queue: queue.Queue = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        # Guards the pending counters and the stats, submit() waits on it while the buffer is full
+        self._room = threading.Condition()
+        self._pending = 0
+        self._pending_bytes = 0
+        self._manifest = None
+        self._manifest_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._local = threading.local()
+
+    def start(self) -> "ArtifactStore":
+        """Starts the writer threads, submit() calls it on first use"""
+        with self._start_lock:
+            if self._threads:
+                return self
+            os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+            self._manifest = open(os.path.join(self.root, "manifest.jsonl"), "a", encoding="utf-8")
+            self._threads = [
+                threading.Thread(target=self._work, name=f"ArtifactWriter-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            # Pending artifacts are written before the interpreter exits
+            atexit.register(self.close)
+        return self
+
+    def submit(self,
+               kind: str,
+               payload: Any,
+               url: str = "",
+               name: Optional[str] = None,
+               session: Optional[str] = None,
+               encode: Callable[[Any], bytes] = lambda payload: payload,
+               extension: str = "",
+               compress: bool = True,
+               size: Optional[int] = None,
+               ) -> Future:
+        """
+        Queues a payload and returns a Future of its Artifact, or of None if it was dropped
+        encode(payload) runs on a writer thread and returns the bytes to store, so decoding and
+        serialising stay off the caller's thread. size is the payload's memory estimate in bytes
+        """
+        self.start()
+        size = size if size is not None else len(payload)
+        future = Future()
+        with self._room:
+            blocked = None
+            while self._pending and (self._pending >= self.max_pending
+                                     or self._pending_bytes + size > self.max_pending_bytes):
+                if self.drop:
+                    self.stats["dropped"] += 1
+                    future.set_result(None)
+                    return future
+                blocked = blocked or time.monotonic()
+                self._room.wait()
+            if blocked:
+                self.stats["blocked_seconds"] += time.monotonic() - blocked
+            self._pending += 1
+            self._pending_bytes += size
+            self.stats["submitted"] += 1
+        self._queue.put(_Job(future, kind, name, url, session, payload, encode, extension, compress, size))
+        return future
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == ZSTD:
+            # Compressors are not thread safe, each writer keeps its own
+            compressor = getattr(self._local, "compressor", None)
+            if compressor is None:
+                compressor = self._local.compressor = _zstandard().ZstdCompressor(level=self.level or 3)
+            return compressor.compress(data)
+        if self.codec == GZIP:
+            return gzip.compress(data, compresslevel=self.level or 6, mtime=0)
+        return data
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            try:
+                artifact = self._write(job)
+                job.future.set_result(artifact)
+            except Exception as e:
+                logger.error(f"Failed to store {job.kind} artifact of {job.url}: {e}")
+                with self._room:
+                    self.stats["failed"] += 1
+                job.future.set_exception(e)
+            finally:
+                with self._room:
+                    self._pending -= 1
+                    self._pending_bytes -= job.size
+                    self._room.notify_all()
+                self._queue.task_done()
+
+    def _write(self, job: _Job) -> Artifact:
+        data = job.encode(job.payload)
+        digest = hashlib.sha256(data).hexdigest()
+        suffix = CODEC_SUFFIXES[self.codec] if job.compress else ""
+        path = os.path.join("objects", digest[:2], f"{digest}{job.extension}{suffix}")
+        full_path = os.path.join(self.root, path)
+
+        deduplicated = os.path.exists(full_path)
+        if deduplicated:
+            stored_size = os.path.getsize(full_path)
+        else:
+            stored = self._compress(data) if job.compress else data
+            stored_size = len(stored)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            tmp_path = f"{full_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as object_file:
+                object_file.write(stored)
+            os.replace(tmp_path, full_path)
+
+        artifact = Artifact(job.kind, job.name, job.url, digest, path, len(data), stored_size, deduplicated)
+        record = {"time": time.time(), "session": job.session, **artifact._asdict()}
+        with self._manifest_lock:
+            self._manifest.write(json.dumps(record) + "\n")
+            self._manifest.flush()
+        with self._room:
+            self.stats["deduplicated" if deduplicated else "written"] += 1
+            self.stats["bytes_in"] += len(data)
+            self.stats["bytes_stored"] += 0 if deduplicated else stored_size
+        return artifact
+
+    def open(self, artifact: Artifact) -> bytes:
+        """Reads an artifact back, decompressed"""
+        with open(os.path.join(self.root, artifact.path), "rb") as object_file:
+            data = object_file.read()
+        if artifact.path.endswith(CODEC_SUFFIXES[ZSTD]):
+            return _zstandard().ZstdDecompressor().decompress(data, max_output_size=artifact.size)
+        if artifact.path.endswith(CODEC_SUFFIXES[GZIP]):
+            return gzip.decompress(data)
+        return data
+
+    def flush(self):
+        """Waits until every queued artifact is written"""
+        if self._threads:
+            self._queue.join()
+
+    def close(self):
+        """Writes what is queued and stops the writers"""
+        with self._start_lock:
+            threads, self._threads = self._threads, []
+            if not threads:
+                return
+            for _ in threads:
+                self._queue.put(None)
+            for thread in threads:
+                thread.join()
+            with self._manifest_lock:
+                self._manifest.close()
+            atexit.unregister(self.close)
+
+    def attach(self, driver: webdriver.Chrome, cdp: bool = True) -> "SessionArtifacts":
+        return SessionArtifacts(self, driver, cdp)
+
+    def __enter__(self) -> "ArtifactStore":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getstate__(self) -> Dict[str, object]:
+        # Writer threads and the manifest handle belong to one process, unpickled copies start their own
+        state = {name: value for name, value in self.__dict__.items()
+                 if name in ("root", "workers", "max_pending", "max_pending_bytes", "codec", "level", "drop",
+                             "network_log")}
+        state["stats"] = dict.fromkeys(self.stats, 0)
+        return state
+
+    def __setstate__(self, state: Dict[str, object]):
+        self.__dict__.update(state)
+        self._setup()
+
+
+class SessionArtifacts:
+    """
+    Captures artifacts of one session into an ArtifactStore, available as driver.artifacts
+    Capturing costs only the WebDriver round trips; every method returns Futures right away
+    """
+
+    def __init__(self, store: ArtifactStore, driver: webdriver.Chrome, cdp: bool = True):
+        self.store = store
+        self.driver = driver
+        self.cdp = cdp
+
+    def _submit(self, kind: str, payload: Any, name: Optional[str], url: Optional[str], **kwargs) -> Future:
+        url = url if url is not None else self.driver.current_url
+        return self.store.submit(kind, payload, url=url, name=name, session=self.driver.session_id, **kwargs)
+
+    def html(self, name: Optional[str] = None, url: Optional[str] = None) -> Future:
+        return self._submit(HTML, self.driver.page_source, name, url,
+                            encode=lambda source: source.encode("utf-8"), extension=".html")
+
+    def screenshot(self,
+                   name: Optional[str] = None,
+                   url: Optional[str] = None,
+                   image_format: str = "png",
+                   quality: Optional[int] = None,
+                   full_page: bool = False,
+                   ) -> Future:
+        """
+        Captures with CDP Page.captureScreenshot: image_format is png, jpeg or webp, quality
+        applies to jpeg and webp, full_page captures beyond the viewport.
+        Without CDP it falls back to a viewport PNG
+        """
+        if self.cdp:
+            params: Dict[str, Any] = {"format": image_format, "captureBeyondViewport": full_page}
+            if quality is not None:
+                params["quality"] = quality
+            encoded = self.driver.execute_cdp_cmd("Page.captureScreenshot", params)["data"]
+        else:
+            image_format = "png"
+            encoded = self.driver.get_screenshot_as_base64()
+        return self._submit(SCREENSHOT, encoded, name, url,
+                            encode=base64.b64decode, extension=f".{image_format}", compress=False)
+
+    def har(self, name: Optional[str] = None, url: Optional[str] = None) -> Future:
+        """
+        HAR 1.2 of the network activity since the previous har() call (or the session start),
+        read from chromedriver's performance log. Response bodies are not included
+        """
+        if not (self.cdp and self.store.network_log):
+            raise ValueError("HAR capture needs a CDP capable backend and an ArtifactStore with network_log")
+        entries = self.driver.execute("getLog", {"type": "performance"})["value"]
+        url = url if url is not None else self.driver.current_url
+        return self._submit(HAR, entries, name, url,
+                            encode=lambda log: json.dumps(build_har(performance_events(log), title=url)).encode(),
+                            extension=".har", size=sum(len(entry["message"]) for entry in entries))
+
+    def capture(self,
+                name: Optional[str] = None,
+                html: bool = True,
+                screenshot: bool = True,
+                har: Optional[bool] = None,
+                **screenshot_options,
+                ) -> List[Future]:
+        """
+        Captures the current page: HTML, screenshot and, when the store keeps a network log, HAR
+        Returns one Future per artifact
+        """
+        url = self.driver.current_url
+        har = har if har is not None else self.cdp and self.store.network_log
+        futures = []
+        if html:
+            futures.append(self.html(name, url))
+        if screenshot:
+            futures.append(self.screenshot(name, url, **screenshot_options))
+        if har:
+            futures.append(self.har(name, url))
+        return futures
+
+
+def performance_events(log: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """CDP events ({"method", "params"}) of chromedriver performance log entries"""
+    return [json.loads(entry["message"])["message"] for entry in log]
+
+
+def _iso(wall_time: float) -> str:
+    return datetime.fromtimestamp(wall_time, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _har_headers(headers: Dict[str, Any]) -> List[Dict[str, str]]:
+    # Chrome joins repeated headers with newlines
+    return [{"name": name, "value": value} for name, values in (headers or {}).items()
+            for value in str(values).split("\n")]
+
+
+def _har_timings(state: Dict[str, Any]) -> Dict[str, float]:
+    """HAR timings in milliseconds from the response's ResourceTiming, -1 for phases that did not happen"""
+    timing = (state.get("response") or {}).get("timing")
+    end = state.get("end")
+    if not timing:
+        total = max((end - state["start"]) * 1000, 0) if end else 0
+        return {"blocked": -1, "dns": -1, "connect": -1, "send": 0, "wait": total, "receive": 0, "ssl": -1}
+
+    def span(start: str, finish: str) -> float:
+        start, finish = timing.get(start, -1), timing.get(finish, -1)
+        return finish - start if start >= 0 and finish >= 0 else -1
+
+    request_time = timing["requestTime"]
+    first_phase = next((timing[phase] for phase in ("dnsStart", "connectStart", "sendStart")
+                        if timing.get(phase, -1) >= 0), 0)
+    headers_end = timing.get("receiveHeadersEnd", 0)
+    return {
+        "blocked": max((request_time - state["start"]) * 1000 + first_phase, 0),
+        "dns": span("dnsStart", "dnsEnd"),
+        "connect": span("connectStart", "connectEnd"),
+        "send": max(span("sendStart", "sendEnd"), 0),
+        "wait": max(headers_end - timing.get("sendEnd", 0), 0),
+        "receive": max((end - request_time) * 1000 - headers_end, 0) if end else 0,
+        "ssl": span("sslStart", "sslEnd"),
+    }
+
+
+def _har_entry(state: Dict[str, Any], page_id: str) -> Dict[str, Any]:
+    request = state["request"]
+    response = state.get("response") or {}
+    headers = response.get("headers") or {}
+    timings = _har_timings(state)
+    http_version = HTTP_VERSIONS.get((response.get("protocol") or "").lower(), response.get("protocol") or "")
+    post_data = request.get("postData")
+
+    entry = {
+        "pageref": page_id,
+        "startedDateTime": _iso(state["wall"]),
+        # ssl is part of connect
+        "time": sum(value for phase, value in timings.items() if phase != "ssl" and value > 0),
+        "request": {
+            "method": request["method"],
+            "url": request["url"],
+            "httpVersion": http_version,
+            "headers": _har_headers(request.get("headers")),
+            "queryString": [{"name": name, "value": value}
+                            for name, value in parse_qsl(urlsplit(request["url"]).query, keep_blank_values=True)],
+            "cookies": [],
+            "headersSize": -1,
+            "bodySize": len(post_data.encode()) if post_data else 0,
+        },
+        "response": {
+            "status": response.get("status", 0),
+            "statusText": response.get("statusText", ""),
+            "httpVersion": http_version,
+            "headers": _har_headers(headers),
+            "cookies": [],
+            "content": {"size": state.get("received", 0), "mimeType": response.get("mimeType", "")},
+            "redirectURL": headers.get("location") or headers.get("Location") or "",
+            "headersSize": -1,
+            "bodySize": state.get("encoded", -1),
+        },
+        "cache": {},
+        "timings": timings,
+    }
+    if post_data:
+        entry["request"]["postData"] = {"mimeType": (request.get("headers") or {}).get("Content-Type", ""),
+                                        "text": post_data}
+    if response.get("remoteIPAddress"):
+        entry["serverIPAddress"] = response["remoteIPAddress"].strip("[]")
+    if response.get("connectionId"):
+        entry["connection"] = str(response["connectionId"])
+    if state.get("error"):
+        entry["_error"] = state["error"]
+    return entry
+
+
+def build_har(events: Iterable[Dict[str, Any]], title: str = "", page_id: str = "page_1") -> Dict[str, Any]:
+    """HAR 1.2 log of CDP Network and Page events, one page for the whole log"""
+    from init_selenium import __version__
+
+    requests: Dict[str, Dict[str, Any]] = {}
+    order: List[Dict[str, Any]] = []
+    first = None
+    page_timings = {"onContentLoad": -1, "onLoad": -1}
+
+    for event in events:
+        method, params = event.get("method"), event.get("params") or {}
+        state = requests.get(params.get("requestId"))
+        if method == "Network.requestWillBeSent":
+            if state is not None and params.get("redirectResponse"):
+                # Redirects reuse the request id, every hop gets its own entry
+                state["response"] = params["redirectResponse"]
+                state["end"] = params["timestamp"]
+            state = {"request": params["request"], "start": params["timestamp"],
+                     "wall": params.get("wallTime") or time.time()}
+            requests[params["requestId"]] = state
+            order.append(state)
+            first = first or state
+        elif state is None:
+            if first and method in ("Page.domContentEventFired", "Page.loadEventFired"):
+                timing = "onContentLoad" if method == "Page.domContentEventFired" else "onLoad"
+                page_timings[timing] = (params["timestamp"] - first["start"]) * 1000
+        elif method == "Network.responseReceived":
+            state["response"] = params["response"]
+        elif method == "Network.dataReceived":
+            state["received"] = state.get("received", 0) + params.get("dataLength", 0)
+        elif method == "Network.loadingFinished":
+            state["end"] = params["timestamp"]
+            state["encoded"] = params.get("encodedDataLength", -1)
+        elif method == "Network.loadingFailed":
+            state["end"] = params["timestamp"]
+            state["error"] = params.get("errorText") or ("canceled" if params.get("canceled") else "failed")
+
+    return {"log": {
+        "version": "1.2",
+        "creator": {"name": "init-selenium", "version": __version__},
+        "pages": [{
+            "startedDateTime": _iso(first["wall"] if first else time.time()),
+            "id": page_id,
+            "title": title,
+            "pageTimings": page_timings,
+        }],
+        "entries": [_har_entry(state, page_id) for state in order if "response" in state or "error" in state],
+    }}
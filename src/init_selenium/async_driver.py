@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Optional, Tuple, List, Union, TYPE_CHECKING
+
+from init_selenium.init_driver import DriverInit
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from selenium.webdriver.support.ui import WebDriverWait
+
+
+logger = logging.getLogger(__name__)
+
+Session = Tuple["webdriver.Chrome", "WebDriverWait"]
+
+
+def _quit_session(session: Session):
+    try:
+        session[0].quit()
+    except Exception as e:
+        logger.warning(f"Error quitting abandoned browser: {e}")
+
+
+def _quit_when_launched(future: Future):
+    """Done-callback quitting the browser of a launch whose caller was cancelled"""
+    if not future.cancelled() and future.exception() is None:
+        _quit_session(future.result())
+
+
+class AsyncDriverInit:
+    """
+    asyncio front-end for DriverInit
+    Browser launches run in a bounded thread pool so they never block the event loop
+    """
+
+    def __init__(self,
+                 initializer: Optional[DriverInit] = None,
+                 max_workers: int = 4,
+                 **driver_init_kwargs
+                 ):
+        if initializer is not None and driver_init_kwargs:
+            raise ValueError("Pass either a DriverInit instance or DriverInit arguments, not both")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        self.initializer = initializer or DriverInit(**driver_init_kwargs)
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="AsyncDriverInit")
+
+    async def __aenter__(self) -> "AsyncDriverInit":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def create_driver(self, **create_driver_kwargs) -> Session:
+        """
+        Awaitable version of DriverInit.create_driver, accepts the same keyword arguments
+        Returns tuple of (WebDriver, WebDriverWait)
+        A launch cannot be interrupted once it has started, if the caller is cancelled
+        the browser is quit as soon as it is up
+        """
+        future = self._executor.submit(self.initializer.create_driver, **create_driver_kwargs)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Launches that had not started yet are cancelled with the wrapper
+            future.add_done_callback(_quit_when_launched)
+            raise
+
+    async def quit(self, driver: webdriver.Chrome):
+        """Quits a driver without blocking the event loop"""
+        await self._run(driver.quit)
+
+    async def launch_many(self,
+                          n: int,
+                          concurrency: Optional[int] = None,
+                          return_exceptions: bool = True,
+                          **create_driver_kwargs
+                          ) -> List[Union[Session, BaseException]]:
+        """
+        Launches n browsers concurrently, at most `concurrency` at a time (default: max_workers)
+        With return_exceptions=True failed launches are returned in place as exceptions,
+        otherwise every successful session is quit and the first error is raised.
+        If the caller is cancelled, every browser launched or still launching is quit
+        """
+        if n < 0:
+            raise ValueError("n must not be negative")
+        semaphore = asyncio.Semaphore(concurrency or self.max_workers)
+
+        async def launch_one(index: int) -> Session:
+            async with semaphore:
+                logger.info(f"Launching browser {index + 1}/{n}...")
+                return await self.create_driver(**create_driver_kwargs)
+
+        tasks = [asyncio.ensure_future(launch_one(i)) for i in range(n)]
+        try:
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        except asyncio.CancelledError:
+            # gather cancels the pending launches, which quit their own browsers. The ones
+            # already returned are quit here, without waiting for them
+            for task in tasks:
+                if task.done() and not task.cancelled() and task.exception() is None:
+                    self._executor.submit(_quit_session, task.result())
+            raise
+        failures = [result for result in results if isinstance(result, BaseException)]
+        if failures:
+            logger.error(f"{len(failures)}/{n} browser launches failed")
+
+        if failures and not return_exceptions:
+            sessions = [result for result in results if not isinstance(result, BaseException)]
+            await asyncio.gather(*(self.quit(driver) for driver, _ in sessions), return_exceptions=True)
+            raise failures[0]
+
+        return results
+
+    async def aclose(self):
+        """Shuts down the launch executor, waiting for running launches to finish"""
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
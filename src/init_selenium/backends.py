@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import logging
+from typing import Optional, Any, TYPE_CHECKING
+
+from init_selenium.profile import (
+    LaunchProfile,
+    WINDOW_MAX,
+    WINDOW_MIN,
+    WINDOW_FAST,
+    FAST_VIEWPORT,
+    BLOCK_IMAGES,
+)
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from init_selenium.init_driver import DriverInit
+
+
+logger = logging.getLogger(__name__)
+
+CHROME = "chrome"
+FIREFOX = "firefox"
+
+
+class Backend:
+    """
+    Launches one browser engine from a LaunchProfile
+    create_driver runs resolve_driver, build_options, spawn and after_spawn in that order;
+    the other launch stages check supports_cdp and supports_user_data
+    """
+
+    name = "backend"
+    # Cookies, session snapshots and resource blocking go through Chrome DevTools commands
+    supports_cdp = False
+    # Whether launches can start from UserDataStore clones, which hold Chrome profiles
+    supports_user_data = False
+
+    def resolve_driver(self, initializer: DriverInit) -> Optional[str]:
+        """Returns the driver executable path, None lets Selenium Manager find one"""
+        return None
+
+    def build_options(self, profile: LaunchProfile, user_data_dir: Optional[str] = None) -> Any:
+        raise NotImplementedError
+
+    def spawn(self, options: Any, driver_path: Optional[str]) -> webdriver.Remote:
+        raise NotImplementedError
+
+    def after_spawn(self, driver: webdriver.Remote, profile: LaunchProfile):
+        """Window setup that has no launch flag on this engine"""
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+
+class ChromeBackend(Backend):
+    """Local Chrome through chromedriver, the default backend"""
+
+    name = "chrome"
+    supports_cdp = True
+    supports_user_data = True
+
+    def resolve_driver(self, initializer: DriverInit) -> Optional[str]:
+        if initializer.force_install or not initializer.drivers_route:
+            force = initializer.force_install and not initializer._driver_refreshed
+            driver_path = initializer.install_chrome_driver(force=force)
+            initializer._driver_refreshed = initializer._driver_refreshed or force
+            return driver_path
+        return initializer.drivers_route
+
+    def build_options(self, profile: LaunchProfile, user_data_dir: Optional[str] = None) -> Any:
+        options = profile.build_options()
+        if user_data_dir:
+            options.add_argument(f"--user-data-dir={user_data_dir}")
+        return options
+
+    def spawn(self, options: Any, driver_path: Optional[str]) -> webdriver.Remote:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+
+        return webdriver.Chrome(service=Service(driver_path), options=options)
+
+
+class UndetectedChromeBackend(ChromeBackend):
+    """Local Chrome through undetected_chromedriver, used for LaunchProfile(undetectable=True)"""
+
+    name = "undetected-chrome"
+
+    def spawn(self, options: Any, driver_path: Optional[str]) -> webdriver.Remote:
+        import undetected_chromedriver as uc
+
+        return uc.Chrome(options=options, driver_executable_path=driver_path)
+
+
+class FirefoxBackend(Backend):
+    """
+    Local Firefox through geckodriver. The profile's window size, language, user agent,
+    notification, password, proxy and image blocking options are mapped to Firefox preferences.
+    Firefox has no CDP: cookies are set per domain with add_cookie, resource blocking other
+    than images is skipped and session snapshots cannot be restored. user_data_dir must be
+    a Firefox profile directory
+    """
+
+    name = "firefox"
+
+    def __init__(self, driver_path: Optional[str] = None, binary_location: Optional[str] = None):
+        self.driver_path = driver_path
+        self.binary_location = binary_location
+
+    def resolve_driver(self, initializer: DriverInit) -> Optional[str]:
+        return self.driver_path
+
+    def build_options(self, profile: LaunchProfile, user_data_dir: Optional[str] = None) -> Any:
+        from selenium.webdriver.firefox.options import Options
+
+        options = Options()
+        if self.binary_location:
+            options.binary_location = self.binary_location
+
+        if profile.window_size in (WINDOW_MIN, WINDOW_FAST):
+            options.add_argument("-headless")
+        if profile.window_size == WINDOW_FAST:
+            options.add_argument(f"--width={FAST_VIEWPORT[0]}")
+            options.add_argument(f"--height={FAST_VIEWPORT[1]}")
+        if user_data_dir:
+            options.add_argument("-profile")
+            options.add_argument(user_data_dir)
+
+        if profile.page_load_strategy:
+            options.page_load_strategy = profile.page_load_strategy
+        if profile.user_agent:
+            options.set_preference("general.useragent.override", profile.user_agent)
+        options.set_preference("intl.accept_languages", ",".join(profile.language))
+        options.set_preference("permissions.default.desktop-notification", profile.notification_level)
+        options.set_preference("signon.rememberSignons", profile.save_passwords)
+        if BLOCK_IMAGES in profile.block_resources:
+            options.set_preference("permissions.default.image", 2)
+        if profile.camouflage:
+            options.set_preference("dom.webdriver.enabled", False)
+        if profile.proxy_server:
+            host, _, port = profile.proxy_server.split("://")[-1].rpartition(":")
+            options.set_preference("network.proxy.type", 1)
+            for scheme in ("http", "ssl"):
+                options.set_preference(f"network.proxy.{scheme}", host)
+                options.set_preference(f"network.proxy.{scheme}_port", int(port))
+            options.set_preference("network.proxy.allow_hijacking_localhost", True)
+            # Firefox has no --ignore-certificate-errors, an intercepting proxy's certificates are accepted here
+            options.accept_insecure_certs = True
+        return options
+
+    def spawn(self, options: Any, driver_path: Optional[str]) -> webdriver.Remote:
+        from selenium import webdriver
+        from selenium.webdriver.firefox.service import Service
+
+        return webdriver.Firefox(service=Service(driver_path), options=options)
+
+    def after_spawn(self, driver: webdriver.Remote, profile: LaunchProfile):
+        if profile.window_size == WINDOW_MAX:
+            driver.maximize_window()
+
+    def __repr__(self) -> str:
+        return f"FirefoxBackend(driver_path={self.driver_path!r})"
+
+
+class RemoteBackend(Backend):
+    """
+    A Selenium Grid or any remote WebDriver endpoint, running Chrome or Firefox
+    Chrome sessions keep CDP support through the grid's goog/cdp/execute endpoint.
+    User data dirs are local paths, so they are not sent to remote nodes
+    """
+
+    name = "remote"
+
+    def __init__(self, command_executor: str = "http://127.0.0.1:4444", browser: str = CHROME, keep_alive: bool = True):
+        if browser not in (CHROME, FIREFOX):
+            raise ValueError("browser must be 'chrome' or 'firefox'")
+        self.command_executor = command_executor
+        self.browser = browser
+        self.keep_alive = keep_alive
+        self.supports_cdp = browser == CHROME
+        self._options_backend = ChromeBackend() if browser == CHROME else FirefoxBackend()
+
+    def build_options(self, profile: LaunchProfile, user_data_dir: Optional[str] = None) -> Any:
+        return self._options_backend.build_options(profile)
+
+    def spawn(self, options: Any, driver_path: Optional[str]) -> webdriver.Remote:
+        from selenium import webdriver
+
+        if self.browser == FIREFOX:
+            return webdriver.Remote(self.command_executor, keep_alive=self.keep_alive, options=options)
+
+        from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+
+        connection = ChromiumRemoteConnection(self.command_executor, "goog", CHROME, keep_alive=self.keep_alive)
+        driver = webdriver.Remote(connection, options=options)
+
+        def execute_cdp_cmd(cmd: str, cmd_args: dict):
+            return driver.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+        driver.execute_cdp_cmd = execute_cdp_cmd
+        return driver
+
+    def after_spawn(self, driver: webdriver.Remote, profile: LaunchProfile):
+        self._options_backend.after_spawn(driver, profile)
+
+    def __repr__(self) -> str:
+        return f"RemoteBackend({self.command_executor!r}, browser={self.browser!r})"
+
+
+def driver_supports_cdp(driver: webdriver.Remote) -> bool:
+    """
+    Whether a running session accepts CDP commands. Every Selenium driver has an
+    execute_cdp_cmd method, but only Chromium sessions answer it
+    """
+    capabilities = getattr(driver, "capabilities", None) or {}
+    return "goog:chromeOptions" in capabilities or "ms:edgeOptions" in capabilities
+
+
+def default_backend(profile: LaunchProfile) -> Backend:
+    """Backend used when none is configured: undetected Chrome for undetectable profiles, else Chrome"""
+    return UndetectedChromeBackend() if profile.undetectable else ChromeBackend()
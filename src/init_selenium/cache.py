@@ -0,0 +1,187 @@
+import json
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Optional, Dict, Callable
+
+
+logger = logging.getLogger(__name__)
+
+# Default location for on-disk caches, overridable through the environment
+CACHE_DIR = os.environ.get(
+    "INIT_SELENIUM_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "init_selenium")
+)
+
+
+class FileLock:
+    """Cross-process exclusive lock backed by a lock file (fcntl on POSIX, msvcrt on Windows)"""
+
+    def __init__(self, path: str, timeout: Optional[float] = 60, poll_interval: float = 0.05):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+        self._thread_lock = threading.Lock()
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if os.name == "nt":
+                import msvcrt
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+
+        while not self._try_lock(fd):
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(fd)
+                self._thread_lock.release()
+                raise TimeoutError(f"Timed out acquiring lock: {self.path}")
+            time.sleep(self.poll_interval)
+        self._fd = fd
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        try:
+            if os.name == "nt":
+                import msvcrt
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+            self._thread_lock.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+class DriverPathCache:
+    """
+    Caches the ChromeDriver path resolved by chromedriver_autoinstaller,
+    keyed by the installed Chrome major version. Entries live in memory and
+    in a JSON index on disk guarded by a FileLock, so only the first process
+    per Chrome version pays for the install.
+    """
+
+    INDEX_NAME = "chromedriver_index.json"
+
+    def __init__(self,
+                 cache_dir: str = CACHE_DIR,
+                 installer: Optional[Callable[[], str]] = None
+                 ):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, self.INDEX_NAME)
+        self.lock = FileLock(self.index_path + ".lock")
+        self.installer = installer
+        self._memory: Dict[str, str] = {}
+        self._memory_lock = threading.Lock()
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def chrome_major_version() -> Optional[str]:
+        """
+        Returns the installed Chrome major version, or None if it cannot be detected
+        Detection runs `chrome --version`, so the result is kept for the life of the process
+        """
+        import chromedriver_autoinstaller
+
+        version = chromedriver_autoinstaller.get_chrome_version()
+        if not version:
+            return None
+        return version.split(".")[0]
+
+    def _install(self) -> str:
+        if self.installer:
+            return self.installer()
+        import chromedriver_autoinstaller
+
+        return chromedriver_autoinstaller.install()
+
+    def _read_index(self) -> Dict[str, str]:
+        try:
+            with open(self.index_path, "r") as index_file:
+                return json.load(index_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index: Dict[str, str]):
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as index_file:
+            json.dump(index, index_file)
+        os.replace(tmp_path, self.index_path)
+
+    def resolve(self, force: bool = False) -> str:
+        """
+        Returns the ChromeDriver path for the installed Chrome version
+        If force is True, the cached entry is dropped, the Chrome version detected again
+        and the driver reinstalled
+        """
+        if force:
+            self.chrome_major_version.cache_clear()
+        major = self.chrome_major_version()
+        if major is None:
+            # Without a version there is nothing safe to key on
+            logger.warning("Could not detect Chrome version, skipping ChromeDriver cache")
+            return self._install()
+
+        if not force:
+            with self._memory_lock:
+                cached = self._memory.get(major)
+            if cached and os.path.isfile(cached):
+                return cached
+
+        with self.lock:
+            index = self._read_index()
+            cached = index.get(major)
+            if force or not cached or not os.path.isfile(cached):
+                logger.info(f"Resolving ChromeDriver for Chrome {major}...")
+                cached = self._install()
+                index[major] = cached
+                self._write_index(index)
+            else:
+                logger.info(f"Using cached ChromeDriver for Chrome {major}: {cached}")
+
+        with self._memory_lock:
+            self._memory[major] = cached
+        return cached
+
+    def invalidate(self, major: Optional[str] = None):
+        """Drops the entry for one Chrome major version, or every entry if none is given"""
+        with self.lock:
+            index = self._read_index()
+            if major is None:
+                index.clear()
+            else:
+                index.pop(major, None)
+            self._write_index(index)
+
+        with self._memory_lock:
+            if major is None:
+                self._memory.clear()
+            else:
+                self._memory.pop(major, None)
+
+
+# Shared by every DriverInit in the process
+driver_path_cache = DriverPathCache()
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from typing import Optional, Tuple, Iterable, Iterator, Callable, Any, NamedTuple, TYPE_CHECKING
+
+from selenium.common.exceptions import TimeoutException
+
+from init_selenium.init_driver import DriverInit
+from init_selenium.supervisor import Supervisor
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from selenium.webdriver.support.ui import WebDriverWait
+
+
+logger = logging.getLogger(__name__)
+
+PageCallback = Callable[["webdriver.Chrome", "WebDriverWait", str], Any]
+
+# Queue markers
+_END_OF_INPUT = object()
+_WORKER_DONE = object()
+
+
+class CrawlResult(NamedTuple):
+    """Outcome of one URL: `value` is the callback return value, `error` the last exception if every attempt failed"""
+    url: str
+    value: Any = None
+    error: Optional[BaseException] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class Crawler:
+    """
+    Visits URLs across `workers` browsers created through a DriverInit
+    URLs are consumed lazily through a bounded queue and results are streamed
+    back in completion order, so arbitrarily large URL generators can be fed
+    page_timeout bounds page loads and scripts, including the ones the callback runs, not the
+    callback's own Python code: a callback that can block must enforce its own deadline
+    """
+
+    def __init__(self,
+                 initializer: DriverInit,
+                 workers: int = 4,
+                 page_timeout: float = 30,
+                 retries: int = 2,
+                 backoff: float = 1.0,
+                 max_backoff: float = 30.0,
+                 queue_size: Optional[int] = None,
+                 **create_driver_kwargs
+                 ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if retries < 0:
+            raise ValueError("retries must not be negative")
+
+        self.initializer = initializer
+        self.workers = workers
+        self.page_timeout = page_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.queue_size = queue_size or workers * 4
+        self.create_driver_kwargs = create_driver_kwargs
+
+    def _launch(self) -> Tuple[webdriver.Chrome, WebDriverWait]:
+        driver, wait = self.initializer.create_driver(**self.create_driver_kwargs)
+        driver.set_page_load_timeout(self.page_timeout)
+        driver.set_script_timeout(self.page_timeout)
+        return driver, wait
+
+    @staticmethod
+    def _put(target: queue.Queue, item, stop: threading.Event) -> bool:
+        """Puts into a bounded queue without blocking past a stop request"""
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _feed(self, urls: Iterable[str], work: queue.Queue, stop: threading.Event, failure: list):
+        try:
+            for url in urls:
+                if not self._put(work, url, stop):
+                    return
+        except Exception as e:
+            logger.error(f"URL source failed: {e}")
+            # Raised by run once the URLs already queued are done
+            failure.append(e)
+        finally:
+            for _ in range(self.workers):
+                self._put(work, _END_OF_INPUT, stop)
+
+    def _visit(self, session, url: str, callback: PageCallback) -> Tuple[CrawlResult, Any]:
+        """
+        Visits one URL with retries. Returns the result and the (possibly relaunched) session
+        Timeouts, failed launches and failed loads are retried, the browser is only relaunched
+        when the session is lost. Other callback errors fail the URL right away
+        """
+        start = time.monotonic()
+        error = None
+        attempt = 0
+
+        for attempt in range(1, self.retries + 2):
+            loaded = False
+            try:
+                if session is None:
+                    session = self._launch()
+                driver, wait = session
+                driver.get(url)
+                loaded = True
+                value = callback(driver, wait, url)
+                return CrawlResult(url, value, None, attempt, time.monotonic() - start), session
+            except TimeoutException as e:
+                error = e
+                logger.warning(f"Timeout on {url} (attempt {attempt})")
+            except Exception as e:
+                error = e
+                if Supervisor._classify(e) is not None:
+                    logger.warning(f"Browser lost on {url} (attempt {attempt}), relaunching it: {e}")
+                    session = self._quit(session)
+                elif loaded:
+                    # Missing elements, stale references and script errors fail the same way again
+                    logger.warning(f"Callback failed on {url}: {e}")
+                    break
+                else:
+                    logger.warning(f"Loading {url} failed (attempt {attempt}): {e}")
+
+            if attempt <= self.retries:
+                time.sleep(min(self.backoff * 2 ** (attempt - 1), self.max_backoff))
+
+        return CrawlResult(url, None, error, attempt, time.monotonic() - start), session
+
+    @staticmethod
+    def _quit(session) -> None:
+        if session is not None:
+            try:
+                session[0].quit()
+            except Exception as e:
+                logger.warning(f"Error quitting crawler driver: {e}")
+        return None
+
+    def _work(self, callback: PageCallback, work: queue.Queue, results: queue.Queue, stop: threading.Event):
+        session = None
+        try:
+            while not stop.is_set():
+                try:
+                    url = work.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if url is _END_OF_INPUT:
+                    break
+                result, session = self._visit(session, url, callback)
+                if session is not None and self.initializer.over_memory_limit(session[0]):
+                    logger.info("Relaunching crawler browser over the memory limit")
+                    session = self._quit(session)
+                if not self._put(results, result, stop):
+                    break
+        finally:
+            self._quit(session)
+            self._put(results, _WORKER_DONE, stop)
+
+    def run(self, urls: Iterable[str], callback: PageCallback) -> Iterator[CrawlResult]:
+        """
+        Visits every URL and calls callback(driver, wait, url) on each loaded page
+        Yields a CrawlResult per URL as soon as it completes. Closing the generator
+        early stops the workers and quits their browsers. An exception raised by the
+        URL source is raised here after the URLs read before it are visited
+        """
+        work = queue.Queue(maxsize=self.queue_size)
+        results = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        failure = []
+
+        threads = [
+            threading.Thread(target=self._feed, args=(urls, work, stop, failure), name="Crawler-feed", daemon=True)
+        ]
+        threads += [
+            threading.Thread(target=self._work, args=(callback, work, results, stop), name=f"Crawler-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        finished = 0
+        try:
+            while finished < self.workers:
+                item = results.get()
+                if item is _WORKER_DONE:
+                    finished += 1
+                    continue
+                yield item
+            if failure:
+                raise failure[0]
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import logging
+import re
+from typing import Optional, Dict, List, Union, Iterator, Any, NamedTuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+
+logger = logging.getLogger(__name__)
+
+TEXT = "text"
+HTML = "html"
+
+ATTRIBUTE_NAME = re.compile(r"[A-Za-z_][\w:.-]*")
+
+# One script for every schema: the compiled schema is passed as an argument, so Chrome
+# keeps the script compiled and nothing is rebuilt per page
+EXTRACT_SCRIPT = """
+const [fields, rows, offset, limit] = arguments;
+function pick(node, attr) {
+    if (attr === "text") {
+        const text = node.innerText !== undefined ? node.innerText : node.textContent;
+        return text === null ? null : text.trim();
+    }
+    if (attr === "html") return node.innerHTML;
+    // Same rule as WebElement.get_attribute: the property if it is a plain value, else the attribute
+    const value = node[attr];
+    if (value !== undefined && value !== null && typeof value !== "object" && typeof value !== "function") return value;
+    return node.getAttribute(attr);
+}
+function one(node, field) {
+    return field.fields ? extract(node, field.fields) : pick(node, field.attr);
+}
+function extract(scope, fields) {
+    const out = {};
+    for (const field of fields) {
+        if (field.many) {
+            const nodes = field.selector ? scope.querySelectorAll(field.selector) : [scope];
+            out[field.name] = Array.from(nodes, node => one(node, field));
+        } else {
+            const node = field.selector ? scope.querySelector(field.selector) : scope;
+            out[field.name] = node ? one(node, field) : field.default;
+        }
+    }
+    return out;
+}
+if (rows === null) return extract(document.documentElement, fields);
+const matches = document.querySelectorAll(rows);
+const end = limit === null ? matches.length : Math.min(matches.length, offset + limit);
+const out = [];
+for (let i = offset; i < end; i++) out.push(extract(matches[i], fields));
+return out;
+"""
+
+Schema = Dict[str, Union[str, "Field", Dict[str, Any]]]
+
+
+class Field(NamedTuple):
+    """
+    One extracted value: `selector` is a CSS selector relative to the page or row ("" for the
+    row itself), `attr` is TEXT, HTML or an attribute/property name, `many` collects every match
+    into a list, and `schema` extracts a nested dict from each match instead of a single value
+    """
+    selector: str = ""
+    attr: str = TEXT
+    many: bool = False
+    default: Any = None
+    schema: Optional[Schema] = None
+
+
+def parse_field(spec: Union[str, Field, Dict[str, Any]]) -> Field:
+    """
+    "h2.title" -> text of the first match, "a.more@href" -> its href, "@data-id" -> attribute
+    of the row itself. A dict is a nested schema applied to the same row or page, use
+    Field(selector, schema=...) to apply it to the first match of a selector
+    """
+    if isinstance(spec, Field):
+        return spec
+    if isinstance(spec, dict):
+        return Field(schema=spec)
+    if not isinstance(spec, str):
+        raise TypeError(f"Invalid field specification: {spec!r}")
+    selector, separator, attr = spec.rpartition("@")
+    # An "@" inside an attribute selector such as [href^="mailto:a@b"] is not an attribute suffix
+    if not separator or not ATTRIBUTE_NAME.fullmatch(attr.strip()):
+        selector, attr = spec, TEXT
+    return Field(selector.strip(), attr.strip())
+
+
+def compile_schema(schema: Schema) -> List[Dict[str, Any]]:
+    """Turns a schema into the JSON-serialisable field list the extraction script runs"""
+    if not schema:
+        raise ValueError("Schema must define at least one field")
+    compiled = []
+    for name, spec in schema.items():
+        field = parse_field(spec)
+        compiled.append({
+            "name": name,
+            "selector": field.selector,
+            "attr": field.attr,
+            "many": field.many,
+            "default": field.default,
+            "fields": compile_schema(field.schema) if field.schema else None,
+        })
+    return compiled
+
+
+class Extractor:
+    """
+    Extracts records from a page in one execute_script round trip
+    With `rows`, the schema is applied to every element matching that selector and a list
+    of dicts is returned, otherwise a single dict for the whole page. The schema is compiled
+    once, so one Extractor can be reused across pages and threads.
+    An Extractor is also a valid Crawler callback: Crawler.run(urls, extractor)
+    """
+
+    def __init__(self, schema: Schema, rows: Optional[str] = None):
+        self.schema = schema
+        self.rows = rows
+        self.fields = compile_schema(schema)
+
+    def extract(self, driver: webdriver.Chrome) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        return driver.execute_script(EXTRACT_SCRIPT, self.fields, self.rows, 0, None)
+
+    def iter_rows(self, driver: webdriver.Chrome, batch_size: int = 200) -> Iterator[Dict[str, Any]]:
+        """
+        Streams rows in batches of batch_size, one round trip per batch, so very long
+        listings are not serialised in a single response
+        Rows added or removed between batches can be skipped or repeated
+        """
+        if self.rows is None:
+            raise ValueError("iter_rows needs an Extractor with a rows selector")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        offset = 0
+        while True:
+            batch = driver.execute_script(EXTRACT_SCRIPT, self.fields, self.rows, offset, batch_size)
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            offset += batch_size
+
+    def __call__(self, driver: webdriver.Chrome, wait=None, url: Optional[str] = None):
+        return self.extract(driver)
+
+
+def extract(driver: webdriver.Chrome, schema: Schema, rows: Optional[str] = None):
+    """One-off extraction, build an Extractor to reuse a schema across pages"""
+    return Extractor(schema, rows).extract(driver)
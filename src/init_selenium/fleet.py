@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+from typing import Optional, Iterable, Iterator, Dict, Any
+
+from init_selenium.init_driver import DriverInit
+from init_selenium.crawl import Crawler, CrawlResult, PageCallback
+
+
+logger = logging.getLogger(__name__)
+
+# Queue markers, plain values because they cross process boundaries
+_END_OF_INPUT = None
+_WORKER_DONE = "__init_selenium_worker_done__"
+
+
+def _queued_urls(work: multiprocessing.Queue, stop: multiprocessing.Event) -> Iterator[str]:
+    """Yields URLs from the shared work queue until the end marker or a cancellation"""
+    while not stop.is_set():
+        try:
+            url = work.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if url is _END_OF_INPUT:
+            return
+        yield url
+
+
+def _picklable(result: CrawlResult) -> CrawlResult:
+    """Replaces a value or error that cannot be sent to the parent process with an error describing it"""
+    try:
+        pickle.dumps(result)
+        return result
+    except Exception as e:
+        error = result.error if result.error is not None else e
+        return result._replace(value=None, error=RuntimeError(f"{type(error).__name__}: {error}"))
+
+
+def _fleet_worker(initializer: DriverInit,
+                  crawler_kwargs: Dict[str, Any],
+                  callback: PageCallback,
+                  work: multiprocessing.Queue,
+                  results: multiprocessing.Queue,
+                  stop: multiprocessing.Event):
+    """Entry point of a fleet process: runs a Crawler over its share of the work queue"""
+    crawler = Crawler(initializer, **crawler_kwargs)
+    stream = crawler.run(_queued_urls(work, stop), callback)
+    try:
+        for result in stream:
+            if not Crawler._put(results, _picklable(result), stop):
+                break
+    except Exception as e:
+        logger.error(f"Fleet process {os.getpid()} failed: {e}")
+    finally:
+        # Stops the crawler threads and quits this process' browsers
+        stream.close()
+        results.put(_WORKER_DONE)
+
+
+class Fleet:
+    """
+    Shards a URL workload across `processes` worker processes, each one driving
+    `drivers_per_process` browsers built from the same DriverInit configuration.
+    URLs go through a shared bounded queue and CrawlResults stream back as they
+    complete, so throughput scales with cores instead of one interpreter's GIL.
+
+    The DriverInit is pickled into every process, metrics stay in the parent.
+    The callback must be picklable too, i.e. a module-level function.
+    """
+
+    def __init__(self,
+                 initializer: DriverInit,
+                 processes: Optional[int] = None,
+                 drivers_per_process: int = 2,
+                 page_timeout: float = 30,
+                 retries: int = 2,
+                 backoff: float = 1.0,
+                 max_backoff: float = 30.0,
+                 queue_size: Optional[int] = None,
+                 start_method: str = "spawn",
+                 join_timeout: float = 30,
+                 **create_driver_kwargs
+                 ):
+        if drivers_per_process < 1:
+            raise ValueError("drivers_per_process must be at least 1")
+
+        self.initializer = initializer
+        self.processes = processes or os.cpu_count() or 1
+        self.drivers_per_process = drivers_per_process
+        self.queue_size = queue_size or self.processes * drivers_per_process * 4
+        self.join_timeout = join_timeout
+        self.crawler_kwargs = dict(
+            workers=drivers_per_process,
+            page_timeout=page_timeout,
+            retries=retries,
+            backoff=backoff,
+            max_backoff=max_backoff,
+            **create_driver_kwargs
+        )
+        # spawn avoids forking a parent that already runs threads (pools, metrics, loggers)
+        self._context = multiprocessing.get_context(start_method)
+        self._draining = threading.Event()
+        self._stop = None
+
+    def drain(self):
+        """Stops taking new URLs, URLs already queued and pages in flight still complete"""
+        self._draining.set()
+
+    def cancel(self):
+        """Stops every process as soon as its current pages finish, queued URLs are dropped"""
+        self._draining.set()
+        if self._stop is not None:
+            self._stop.set()
+
+    def _feed(self, urls: Iterable[str], work: multiprocessing.Queue, stop: multiprocessing.Event, failure: list):
+        try:
+            for url in urls:
+                if self._draining.is_set() or not Crawler._put(work, url, stop):
+                    break
+        except Exception as e:
+            logger.error(f"URL source failed: {e}")
+            # Raised by run once the URLs already queued are done
+            failure.append(e)
+        finally:
+            for _ in range(self.processes):
+                Crawler._put(work, _END_OF_INPUT, stop)
+
+    def run(self, urls: Iterable[str], callback: PageCallback) -> Iterator[CrawlResult]:
+        """
+        Visits every URL and calls callback(driver, wait, url) on each loaded page
+        Yields a CrawlResult per URL as soon as any process completes it.
+        Closing the generator early cancels the fleet and quits every browser. An exception
+        raised by the URL source is raised here after the URLs read before it are visited
+        """
+        work = self._context.Queue(maxsize=self.queue_size)
+        results = self._context.Queue(maxsize=self.queue_size)
+        stop = self._stop = self._context.Event()
+        self._draining.clear()
+        failure = []
+
+        workers = [
+            self._context.Process(
+                target=_fleet_worker,
+                args=(self.initializer, self.crawler_kwargs, callback, work, results, stop),
+                name=f"Fleet-{i}",
+                daemon=True,
+            )
+            for i in range(self.processes)
+        ]
+        for worker in workers:
+            worker.start()
+        feeder = threading.Thread(target=self._feed, args=(urls, work, stop, failure), name="Fleet-feed", daemon=True)
+        feeder.start()
+
+        finished = 0
+        try:
+            while finished < self.processes:
+                try:
+                    item = results.get(timeout=1)
+                except queue.Empty:
+                    # A process killed from outside never reports back
+                    if not any(worker.is_alive() for worker in workers):
+                        for worker in workers:
+                            if worker.exitcode:
+                                logger.error(f"{worker.name} exited with code {worker.exitcode}")
+                        break
+                    continue
+                if item == _WORKER_DONE:
+                    finished += 1
+                    continue
+                yield item
+            if failure:
+                raise failure[0]
+        finally:
+            stop.set()
+            feeder.join()
+            self._join(workers, results)
+            self._stop = None
+
+    def _join(self, workers, results: multiprocessing.Queue):
+        """Waits for the processes to quit their browsers, terminating the ones that hang"""
+        deadline = time.monotonic() + self.join_timeout
+        while any(worker.is_alive() for worker in workers) and time.monotonic() < deadline:
+            # Keep reading so processes blocked on a full result queue can exit
+            try:
+                results.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+        for worker in workers:
+            if worker.is_alive():
+                logger.warning(f"{worker.name} did not stop in {self.join_timeout}s, terminating it")
+                worker.terminate()
+            worker.join()
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import logging
+import re
+import time
+from functools import lru_cache
+from typing import Optional, Dict, Callable, Any, Iterable, Tuple, Type, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+
+logger = logging.getLogger(__name__)
+
+Condition = Callable[["webdriver.Chrome"], Any]
+Action = Callable[["webdriver.Chrome", Any], None]
+
+
+@lru_cache(maxsize=None)
+def ignored_exceptions() -> Tuple[Type[Exception], ...]:
+    """
+    Exceptions that only mean "not ready yet" while polling a condition, selenium is imported on first use
+    An invalid selector never becomes valid, so it is raised instead of polled until the timeout
+    """
+    from selenium.common.exceptions import (
+        NoSuchElementException,
+        StaleElementReferenceException,
+        ElementNotInteractableException,
+    )
+    return (
+        NoSuchElementException,
+        StaleElementReferenceException,
+        ElementNotInteractableException,
+    )
+
+
+def url_matches(pattern: str) -> Condition:
+    """Condition that holds once the current URL matches a regular expression"""
+    regex = re.compile(pattern)
+    return lambda driver: regex.search(driver.current_url) is not None
+
+
+def url_changes(from_url: Optional[str] = None) -> Condition:
+    """Condition that holds once the URL differs from from_url (default: the URL when polling starts)"""
+    state = {"url": from_url}
+
+    def condition(driver):
+        current = driver.current_url
+        if state["url"] is None:
+            state["url"] = current
+            return False
+        return current != state["url"]
+    return condition
+
+
+def url_not_startswith(*prefixes: str) -> Condition:
+    """Condition that holds while the current URL starts with none of the prefixes"""
+    return lambda driver: not driver.current_url.startswith(prefixes)
+
+
+def network_idle(quiet_polls: int = 2) -> Condition:
+    """Condition that holds once the page is loaded and no new resources started for `quiet_polls` polls"""
+    state = {"count": -1, "quiet": 0}
+
+    def condition(driver):
+        ready, count = driver.execute_script(
+            "return [document.readyState, performance.getEntriesByType('resource').length];"
+        )
+        if ready != "complete" or count != state["count"]:
+            state["count"], state["quiet"] = count, 0
+            return False
+        state["quiet"] += 1
+        return state["quiet"] >= quiet_polls
+    return condition
+
+
+def any_of(*conditions: Condition) -> Condition:
+    """Condition that returns (index, value) of the first condition that holds"""
+    def condition(driver):
+        for index, inner in enumerate(conditions):
+            try:
+                value = inner(driver)
+            except ignored_exceptions():
+                continue
+            if value:
+                return index, value
+        return False
+    return condition
+
+
+class FlowStep:
+    """
+    One step of a Flow: wait for `condition`, then call action(driver, condition_value)
+    Optional steps are skipped when their condition does not hold within their own timeout.
+    The action of an interactive step (one waiting for a person) does not use the flow's budget
+    """
+
+    def __init__(self,
+                 name: str,
+                 condition: Condition,
+                 action: Optional[Action] = None,
+                 timeout: Optional[float] = None,
+                 optional: bool = False,
+                 interactive: bool = False
+                 ):
+        self.name = name
+        self.condition = condition
+        self.action = action
+        self.timeout = timeout
+        self.optional = optional
+        self.interactive = interactive
+
+
+class Flow:
+    """
+    Declarative multi-step browser flow sharing a single timeout budget
+    Conditions are polled adaptively: quickly at first, backing off up to max_poll,
+    so each step finishes as soon as the page allows
+    """
+
+    def __init__(self,
+                 steps: Iterable[FlowStep],
+                 timeout: float = 60,
+                 min_poll: float = 0.05,
+                 max_poll: float = 0.5,
+                 backoff: float = 1.5
+                 ):
+        self.steps = list(steps)
+        self.timeout = timeout
+        self.min_poll = min_poll
+        self.max_poll = max_poll
+        self.backoff = backoff
+
+    def wait_for(self, driver: webdriver.Chrome, condition: Condition, timeout: float) -> Tuple[bool, Any]:
+        """Polls a condition until it holds or timeout expires. Returns (held, value)"""
+        deadline = time.monotonic() + timeout
+        poll = self.min_poll
+        while True:
+            try:
+                value = condition(driver)
+                if value:
+                    return True, value
+            except ignored_exceptions():
+                pass
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False, None
+            time.sleep(min(poll, remaining))
+            poll = min(poll * self.backoff, self.max_poll)
+
+    def run(self, driver: webdriver.Chrome) -> Dict[str, float]:
+        """
+        Runs every step in order
+        Returns {step name: seconds}, raises TimeoutException when a required step does not complete
+        """
+        from selenium.common.exceptions import TimeoutException
+
+        deadline = time.monotonic() + self.timeout
+        timings: Dict[str, float] = {}
+
+        for step in self.steps:
+            start = time.monotonic()
+            remaining = deadline - start
+            timeout = remaining if step.timeout is None else min(step.timeout, remaining)
+
+            held, value = self.wait_for(driver, step.condition, max(timeout, 0))
+            if not held:
+                if step.optional:
+                    logger.info(f"Skipped optional step '{step.name}'")
+                    continue
+                raise TimeoutException(f"Flow step '{step.name}' did not complete in time")
+
+            if step.action:
+                action_start = time.monotonic()
+                step.action(driver, value)
+                if step.interactive:
+                    deadline += time.monotonic() - action_start
+            timings[step.name] = time.monotonic() - start
+            logger.info(f"Step '{step.name}' completed in {timings[step.name]:.2f}s")
+
+        return timings
+
+
+def type_and_submit(text: str) -> Action:
+    """Action that types text into the element returned by the condition and presses Enter"""
+    def action(driver, element):
+        from selenium.webdriver.common.keys import Keys
+
+        element.send_keys(text)
+        element.send_keys(Keys.RETURN)
+    return action
+
+
+def click(driver, element):
+    """Action that clicks the element returned by the condition"""
+    element.click()
+
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import threading
+from functools import lru_cache
+from typing import Optional, Dict, List, Tuple, Iterable, Any, NamedTuple
+
+from init_selenium.cache import CACHE_DIR, FileLock
+from init_selenium.langs import accept_languages
+
+logger = logging.getLogger(__name__)
+
+IDENTITIES_PATH = os.path.join(CACHE_DIR, "identities.json")
+# Bump when the tables below change, cached files from older versions are rebuilt
+IDENTITY_DATA_VERSION = 1
+# Used when the driver does not report its browser version
+DEFAULT_CHROME_MAJOR = "131"
+
+WINDOWS = "windows"
+MACOS = "macos"
+LINUX = "linux"
+
+# platform -> (user agent template, navigator.platform, client hints platform, platform version,
+#              (width, height, device scale factor) of common screens on that platform)
+# Templates use the reduced user agent format Chrome itself sends, {major} is filled with the
+# version of the running browser so the user agent never contradicts the engine
+_PLATFORM_TABLE = {
+    WINDOWS: (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/{major}.0.0.0 Safari/537.36",
+        "Win32", "Windows", "15.0.0",
+        ((1920, 1080, 1.0), (1536, 864, 1.25), (1366, 768, 1.0), (1440, 900, 1.0), (2560, 1440, 1.0)),
+    ),
+    MACOS: (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/{major}.0.0.0 Safari/537.36",
+        "MacIntel", "macOS", "14.6.1",
+        ((1440, 900, 2.0), (1512, 982, 2.0), (1728, 1117, 2.0), (1280, 800, 2.0), (1920, 1080, 1.0)),
+    ),
+    LINUX: (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/{major}.0.0.0 Safari/537.36",
+        "Linux x86_64", "Linux", "",
+        ((1920, 1080, 1.0), (1366, 768, 1.0), (2560, 1440, 1.0)),
+    ),
+}
+
+# Language tag -> IANA time zones where that locale is common
+_LOCALE_TABLE = (
+    ("en-US", ("America/New_York", "America/Chicago", "America/Denver", "America/Los_Angeles")),
+    ("en-GB", ("Europe/London",)),
+    ("en-CA", ("America/Toronto", "America/Vancouver")),
+    ("en-AU", ("Australia/Sydney", "Australia/Melbourne")),
+    ("en-IN", ("Asia/Kolkata",)),
+    ("es-ES", ("Europe/Madrid",)),
+    ("es-MX", ("America/Mexico_City",)),
+    ("es-AR", ("America/Argentina/Buenos_Aires",)),
+    ("es-CO", ("America/Bogota",)),
+    ("pt-BR", ("America/Sao_Paulo",)),
+    ("pt-PT", ("Europe/Lisbon",)),
+    ("fr-FR", ("Europe/Paris",)),
+    ("fr-CA", ("America/Toronto",)),
+    ("de-DE", ("Europe/Berlin",)),
+    ("de-AT", ("Europe/Vienna",)),
+    ("it-IT", ("Europe/Rome",)),
+    ("nl-NL", ("Europe/Amsterdam",)),
+    ("pl-PL", ("Europe/Warsaw",)),
+    ("sv-SE", ("Europe/Stockholm",)),
+    ("tr-TR", ("Europe/Istanbul",)),
+    ("ja-JP", ("Asia/Tokyo",)),
+    ("ko-KR", ("Asia/Seoul",)),
+    ("zh-CN", ("Asia/Shanghai",)),
+    ("zh-TW", ("Asia/Taipei",)),
+)
+
+
+class Identity(NamedTuple):
+    """
+    A self-consistent browser identity: user agent, client hints, languages, time zone and
+    screen all describe the same kind of machine in the same place
+    """
+    platform: str
+    user_agent: str
+    navigator_platform: str
+    client_hints_platform: str
+    platform_version: str
+    language: Tuple[str, ...]
+    timezone: str
+    viewport: Tuple[int, int]
+    device_scale_factor: float
+
+    @property
+    def locale(self) -> str:
+        """ICU locale for Emulation.setLocaleOverride, e.g. "es_MX" """
+        return self.language[0].replace("-", "_")
+
+    @property
+    def accept_language(self) -> str:
+        """Accept-Language header value, e.g. "es-MX,es;q=0.9" """
+        return ",".join(
+            tag if i == 0 else f"{tag};q={max(1 - i / 10, 0.1):.1f}" for i, tag in enumerate(self.language)
+        )
+
+    def user_agent_for(self, major: str) -> str:
+        return self.user_agent.format(major=major)
+
+    def apply(self, target, major: Optional[str] = None) -> "Identity":
+        """
+        Applies this identity to a driver or a TabPool tab through CDP, without relaunching
+        The overrides last for the tab's lifetime; new tabs and workers the page opens keep the browser's own
+        """
+        major = major or _browser_major(target)
+        target.execute_cdp_cmd("Network.setUserAgentOverride", {
+            "userAgent": self.user_agent_for(major),
+            "acceptLanguage": self.accept_language,
+            "platform": self.navigator_platform,
+            "userAgentMetadata": {
+                "brands": [
+                    {"brand": "Google Chrome", "version": major},
+                    {"brand": "Chromium", "version": major},
+                    {"brand": "Not_A Brand", "version": "24"},
+                ],
+                "fullVersion": f"{major}.0.0.0",
+                "platform": self.client_hints_platform,
+                "platformVersion": self.platform_version,
+                "architecture": "x86",
+                "bitness": "64",
+                "model": "",
+                "mobile": False,
+            },
+        })
+        _override(target, "Emulation.setTimezoneOverride", {"timezoneId": self.timezone}, {"timezoneId": ""})
+        _override(target, "Emulation.setLocaleOverride", {"locale": self.locale}, {})
+        width, height = self.viewport
+        target.execute_cdp_cmd("Emulation.setDeviceMetricsOverride", {
+            "width": width,
+            "height": height,
+            "deviceScaleFactor": self.device_scale_factor,
+            "mobile": False,
+            "screenWidth": width,
+            "screenHeight": height,
+        })
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Identity":
+        data = dict(data)
+        data["language"] = tuple(data["language"])
+        data["viewport"] = tuple(data["viewport"])
+        return cls(**data)
+
+
+def _browser_major(target) -> str:
+    version = (getattr(target, "capabilities", None) or {}).get("browserVersion") or ""
+    return version.split(".")[0] or DEFAULT_CHROME_MAJOR
+
+
+def _override(target, cmd: str, params: Dict[str, Any], clear: Dict[str, Any]):
+    """Chrome rejects a second time zone or locale override on a tab, the previous one is cleared first"""
+    from selenium.common.exceptions import WebDriverException
+
+    try:
+        target.execute_cdp_cmd(cmd, params)
+    except WebDriverException:
+        target.execute_cdp_cmd(cmd, clear)
+        target.execute_cdp_cmd(cmd, params)
+
+
+def build_identities() -> List[Identity]:
+    """Every platform, locale, time zone and screen combination of the built-in tables"""
+    identities = []
+    for platform, (user_agent, navigator_platform, hints_platform, version, screens) in _PLATFORM_TABLE.items():
+        for tag, timezones in _LOCALE_TABLE:
+            language = accept_languages(tag)
+            for timezone in timezones:
+                for width, height, scale in screens:
+                    identities.append(Identity(platform, user_agent, navigator_platform, hints_platform, version,
+                                               language, timezone, (width, height), scale))
+    return identities
+
+
+@lru_cache(maxsize=8)
+def load_identities(path: str = IDENTITIES_PATH) -> Tuple[Identity, ...]:
+    """
+    Loads the identity bundles from the local JSON cache, building it from the built-in tables
+    on first use. Edit the file to add or remove bundles; it is rebuilt when the package's
+    tables change version. Nothing is fetched from the network
+    """
+    with FileLock(f"{path}.lock"):
+        try:
+            with open(path, "r") as identities_file:
+                data = json.load(identities_file)
+            if data.get("version") == IDENTITY_DATA_VERSION:
+                return tuple(Identity.from_dict(item) for item in data["identities"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        identities = build_identities()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as identities_file:
+                json.dump({"version": IDENTITY_DATA_VERSION,
+                           "identities": [identity.to_dict() for identity in identities]}, identities_file)
+            os.replace(tmp_path, path)
+            logger.info(f"Built {len(identities)} identity bundles in {path}")
+        except OSError as e:
+            logger.warning(f"Could not cache identity bundles in {path}: {e}")
+        return tuple(identities)
+
+
+class IdentityPool:
+    """
+    Rotates precomputed identities across sessions and tabs
+    Filter by language names or tags ("Spanish", "es-MX") and platforms (WINDOWS, MACOS, LINUX).
+    next() goes round robin through a shuffled order, sample() picks at random
+    """
+
+    def __init__(self,
+                 identities: Optional[Iterable[Identity]] = None,
+                 languages: Optional[Iterable[str]] = None,
+                 platforms: Optional[Iterable[str]] = None,
+                 seed: Optional[int] = None,
+                 path: str = IDENTITIES_PATH,
+                 ):
+        identities = list(identities) if identities is not None else list(load_identities(path))
+        if languages:
+            wanted = {accept_languages(language)[0].casefold() for language in languages}
+            identities = [identity for identity in identities
+                          if identity.language[0].casefold() in wanted
+                          or identity.language[-1].casefold() in wanted]
+        if platforms:
+            platforms = set(platforms)
+            identities = [identity for identity in identities if identity.platform in platforms]
+        if not identities:
+            raise ValueError("No identity matches the requested languages and platforms")
+
+        self._random = random.Random(seed)
+        self._random.shuffle(identities)
+        self.identities = identities
+        self._index = 0
+        self._lock = threading.Lock()
+
+    def next(self) -> Identity:
+        with self._lock:
+            identity = self.identities[self._index % len(self.identities)]
+            self._index += 1
+        return identity
+
+    def sample(self) -> Identity:
+        with self._lock:
+            return self._random.choice(self.identities)
+
+    def __len__(self) -> int:
+        return len(self.identities)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
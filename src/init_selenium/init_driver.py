@@ -1,22 +1,31 @@
-from init_selenium.langs import LANGUAGES
+from __future__ import annotations
+
+from init_selenium.langs import LANGUAGE_NAMES, language_name, accept_languages
+from init_selenium.cache import driver_path_cache
+from init_selenium.metrics import DriverMetrics, HostLatencies, NullTimer
+from init_selenium.session import SessionSnapshot, set_cookies
+from init_selenium.user_data import UserDataStore
+from init_selenium.procs import SessionTracker
+from init_selenium.profiler import CommandProfiler
+from init_selenium.backends import Backend, default_backend
+from init_selenium.flows import Flow, FlowStep, any_of, url_not_startswith, type_and_submit, click
+from init_selenium.profile import (
+    LaunchProfile,
+    blocked_url_patterns,
+    WINDOW_MAX,
+    ENGLISH_USA,
+)
 import logging
-from typing import Optional, Tuple, Dict, Union
-import time
-import json
-
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-import chromedriver_autoinstaller
-import undetected_chromedriver as uc
-from webdriver_manager.core.manager import DriverManager
+from typing import Optional, Tuple, Dict, Union, Iterable, Callable, TYPE_CHECKING
 
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import Select
-from selenium.webdriver.support import expected_conditions as ec
-from selenium.common.exceptions import *
+# Selenium and the driver backends are imported where they are first used,
+# so importing this module stays cheap for processes that never launch a browser
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from selenium.webdriver.support.ui import WebDriverWait
+    from init_selenium.proxy import CachingProxy
+    from init_selenium.identity import IdentityPool, Identity
+    from init_selenium.artifacts import ArtifactStore
 
 
 # Configure logging with a more detailed format
@@ -26,34 +35,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Constants for window sizes and language preferences
-WINDOW_MIN = "min"
-WINDOW_MAX = "max"
-SPANISH = ("es-ES", "es")
-ENGLISH_USA = ("en", "en_US")
-
 
 class LanguageManager:
-    """Handles browser language settings using a JSON configuration file"""
+    """Handles browser language settings from the precomputed language index"""
 
     def __init__(self, lang: str):
-        self.lang = lang.title()
-        self.langcode = self.get_language_code()
+        self.langcode = accept_languages(lang)
+        # Name of the most specific known tag: "es-MX" -> "Spanish", "zh-Hant" -> "Chinese (Traditional)"
+        self.lang = next(language_name(tag) for tag in self.langcode if tag.casefold() in LANGUAGE_NAMES)
 
-    def get_language_code(self) -> Tuple[str, str]:
+    def get_language_code(self) -> Tuple[str, ...]:
         """
-        Retrieves language code from JSON configuration
-        Returns tuple of (language_code, language_code)
+        Returns the accept-language tuple, most specific tag first
+        ("zh-Hant", "zh") for Chinese (Traditional), ("en",) for English
         """
-
-        lang_label = LANGUAGES["langs"].get(self.lang)
-
-        if not lang_label:
-            raise KeyError(f"Language '{self.lang}' not found in configuration")
-
-        # Extract primary language code
-        primary_lang = lang_label.split(',')[0].strip()
-        return primary_lang, primary_lang
+        return self.langcode
 
 
 class DriverInit:
@@ -62,7 +58,17 @@ class DriverInit:
                  drivers_route: Optional[str] = None,
                  user_agent: Optional[str] = None,
                  language: Tuple[str, str] | LanguageManager = ENGLISH_USA,
-                 force_install: bool = False
+                 force_install: bool = False,
+                 metrics: Optional[DriverMetrics] = None,
+                 profile: Optional[LaunchProfile] = None,
+                 user_data_store: Optional[UserDataStore] = None,
+                 tracker: Optional[SessionTracker] = None,
+                 max_rss: Optional[int] = None,
+                 profiler: Optional[CommandProfiler] = None,
+                 backend: Optional[Backend] = None,
+                 proxy: Optional[CachingProxy] = None,
+                 identities: Optional[IdentityPool] = None,
+                 artifacts: Optional[ArtifactStore] = None
                  ):
         self.drivers_route = drivers_route
         self.user_agent = user_agent
@@ -73,20 +79,58 @@ class DriverInit:
             self.language = language
         
         self.force_install = force_install
+        # force_install refreshes the cached driver once, later launches reuse it
+        self._driver_refreshed = False
+        self.metrics = metrics
+        self.profile = profile
+        self.user_data_store = user_data_store
+        if max_rss is not None and tracker is None:
+            tracker = SessionTracker()
+        self.tracker = tracker
+        self.max_rss = max_rss
+        self.profiler = profiler
+        self.backend = backend
+        self.proxy = proxy
+        self.identities = identities
+        self.artifacts = artifacts
+        # Wait durations per host, shared by the AdaptiveWait of every session; None disables learning
+        self.wait_latencies: Optional[HostLatencies] = HostLatencies()
         # self.user_agent_json = "./driver_info/driver_data.json"
 
+    def __getstate__(self) -> Dict[str, object]:
+        """
+        Pickles the launch configuration so other processes can build identical drivers
+        Metrics, the profiler, the process tracker and the proxy belong to one process: metrics
+        and the profiler are dropped, each process gets its own tracker and starts its own proxy
+        on the shared cache and its own artifact writers on the shared store
+        """
+        state = self.__dict__.copy()
+        state["metrics"] = None
+        state["profiler"] = None
+        state["tracker"] = self.tracker is not None
+        return state
+
+    def __setstate__(self, state: Dict[str, object]):
+        self.__dict__.update(state)
+        self.tracker = SessionTracker() if state["tracker"] else None
+
     @staticmethod
-    def install_chrome_driver() -> str:
-        """Installs and returns path to the latest compatible ChromeDriver"""
+    def install_chrome_driver(force: bool = False) -> str:
+        """
+        Installs and returns path to the latest compatible ChromeDriver
+        The path is cached per Chrome major version, force=True invalidates the cached entry
+        """
         logger.info("Installing ChromeDriver...")
         try:
-            driver_path = chromedriver_autoinstaller.install()
+            driver_path = driver_path_cache.resolve(force=force)
             logger.info(f"ChromeDriver installed successfully at: {driver_path}")
             return driver_path
         except Exception as e:
             logger.error(f"Failed to install ChromeDriver: {e}")
             raise
 
+    blocked_url_patterns = staticmethod(blocked_url_patterns)
+
     def create_driver(self,
                       window_size: str = WINDOW_MAX,
                       window_position: Tuple[int, int] = (0, 0),
@@ -99,217 +143,290 @@ class DriverInit:
                       undetectable: bool = False,
                       cookies: Optional[Dict[str, str]] = None,
                       initial_url: Optional[str] = None,
+                      block_resources: Optional[Iterable[str]] = None,
+                      page_load_strategy: Optional[str] = None,
+                      profile: Optional[LaunchProfile] = None,
+                      session: Optional[Union[str, SessionSnapshot]] = None,
+                      user_data_dir: Optional[str] = None,
+                      backend: Optional[Backend] = None,
                       ) -> Tuple[webdriver.Chrome, WebDriverWait]:
         """
-        Creates and configures a Chrome WebDriver instance with specified options
+        Creates and configures a WebDriver instance with specified options
+        If a LaunchProfile is given here or to DriverInit, it replaces the option arguments,
+        only cookies, initial_url and session are still taken per call
+        session is a SessionSnapshot or the path of a saved one, restored before initial_url
+        Without user_data_dir, a DriverInit with a user_data_store launches from a clone of the golden profile
+        A DriverInit with a proxy sends the session's traffic through its caching proxy,
+        one with identities applies the next identity of the pool to each session,
+        one with artifacts gives each session a driver.artifacts capturing into that store
+        backend (here or on DriverInit) picks the browser engine, by default Chrome or undetected Chrome
+        The wait is an AdaptiveWait, a WebDriverWait that backs off from 10 ms polls and learns per-host timeouts
         Returns tuple of (WebDriver, WebDriverWait)
         """
-        logger.info("Initializing Chrome WebDriver...")
-
-        # Validate notification level
-        if notification_level not in [0, 1, 2]:
-            logger.error(f"Invalid notification level: {notification_level}")
-            raise ValueError("Notification level must be 0, 1, or 2")
-
-        # Install or use existing ChromeDriver
-        driver_path = self.install_chrome_driver() if self.force_install or not self.drivers_route else self.drivers_route
-
-        # Configure Chrome options
-        options = Options()
-        window_dimensions = (None, None)
-
-        # Configure window size
-        if window_size == WINDOW_MAX:
-            options.add_argument("--start-maximized")
-        elif window_size == WINDOW_MIN:
-            options.add_argument("--headless")
-        elif "x" in window_size:
-            try:
-                width, height = map(int, window_size.split("x"))
-                window_dimensions = (width, height)
-            except ValueError:
-                logger.error(f"Invalid window size format: {window_size}")
-                raise ValueError("Window size must be 'max', 'min', or 'WIDTHxHEIGHT'")
-
-        # Add Chrome options
-        if self.user_agent:
-            options.add_argument(f"user-agent={self.user_agent}")
-
-        if not web_security:
-            options.add_argument("--disable-web-security")
-        if not sandbox_enabled:
-            options.add_argument("--no-sandbox")
-
-        # Basic security and performance options
-        chrome_arguments = [
-            "--disable-extensions",
-            "--disable-notifications",
-            "--ignore-certificate-errors",
-            "--log-level=3",
-            "--allow-running-insecure-content",
-            "--no-default-browser-check",
-            "--no-first-run",
-            "--no-proxy-server"
-        ]
-        for arg in chrome_arguments:
-            options.add_argument(arg)
-
-        # Anti-detection measures
-        if camouflage:
-            options.add_argument("--disable-blink-features=AutomationControlled")
+        from init_selenium.wait import AdaptiveWait
+
+        timer = self.metrics.timer("launch") if self.metrics else NullTimer()
+
+        profile = profile or self.profile
+        if profile is None:
+            # Identical arguments share one validated, precompiled profile
+            profile = LaunchProfile.cached(
+                window_size=window_size,
+                window_position=tuple(window_position),
+                sandbox_enabled=sandbox_enabled,
+                wait_time=wait_time,
+                notification_level=notification_level,
+                save_passwords=save_passwords,
+                camouflage=camouflage,
+                web_security=web_security,
+                undetectable=undetectable,
+                block_resources=tuple(block_resources or ()),
+                page_load_strategy=page_load_strategy,
+                user_agent=self.user_agent,
+                language=tuple(self.language),
+            )
+
+        backend = backend or self.backend or default_backend(profile)
+        logger.info(f"Initializing {backend.name} WebDriver...")
+
+        # Install or use existing driver executable
+        with timer.stage("resolve_driver"):
+            driver_path = backend.resolve_driver(self)
+
+        clone = None
+        with timer.stage("build_options"):
+            if user_data_dir is None and self.user_data_store and backend.supports_user_data:
+                user_data_dir = clone = self.user_data_store.clone(self.user_data_store.key_for(profile))
+            options = backend.build_options(self._proxied(profile), user_data_dir)
+            if self.artifacts and self.artifacts.network_log and backend.supports_cdp:
+                # HAR capture reads the Network events chromedriver records in its performance log
+                options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
 
         # Initialize driver
+        driver = None
         try:
-            if undetectable:
-                # options.add_argument("user-data-dir=./")
-                # options.add_experimental_option("detach", True)
-                # options.add_experimental_option("excludeSwitches", ["enable-logging"])
-                driver = uc.Chrome(options=options, driver_executable_path=driver_path)
-            else:
-                # Experimental options
-                options.add_experimental_option("excludeSwitches", [
-                    "enable-automation",
-                    "ignore-certificate-errors",
-                    "enable-logging"
-                ])
-
-                # Browser preferences
-                options.add_experimental_option("prefs", {
-                    "profile.default_content_setting_values.notifications": notification_level,
-                    "intl.accept_languages": list(self.language),
-                    "credentials_enable_service": save_passwords
-                })
-
-                service = Service(driver_path)
-                driver = webdriver.Chrome(service=service, options=options)
+            with timer.stage("spawn"):
+                driver = backend.spawn(options, driver_path)
 
-            # Configure window dimensions if specified
-            if all(window_dimensions):
-                driver.set_window_size(*window_dimensions)
-                driver.set_window_position(*window_position)
+            if self.profiler:
+                self.profiler.attach(driver)
 
-            wait = WebDriverWait(driver, wait_time)
+            if self.tracker:
+                # Registered right away, a later stage that fails quits the driver, which unregisters it
+                self.tracker.register(driver)
+                self._on_quit(driver, lambda: self.tracker.unregister(driver))
+
+            if clone:
+                self._on_quit(driver, lambda: self.user_data_store.release(clone))
+
+            # Configure window dimensions if specified
+            with timer.stage("window"):
+                backend.after_spawn(driver, profile)
+                if all(profile.window_dimensions):
+                    driver.set_window_size(*profile.window_dimensions)
+                    driver.set_window_position(*profile.window_position)
+
+            # Block resources through CDP, works for both plain and undetected drivers
+            if profile.blocked_urls and not backend.supports_cdp:
+                logger.warning(f"{backend.name} has no CDP, only image blocking through preferences applies")
+            elif profile.blocked_urls:
+                with timer.stage("block_resources"):
+                    driver.execute_cdp_cmd("Network.enable", {})
+                    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(profile.blocked_urls)})
+
+            # Every session gets the next identity of the pool, before any page loads
+            if self.identities and not backend.supports_cdp:
+                logger.warning(f"{backend.name} has no CDP, identities are not applied")
+            elif self.identities:
+                with timer.stage("identity"):
+                    driver.identity = self.identities.next().apply(driver)
+
+            if self.artifacts:
+                driver.artifacts = self.artifacts.attach(driver, cdp=backend.supports_cdp)
+
+            # Restore cookies and localStorage before the first navigation
+            if session and not backend.supports_cdp:
+                raise ValueError(f"Session snapshots need a CDP capable backend, {backend.name} is not")
+            if session:
+                with timer.stage("session_restore"):
+                    if isinstance(session, str):
+                        session = SessionSnapshot.load(session)
+                    session.restore(driver)
+
+            wait = AdaptiveWait(driver, profile.wait_time, latencies=self.wait_latencies)
 
             # Handle initial URL and cookies
             if initial_url:
                 logger.info(f"Navigating to initial URL: {initial_url}")
-                driver.get(initial_url)
+                with timer.stage("initial_url"):
+                    driver.get(initial_url)
 
             if cookies and cookies != {}:
                 logger.info("Setting cookies...")
-                for cookie in cookies:
-                    driver.add_cookie(cookie)
+                with timer.stage("cookies"):
+                    # One CDP round trip instead of one add_cookie call per cookie where the backend allows it
+                    set_cookies(driver, cookies, default_url=driver.current_url, cdp=backend.supports_cdp)
 
             # if save_user_agent_data:
             #     with open(self.user_agent_json, "w") as ua_file:
             #         ua_file.write(json.dumps(self.user_agent))
 
-            logger.info("Chrome WebDriver initialized successfully")
+            timings = timer.finish()
+            if self.metrics:
+                self.metrics.instrument(driver)
+                logger.info(f"{backend.name} WebDriver initialized successfully in {timings['total']:.2f}s")
+            else:
+                logger.info(f"{backend.name} WebDriver initialized successfully")
             return driver, wait
 
         except Exception as e:
-            logger.error(f"Failed to initialize Chrome WebDriver: {e}")
+            logger.error(f"Failed to initialize {backend.name} WebDriver: {e}")
+            if driver is not None:
+                # The browser is already running, leaving it would leak chromedriver and Chrome processes
+                try:
+                    driver.quit()
+                except Exception as quit_error:
+                    logger.warning(f"Error quitting the half-initialized driver: {quit_error}")
+            elif clone:
+                self.user_data_store.release(clone)
             raise
 
-    @staticmethod
-    def pass_gmail_login(new_driver,
-                         new_wt,
-                         mail: str,
-                         password: str,
-                         phone: str):
-
-        # wt.until(ec.presence_of_element_located((By.CSS_SELECTOR, 'input[name="identifier"]'))).send_keys(mail)
-        # time.sleep(1)
-        # wt.until(ec.presence_of_element_located((By.XPATH, '//span[.="Siguiente"]'))).click()
-        # time.sleep(1)
-        # wt.until(ec.presence_of_element_located((By.CSS_SELECTOR, 'input[name="Passwd"]'))).send_keys(password)
-        # time.sleep(1)
-        # wt.until(ec.presence_of_element_located((By.XPATH, '//span[.="Siguiente"]'))).click()
-        # time.sleep(2)
-        try:
-            # Replace 'input_selector' with the actual selector for Gemini AI's input box.
-            mail_box = new_driver.find_element(By.CSS_SELECTOR, 'input[name="identifier"]')
-            mail_box.send_keys(mail)
-            mail_box.send_keys(Keys.RETURN)  # Simulate pressing Enter to submit the query.
-            time.sleep(3)  # Wait for page to respond.
-
-            # Find the password input box and enter the password.
-            pwd_box = new_wt.until(ec.element_to_be_clickable((By.CSS_SELECTOR, 'input[name="Passwd"]')))
-            pwd_box.send_keys(password)
-            pwd_box.send_keys(Keys.RETURN)
-            time.sleep(3)  # Wait for page to respond.
-            # input("Press Enter to continue...")
-            # Telephone input box
-            tp_box = new_wt.until(ec.visibility_of_element_located((By.CSS_SELECTOR, 'input[type="tel"]')))
-            tp_box.send_keys(phone)
-            tp_box.send_keys(Keys.RETURN)
-
-            # check if too many attempts
-            time.sleep(3)
-            try:
-                new_driver.find_element(By.XPATH, '//span[.="Too many attempts. Please try again later."]')
-                # print("too many attempts")
-                # time.sleep(5)
-                new_driver.quit()
-                raise Exception("Too many attempts")
-                # return
-            except NoSuchElementException or InvalidSelectorException:
-                pass
+    def _proxied(self, profile: LaunchProfile) -> LaunchProfile:
+        """
+        Points the profile at the DriverInit proxy, starting it on the first launch
+        Profiles that name their own proxy_server are left as they are
+        """
+        if self.proxy is None or profile.proxy_server:
+            return profile
+        self.proxy.start()
+        return LaunchProfile.cached(**{**profile.to_dict(), "proxy_server": self.proxy.url})
+
+    def rotate_identity(self, driver: webdriver.Chrome) -> Identity:
+        """Switches a running session to the next identity of the DriverInit pool, without relaunching it"""
+        if not self.identities:
+            raise ValueError("DriverInit has no identities")
+        driver.identity = self.identities.next().apply(driver)
+        return driver.identity
 
-            # Confirmation code input box
-            code = input("Enter confirmation code: ")
+    @staticmethod
+    def _on_quit(driver: webdriver.Chrome, callback: Callable[[], None]):
+        """Wraps driver.quit on this instance so callback runs after the browser is gone"""
+        original_quit = driver.quit
 
-            # send button xpath (just in case): //button[.="Enviar"]
-            print("ok")
-            time.sleep(2)
+        def quit_and_cleanup():
+            try:
+                original_quit()
+            finally:
+                try:
+                    callback()
+                except OSError as e:
+                    logger.warning(f"Cleanup after quit failed: {e}")
 
-            code_box = new_wt.until(ec.element_to_be_clickable((By.CSS_SELECTOR, 'input#idvPin')))
-            code_box.send_keys(code)
-            code_box.send_keys(Keys.RETURN)
+        driver.quit = quit_and_cleanup
 
-            time.sleep(2)
+    def over_memory_limit(self, driver: webdriver.Chrome, max_rss: Optional[int] = None) -> bool:
+        """
+        True if the driver's chromedriver/Chrome process tree uses more than max_rss bytes
+        Defaults to the DriverInit max_rss, always False without a tracker or a limit
+        """
+        max_rss = max_rss or self.max_rss
+        if not self.tracker or not max_rss or self.tracker.session(driver) is None:
+            return False
+        return self.tracker.over_limit(driver, max_rss)
+
+    def seed_user_data(self,
+                       prepare: Optional[Callable[[webdriver.Chrome], None]] = None,
+                       profile: Optional[LaunchProfile] = None,
+                       **create_driver_kwargs):
+        """
+        Builds the golden profile that later launches are cloned from
+        prepare(driver) can visit sites or log in to warm the profile before it is saved
+        """
+        if not self.user_data_store:
+            raise ValueError("DriverInit has no user_data_store")
+        profile = profile or self.profile or LaunchProfile.cached(
+            user_agent=self.user_agent,
+            language=tuple(self.language),
+            **{key: tuple(value) if isinstance(value, list) else value for key, value in create_driver_kwargs.items()}
+        )
 
-            while 1:
-                curr_url = new_driver.current_url
-                # check if we are in captcha page
-                print("do captcha")
-                print("curr:", curr_url)
+        def launch(golden: str) -> webdriver.Chrome:
+            return self.create_driver(profile=profile, user_data_dir=golden)[0]
 
-                try:
-                    url_part = curr_url[:29]
-                except IndexError:
-                    break
+        self.user_data_store.seed(self.user_data_store.key_for(profile), launch, prepare)
 
-                print("part:", url_part)
-                print(("https://www.google.com/sorry/" == url_part) or ("https://accounts.google.com/v" == url_part))
+    @staticmethod
+    def pass_gmail_login(new_driver,
+                         new_wt,
+                         mail: str,
+                         password: str,
+                         phone: str,
+                         timeout: float = 300):
+        """
+        Signs into a Google account from its sign-in page, the confirmation code is read from stdin
+        Every step waits on page state instead of fixed sleeps and shares one timeout budget,
+        which is paused while the code is being typed
+        Returns tuple of (WebDriver, WebDriverWait)
+        """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as ec
 
-                if len(curr_url) < 29:
-                    break
+        captcha_prefixes = ("https://www.google.com/sorry/", "https://accounts.google.com/v")
 
-                if ("https://www.google.com/sorry/" == url_part) or ("https://accounts.google.com/v" == url_part):
-                    time.sleep(1)
-                else:
-                    # confirm we are not in captcha
-                    time.sleep(1)
-                    if ("https://www.google.com/sorry/" != url_part) or ("https://accounts.google.com/v" != url_part):
-                        break
+        def check_attempts(driver, match):
+            index, _ = match
+            if index == 1:
+                driver.quit()
+                raise Exception("Too many attempts")
 
-            try:
-                # cancel saving any info about our account
-                new_driver.find_element(By.XPATH, '//button[.="Cancelar"]').click()
-            except NoSuchElementException or InvalidSelectorException or ElementNotInteractableException:
-                pass
-            try:
-                # not follow suggestions
-                new_driver.find_element(By.XPATH, '//button[.="Ahora no"]').click()
-            except NoSuchElementException or InvalidSelectorException:
-                pass
+        def enter_code(driver, code_box):
+            # Confirmation code input box
+            code = input("Enter confirmation code: ")
+            type_and_submit(code)(driver, code_box)
+
+        flow = Flow([
+            FlowStep("mail",
+                     ec.element_to_be_clickable((By.CSS_SELECTOR, 'input[name="identifier"]')),
+                     type_and_submit(mail)),
+            FlowStep("password",
+                     ec.element_to_be_clickable((By.CSS_SELECTOR, 'input[name="Passwd"]')),
+                     type_and_submit(password)),
+            FlowStep("phone",
+                     ec.visibility_of_element_located((By.CSS_SELECTOR, 'input[type="tel"]')),
+                     type_and_submit(phone)),
+            # Either the confirmation code box shows up or Google refuses the attempt
+            FlowStep("phone_result",
+                     any_of(
+                         ec.element_to_be_clickable((By.CSS_SELECTOR, 'input#idvPin')),
+                         ec.presence_of_element_located(
+                             (By.XPATH, '//span[.="Too many attempts. Please try again later."]')
+                         ),
+                     ),
+                     check_attempts),
+            # Typing the code in does not count against the timeout
+            FlowStep("confirmation_code",
+                     ec.element_to_be_clickable((By.CSS_SELECTOR, 'input#idvPin')),
+                     enter_code, interactive=True),
+            # Wait until the captcha pages have been solved
+            FlowStep("captcha", url_not_startswith(*captcha_prefixes)),
+            # cancel saving any info about our account
+            FlowStep("skip_save_info",
+                     ec.element_to_be_clickable((By.XPATH, '//button[.="Cancelar"]')),
+                     click, timeout=2, optional=True),
+            # not follow suggestions
+            FlowStep("skip_suggestions",
+                     ec.element_to_be_clickable((By.XPATH, '//button[.="Ahora no"]')),
+                     click, timeout=2, optional=True),
+        ], timeout=timeout)
 
+        try:
+            timings = flow.run(new_driver)
+            logger.info("Gmail login step timings: " + ", ".join(
+                f"{name}={seconds:.2f}s" for name, seconds in timings.items()
+            ))
         except Exception as e:
-            print(f"Error interacting with page: {e}")
-        # input("Press Enter to continue...")
+            logger.error(f"Error interacting with page: {e}")
 
-        # new_driver.quit()
         return new_driver, new_wt
 
 
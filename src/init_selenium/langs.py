@@ -1,189 +1,269 @@
-LANGUAGES = {
-    "langs": 
-          {"Abkhazian": "ab",
-           "Afar": "aa",
-           "Afrikaans": "af",
-           "Akan": "ak",
-           "Albanian": "sq",
-           "Amharic": "am",
-           "Arabic": "ar",
-           "Aragonese": "an",
-           "Armenian": "hy",
-           "Assamese": "as",
-           "Avaric": "av",
-           "Avestan": "ae",
-           "Aymara": "ay",
-           "Azerbaijani": "az",
-           "Bambara": "bm",
-           "Bashkir": "ba",
-           "Basque": "eu",
-           "Belarusian": "be",
-           "Bengali": "(Bangla) bn",
-           "Bihari": "bh",
-           "Bislama": "bi",
-           "Bosnian": "bs",
-           "Breton": "br",
-           "Bulgarian": "bg",
-           "Burmese": "my",
-           "Catalan": "ca",
-           "Chamorro": "ch",
-           "Chechen": "ce",
-           "Chichewa,": "Chewa, Nyanja ny",
-           "Chinese": "(Traditional) zh-Hant",
-           "Chuvash": "cv",
-           "Cornish": "kw",
-           "Corsican": "co",
-           "Cree": "cr",
-           "Croatian": "hr",
-           "Czech": "cs",
-           "Danish": "da",
-           "Divehi,": "Dhivehi, Maldivian dv",
-           "Dutch": "nl",
-           "Dzongkha": "dz",
-           "English": "en",
-           "Esperanto": "eo",
-           "Estonian": "et",
-           "Ewe": "ee",
-           "Faroese": "fo",
-           "Fijian": "fj",
-           "Finnish": "fi",
-           "French": "fr",
-           "Fula,": "Fulah, Pulaar, Pular ff",
-           "Gaelic": "(Manx) gv",
-           "Galician": "gl",
-           "Georgian": "ka",
-           "German": "de",
-           "Greek": "el",
-           "Greenlandic": "kl",
-           "Guarani": "gn",
-           "Gujarati": "gu",
-           "Haitian": "Creole ht",
-           "Hausa": "ha",
-           "Hebrew": "he",
-           "Herero": "hz",
-           "Hindi": "hi",
-           "Hiri": "Motu ho",
-           "Hungarian": "hu",
-           "Icelandic": "is",
-           "Ido": "io",
-           "Igbo": "ig",
-           "Indonesian": "id, in",
-           "Interlingua": "ia",
-           "Interlingue": "ie",
-           "Inuktitut": "iu",
-           "Inupiak": "ik",
-           "Irish": "ga",
-           "Italian": "it",
-           "Japanese": "ja",
-           "Javanese": "jv",
-           "Kalaallisut,": "Greenlandic kl",
-           "Kannada": "kn",
-           "Kanuri": "kr",
-           "Kashmiri": "ks",
-           "Kazakh": "kk",
-           "Khmer": "km",
-           "Kikuyu": "ki",
-           "Kinyarwanda": "(Rwanda) rw",
-           "Kirundi": "rn",
-           "Komi": "kv",
-           "Kongo": "kg",
-           "Korean": "ko",
-           "Kurdish": "ku",
-           "Kwanyama": "kj",
-           "Kyrgyz": "ky",
-           "Lao": "lo",
-           "Latin": "la",
-           "Latvian": "(Lettish) lv",
-           "Limburgish": "( Limburger) li",
-           "Lingala": "ln",
-           "Lithuanian": "lt",
-           "Luga-Katanga": "lu",
-           "Luganda,": "Ganda lg",
-           "Luxembourgish": "lb",
-           "Macedonian": "mk",
-           "Malagasy": "mg",
-           "Malay": "ms",
-           "Malayalam": "ml",
-           "Maltese": "mt",
-           "Manx": "gv",
-           "Maori": "mi",
-           "Marathi": "mr",
-           "Marshallese": "mh",
-           "Moldavian": "mo",
-           "Mongolian": "mn",
-           "Nauru": "na",
-           "Navajo": "nv",
-           "Ndonga": "ng",
-           "Nepali": "ne",
-           "Northern": "Ndebele nd",
-           "Norwegian": "nynorsk nn",
-           "Nuosu": "ii",
-           "Occitan": "oc",
-           "Ojibwe": "oj",
-           "Old": "Church Slavonic, Old Bulgarian cu",
-           "Oriya": "or",
-           "Oromo": "(Afaan Oromo) om",
-           "Ossetian": "os",
-           "Pashto,": "Pushto ps",
-           "Persian": "(Farsi) fa",
-           "Polish": "pl",
-           "Portuguese": "pt",
-           "Punjabi": "(Eastern) pa",
-           "Pāli": "pi",
-           "Quechua": "qu",
-           "Romanian": "ro",
-           "Romansh": "rm",
-           "Russian": "ru",
-           "Sami": "se",
-           "Samoan": "sm",
-           "Sango": "sg",
-           "Sanskrit": "sa",
-           "Serbian": "sr",
-           "Serbo-Croatian": "sh",
-           "Sesotho": "st",
-           "Setswana": "tn",
-           "Shona": "sn",
-           "Sichuan": "Yi ii",
-           "Sindhi": "sd",
-           "Sinhalese": "si",
-           "Siswati": "ss",
-           "Slovak": "sk",
-           "Slovenian": "sl",
-           "Somali": "so",
-           "Southern": "Ndebele nr",
-           "Spanish": "es",
-           "Sundanese": "su",
-           "Swahili": "(Kiswahili) sw",
-           "Swati": "ss",
-           "Swedish": "sv",
-           "Tagalog": "tl",
-           "Tahitian": "ty",
-           "Tajik": "tg",
-           "Tamil": "ta",
-           "Tatar": "tt",
-           "Telugu": "te",
-           "Thai": "th",
-           "Tibetan": "bo",
-           "Tigrinya": "ti",
-           "Tonga": "to",
-           "Tsonga": "ts",
-           "Turkish": "tr",
-           "Turkmen": "tk",
-           "Twi": "tw",
-           "Ukrainian": "uk",
-           "Urdu": "ur",
-           "Uyghur": "ug",
-           "Uzbek": "uz",
-           "Venda": "ve",
-           "Vietnamese": "vi",
-           "Volapük": "vo",
-           "Wallon": "wa",
-           "Welsh": "cy",
-           "Western": "Frisian fy",
-           "Wolof": "wo",
-           "Xhosa": "xh",
-           "Yiddish": "yi, ji",
-           "Yoruba": "yo",
-           "Zhuang,": "Chuang za",
-           "Zulu": "zu"}
-}
\ No newline at end of file
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Tuple, Mapping
+
+# (name, BCP-47 code, aliases). Aliases are alternative names and legacy ISO 639 codes
+_LANGUAGE_TABLE = (
+    ("Abkhazian", "ab", ()),
+    ("Afar", "aa", ()),
+    ("Afrikaans", "af", ()),
+    ("Akan", "ak", ()),
+    ("Albanian", "sq", ()),
+    ("Amharic", "am", ()),
+    ("Arabic", "ar", ()),
+    ("Aragonese", "an", ()),
+    ("Armenian", "hy", ()),
+    ("Assamese", "as", ()),
+    ("Avaric", "av", ()),
+    ("Avestan", "ae", ()),
+    ("Aymara", "ay", ()),
+    ("Azerbaijani", "az", ()),
+    ("Bambara", "bm", ()),
+    ("Bashkir", "ba", ()),
+    ("Basque", "eu", ()),
+    ("Belarusian", "be", ()),
+    ("Bengali", "bn", ("Bangla",)),
+    ("Bihari", "bh", ()),
+    ("Bislama", "bi", ()),
+    ("Bosnian", "bs", ()),
+    ("Breton", "br", ()),
+    ("Bulgarian", "bg", ()),
+    ("Burmese", "my", ()),
+    ("Catalan", "ca", ()),
+    ("Chamorro", "ch", ()),
+    ("Chechen", "ce", ()),
+    ("Chichewa", "ny", ("Chewa", "Nyanja")),
+    ("Chinese", "zh", ()),
+    ("Chinese (Simplified)", "zh-Hans", ()),
+    ("Chinese (Traditional)", "zh-Hant", ()),
+    ("Church Slavonic", "cu", ("Old Church Slavonic", "Old Bulgarian")),
+    ("Chuvash", "cv", ()),
+    ("Cornish", "kw", ()),
+    ("Corsican", "co", ()),
+    ("Cree", "cr", ()),
+    ("Croatian", "hr", ()),
+    ("Czech", "cs", ()),
+    ("Danish", "da", ()),
+    ("Divehi", "dv", ("Dhivehi", "Maldivian")),
+    ("Dutch", "nl", ()),
+    ("Dzongkha", "dz", ()),
+    ("English", "en", ()),
+    ("Esperanto", "eo", ()),
+    ("Estonian", "et", ()),
+    ("Ewe", "ee", ()),
+    ("Faroese", "fo", ()),
+    ("Fijian", "fj", ()),
+    ("Finnish", "fi", ()),
+    ("French", "fr", ()),
+    ("Fula", "ff", ("Fulah", "Pulaar", "Pular")),
+    ("Galician", "gl", ()),
+    ("Georgian", "ka", ()),
+    ("German", "de", ()),
+    ("Greek", "el", ()),
+    ("Guarani", "gn", ()),
+    ("Gujarati", "gu", ()),
+    ("Haitian Creole", "ht", ("Haitian",)),
+    ("Hausa", "ha", ()),
+    ("Hebrew", "he", ("iw",)),
+    ("Herero", "hz", ()),
+    ("Hindi", "hi", ()),
+    ("Hiri Motu", "ho", ()),
+    ("Hungarian", "hu", ()),
+    ("Icelandic", "is", ()),
+    ("Ido", "io", ()),
+    ("Igbo", "ig", ()),
+    ("Indonesian", "id", ("in",)),
+    ("Interlingua", "ia", ()),
+    ("Interlingue", "ie", ()),
+    ("Inuktitut", "iu", ()),
+    ("Inupiak", "ik", ("Inupiaq",)),
+    ("Irish", "ga", ()),
+    ("Italian", "it", ()),
+    ("Japanese", "ja", ()),
+    ("Javanese", "jv", ("jw",)),
+    ("Kalaallisut", "kl", ("Greenlandic",)),
+    ("Kannada", "kn", ()),
+    ("Kanuri", "kr", ()),
+    ("Kashmiri", "ks", ()),
+    ("Kazakh", "kk", ()),
+    ("Khmer", "km", ()),
+    ("Kikuyu", "ki", ()),
+    ("Kinyarwanda", "rw", ("Rwanda",)),
+    ("Kirundi", "rn", ()),
+    ("Komi", "kv", ()),
+    ("Kongo", "kg", ()),
+    ("Korean", "ko", ()),
+    ("Kurdish", "ku", ()),
+    ("Kwanyama", "kj", ()),
+    ("Kyrgyz", "ky", ()),
+    ("Lao", "lo", ()),
+    ("Latin", "la", ()),
+    ("Latvian", "lv", ("Lettish",)),
+    ("Limburgish", "li", ("Limburger",)),
+    ("Lingala", "ln", ()),
+    ("Lithuanian", "lt", ()),
+    ("Luba-Katanga", "lu", ("Luga-Katanga",)),
+    ("Luganda", "lg", ("Ganda",)),
+    ("Luxembourgish", "lb", ()),
+    ("Macedonian", "mk", ()),
+    ("Malagasy", "mg", ()),
+    ("Malay", "ms", ()),
+    ("Malayalam", "ml", ()),
+    ("Maltese", "mt", ()),
+    ("Manx", "gv", ("Manx Gaelic", "Gaelic (Manx)")),
+    ("Maori", "mi", ()),
+    ("Marathi", "mr", ()),
+    ("Marshallese", "mh", ()),
+    ("Mongolian", "mn", ()),
+    ("Nauru", "na", ()),
+    ("Navajo", "nv", ()),
+    ("Ndonga", "ng", ()),
+    ("Nepali", "ne", ()),
+    ("Northern Ndebele", "nd", ()),
+    ("Northern Sami", "se", ("Sami",)),
+    ("Norwegian", "no", ()),
+    ("Norwegian Bokmål", "nb", ("Bokmål", "Norwegian Bokmal")),
+    ("Norwegian Nynorsk", "nn", ("Nynorsk",)),
+    ("Occitan", "oc", ()),
+    ("Ojibwe", "oj", ()),
+    ("Oriya", "or", ()),
+    ("Oromo", "om", ("Afaan Oromo",)),
+    ("Ossetian", "os", ()),
+    ("Pali", "pi", ("Pāli",)),
+    ("Pashto", "ps", ("Pushto",)),
+    ("Persian", "fa", ("Farsi",)),
+    ("Polish", "pl", ()),
+    ("Portuguese", "pt", ()),
+    ("Punjabi", "pa", ("Eastern Punjabi",)),
+    ("Quechua", "qu", ()),
+    ("Romanian", "ro", ("Moldavian", "Moldovan", "mo")),
+    ("Romansh", "rm", ()),
+    ("Russian", "ru", ()),
+    ("Samoan", "sm", ()),
+    ("Sango", "sg", ()),
+    ("Sanskrit", "sa", ()),
+    ("Scottish Gaelic", "gd", ("Gaelic", "Gaelic (Scottish)")),
+    ("Serbian", "sr", ()),
+    ("Serbo-Croatian", "sh", ()),
+    ("Shona", "sn", ()),
+    ("Sichuan Yi", "ii", ("Nuosu",)),
+    ("Sindhi", "sd", ()),
+    ("Sinhalese", "si", ("Sinhala",)),
+    ("Slovak", "sk", ()),
+    ("Slovenian", "sl", ()),
+    ("Somali", "so", ()),
+    ("Southern Ndebele", "nr", ()),
+    ("Southern Sotho", "st", ("Sesotho",)),
+    ("Spanish", "es", ()),
+    ("Sundanese", "su", ()),
+    ("Swahili", "sw", ("Kiswahili",)),
+    ("Swati", "ss", ("Siswati",)),
+    ("Swedish", "sv", ()),
+    ("Tagalog", "tl", ()),
+    ("Tahitian", "ty", ()),
+    ("Tajik", "tg", ()),
+    ("Tamil", "ta", ()),
+    ("Tatar", "tt", ()),
+    ("Telugu", "te", ()),
+    ("Thai", "th", ()),
+    ("Tibetan", "bo", ()),
+    ("Tigrinya", "ti", ()),
+    ("Tonga", "to", ()),
+    ("Tsonga", "ts", ()),
+    ("Tswana", "tn", ("Setswana",)),
+    ("Turkish", "tr", ()),
+    ("Turkmen", "tk", ()),
+    ("Twi", "tw", ()),
+    ("Ukrainian", "uk", ()),
+    ("Urdu", "ur", ()),
+    ("Uyghur", "ug", ()),
+    ("Uzbek", "uz", ()),
+    ("Venda", "ve", ()),
+    ("Vietnamese", "vi", ()),
+    ("Volapük", "vo", ("Volapuk",)),
+    ("Walloon", "wa", ("Wallon",)),
+    ("Welsh", "cy", ()),
+    ("Western Frisian", "fy", ("Frisian",)),
+    ("Wolof", "wo", ()),
+    ("Xhosa", "xh", ()),
+    ("Yiddish", "yi", ("ji",)),
+    ("Yoruba", "yo", ()),
+    ("Zhuang", "za", ("Chuang",)),
+    ("Zulu", "zu", ()),
+)
+
+
+def _build_index():
+    """Builds the frozen lookup tables once, at import"""
+    names = {}
+    by_key = {}
+    by_code = {}
+    for name, code, aliases in _LANGUAGE_TABLE:
+        names[name] = code
+        by_code[code.casefold()] = name
+        # Canonical names and codes win over aliases that collide with them
+        by_key.setdefault(name.casefold(), code)
+        by_key.setdefault(code.casefold(), code)
+    for name, code, aliases in _LANGUAGE_TABLE:
+        for alias in aliases:
+            by_key.setdefault(alias.casefold(), code)
+    return MappingProxyType(names), MappingProxyType(by_key), MappingProxyType(by_code)
+
+
+# LANGUAGE_INDEX maps casefolded names, aliases and codes to codes, LANGUAGE_NAMES casefolded codes to names
+_NAMES, LANGUAGE_INDEX, LANGUAGE_NAMES = _build_index()
+# {"langs": {name: code}}, kept in its original shape for existing callers
+LANGUAGES: Mapping[str, Mapping[str, str]] = MappingProxyType({"langs": _NAMES})
+
+
+def normalize_tag(tag: str) -> str:
+    """
+    Returns a language tag in BCP-47 casing: "EN_us" -> "en-US", "zh-hant-tw" -> "zh-Hant-TW"
+    """
+    subtags = tag.strip().replace("_", "-").split("-")
+    normalized = [subtags[0].lower()]
+    for subtag in subtags[1:]:
+        if len(subtag) == 4 and subtag.isalpha():
+            normalized.append(subtag.title())
+        elif len(subtag) == 2 or (len(subtag) == 3 and subtag.isdigit()):
+            normalized.append(subtag.upper())
+        else:
+            normalized.append(subtag.lower())
+    return "-".join(normalized)
+
+
+@lru_cache(maxsize=256)
+def language_code(language: str) -> str:
+    """
+    Returns the BCP-47 code for a language name, alias or code, case-insensitive
+    Tags with a region or script ("es-MX", "pt_br") are accepted when their language is known
+    Raises KeyError for unknown languages
+    """
+    code = LANGUAGE_INDEX.get(language.strip().casefold())
+    if code is not None:
+        return code
+
+    tag = normalize_tag(language)
+    primary = tag.split("-")[0]
+    if primary.casefold() in LANGUAGE_INDEX and "-" in tag:
+        return LANGUAGE_INDEX[primary.casefold()] + tag[len(primary):]
+    raise KeyError(f"Language '{language}' not found in configuration")
+
+
+def language_name(code: str) -> str:
+    """Returns the language name for a code, case-insensitive ("ZH-hant" -> "Chinese (Traditional)")"""
+    name = LANGUAGE_NAMES.get(code.strip().replace("_", "-").casefold())
+    if name is None:
+        raise KeyError(f"Language code '{code}' not found in configuration")
+    return name
+
+
+@lru_cache(maxsize=256)
+def accept_languages(language: str) -> Tuple[str, ...]:
+    """
+    Returns the accept-language list for a language name, alias or code:
+    the most specific tag first, then each less specific fallback
+    "Chinese (Traditional)" -> ("zh-Hant", "zh"), "es-MX" -> ("es-MX", "es"), "English" -> ("en",)
+    """
+    subtags = language_code(language).split("-")
+    return tuple("-".join(subtags[:end]) for end in range(len(subtags), 0, -1))
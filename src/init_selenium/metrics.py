@@ -0,0 +1,209 @@
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Optional, Dict, Callable, List, Iterator, Any
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds, used for the Prometheus export
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+TimingCallback = Callable[[str, Dict[str, float]], None]
+
+
+class Histogram:
+    """Cumulative bucket counts plus a bounded window of recent samples for percentiles"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window: int = 10000):
+        self.buckets = tuple(sorted(buckets))
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            self.samples.append(value)
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                self.bucket_counts[index] += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Returns the q-th percentile (0-100) of the recent samples, None if there are none"""
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        rank = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+        return ordered[rank]
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class HostLatencies:
+    """
+    How long waits take to succeed on each host, shared by the waits of every session of a DriverInit
+    Learned timeouts are the p95 times `headroom`, never below a wait's own timeout
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 5, headroom: float = 3.0):
+        self.window = window
+        self.min_samples = min_samples
+        self.headroom = headroom
+        self.hosts: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, host: str, seconds: float):
+        with self._lock:
+            histogram = self.hosts.get(host)
+            if histogram is None:
+                histogram = self.hosts[host] = Histogram(window=self.window)
+        histogram.observe(seconds)
+
+    def timeout_for(self, host: str, timeout: float, max_timeout: float) -> float:
+        histogram = self.hosts.get(host)
+        if histogram is None or histogram.count < self.min_samples:
+            return timeout
+        return min(max(histogram.percentile(95) * self.headroom, timeout), max_timeout)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Latencies are learned per process, only the settings are pickled
+        return {"window": self.window, "min_samples": self.min_samples, "headroom": self.headroom}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__init__(**state)
+
+
+class LaunchTimer:
+    """Collects per-stage timings for a single launch or navigation"""
+
+    def __init__(self, metrics: "DriverMetrics", kind: str):
+        self.metrics = metrics
+        self.kind = kind
+        self.timings: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self) -> Dict[str, float]:
+        self.timings["total"] = time.perf_counter() - self._start
+        self.metrics.record(self.kind, self.timings)
+        return self.timings
+
+
+class NullTimer:
+    """Stand-in for LaunchTimer when no metrics are configured"""
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        yield
+
+    def finish(self) -> Dict[str, float]:
+        return {}
+
+
+class DriverMetrics:
+    """
+    Timing registry for DriverInit launches and driver.get navigations
+    Every record is kept in a histogram per (kind, stage) and optionally
+    forwarded to a callback as callback(kind, {stage: seconds})
+    """
+
+    def __init__(self,
+                 callback: Optional[TimingCallback] = None,
+                 buckets=DEFAULT_BUCKETS,
+                 window: int = 10000,
+                 prefix: str = "init_selenium"
+                 ):
+        self.callback = callback
+        self.buckets = buckets
+        self.window = window
+        self.prefix = prefix
+        self.histograms: Dict[str, Dict[str, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def timer(self, kind: str) -> LaunchTimer:
+        return LaunchTimer(self, kind)
+
+    def _histogram(self, kind: str, stage: str) -> Histogram:
+        with self._lock:
+            stages = self.histograms.setdefault(kind, {})
+            if stage not in stages:
+                stages[stage] = Histogram(self.buckets, self.window)
+            return stages[stage]
+
+    def record(self, kind: str, timings: Dict[str, float]):
+        for stage, seconds in timings.items():
+            self._histogram(kind, stage).observe(seconds)
+
+        if self.callback:
+            try:
+                self.callback(kind, dict(timings))
+            except Exception as e:
+                logger.warning(f"Metrics callback failed: {e}")
+
+    def instrument(self, driver):
+        """Wraps driver.get on this instance so every navigation is timed"""
+        original_get = driver.get
+
+        @wraps(original_get)
+        def timed_get(url: str):
+            timer = self.timer("navigation")
+            with timer.stage("get"):
+                original_get(url)
+            timer.finish()
+
+        driver.get = timed_get
+        return driver
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, Optional[float]]]]:
+        """Returns {kind: {stage: {count, sum, mean, p50, p95, p99}}}"""
+        with self._lock:
+            snapshot = {kind: dict(stages) for kind, stages in self.histograms.items()}
+        return {
+            kind: {stage: histogram.summary() for stage, histogram in stages.items()}
+            for kind, stages in snapshot.items()
+        }
+
+    def to_prometheus(self) -> str:
+        """Dumps every histogram in the Prometheus text exposition format"""
+        name = f"{self.prefix}_stage_seconds"
+        lines: List[str] = [
+            f"# HELP {name} Time spent per launch and navigation stage",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            snapshot = {kind: dict(stages) for kind, stages in self.histograms.items()}
+
+        for kind, stages in sorted(snapshot.items()):
+            for stage, histogram in sorted(stages.items()):
+                labels = f'kind="{kind}",stage="{stage}"'
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, histogram.bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
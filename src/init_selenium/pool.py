@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Tuple, Iterator, List, Set, TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import WebDriverException
+
+from init_selenium.init_driver import DriverInit
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from selenium.webdriver.support.ui import WebDriverWait
+
+
+logger = logging.getLogger(__name__)
+
+BLANK_PAGE = "about:blank"
+
+
+class PooledDriver:
+    """A warm (driver, wait) pair owned by a DriverPool, with its usage bookkeeping"""
+
+    def __init__(self, driver: webdriver.Chrome, wait: WebDriverWait):
+        self.driver = driver
+        self.wait = wait
+        self.created_at = time.monotonic()
+        self.uses = 0
+
+    @property
+    def age(self) -> float:
+        """Seconds elapsed since the driver was launched"""
+        return time.monotonic() - self.created_at
+
+
+class DriverPool:
+    """
+    Keeps N warm (WebDriver, WebDriverWait) pairs created through a DriverInit.
+    Drivers are leased with a context manager, reset on checkin and recycled
+    after `max_uses` leases or `max_age` seconds. Missing drivers are launched
+    by a background thread so checkout does not wait for a cold start.
+    Drivers over the DriverInit max_rss memory limit are recycled on checkin.
+    """
+
+    def __init__(self,
+                 initializer: DriverInit,
+                 size: int = 2,
+                 max_uses: Optional[int] = 50,
+                 max_age: Optional[float] = 30 * 60,
+                 checkout_timeout: Optional[float] = None,
+                 **create_driver_kwargs
+                 ):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+
+        self.initializer = initializer
+        self.size = size
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.checkout_timeout = checkout_timeout
+        self.create_driver_kwargs = create_driver_kwargs
+
+        self._idle: List[PooledDriver] = []
+        self._live = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._refill_needed = threading.Event()
+        self._refill_needed.set()
+        self._refiller = threading.Thread(target=self._refill_loop, name="DriverPool-refill", daemon=True)
+        self._refiller.start()
+
+    def __enter__(self) -> "DriverPool":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _launch(self) -> PooledDriver:
+        driver, wait = self.initializer.create_driver(**self.create_driver_kwargs)
+        return PooledDriver(driver, wait)
+
+    def _refill_loop(self):
+        """Background loop that launches drivers until the pool is back to `size`"""
+        while True:
+            self._refill_needed.wait()
+            with self._cond:
+                if self._closed:
+                    return
+                if self._live >= self.size:
+                    self._refill_needed.clear()
+                    continue
+                self._live += 1
+
+            try:
+                item = self._launch()
+            except Exception as e:
+                logger.error(f"Failed to launch pooled driver: {e}")
+                with self._cond:
+                    self._live -= 1
+                # Avoid hammering the machine when launches keep failing
+                time.sleep(1)
+                continue
+
+            with self._cond:
+                if self._closed:
+                    self._live -= 1
+                    self._quit(item)
+                    return
+                self._idle.append(item)
+                self._cond.notify()
+
+    def _expired(self, item: PooledDriver) -> bool:
+        if self.max_uses is not None and item.uses >= self.max_uses:
+            return True
+        if self.max_age is not None and item.age >= self.max_age:
+            return True
+        return False
+
+    @staticmethod
+    def _quit(item: PooledDriver):
+        try:
+            item.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting pooled driver: {e}")
+
+    def _discard(self, item: PooledDriver):
+        """Quits a driver and asks the refill thread for a replacement"""
+        self._quit(item)
+        with self._cond:
+            self._live -= 1
+        self._refill_needed.set()
+
+    @staticmethod
+    def _visited_origins(driver: webdriver.Chrome) -> Set[str]:
+        """Web origins in the navigation history of the current tab, empty without CDP"""
+        try:
+            history = driver.execute_cdp_cmd("Page.getNavigationHistory", {})
+        except (WebDriverException, AttributeError):
+            return set()
+        origins = set()
+        for entry in history.get("entries", []):
+            parts = urlsplit(entry.get("url", ""))
+            if parts.scheme in ("http", "https") and parts.netloc:
+                origins.add(f"{parts.scheme}://{parts.netloc.rpartition('@')[2]}")
+        return origins
+
+    @staticmethod
+    def reset_driver(driver: webdriver.Chrome):
+        """
+        Clears cookies and storage, closes every tab but one and
+        navigates the remaining tab to about:blank
+        Chromium has no wildcard for storage, so it is cleared for every origin in the
+        history of the lease's tabs and every domain holding a cookie
+        """
+        origins = set()
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            origins |= DriverPool._visited_origins(driver)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        origins |= DriverPool._visited_origins(driver)
+
+        try:
+            # Third-party frames leave no history entry, but their cookies name their site
+            for cookie in driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", []):
+                domain = cookie.get("domain", "").lstrip(".")
+                if domain:
+                    origins.update((f"https://{domain}", f"http://{domain}"))
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            for origin in sorted(origins):
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        except (WebDriverException, AttributeError):
+            # Not a Chromium driver: fall back to the current-domain WebDriver calls
+            driver.delete_all_cookies()
+            try:
+                driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            except WebDriverException:
+                pass
+
+        driver.get(BLANK_PAGE)
+        try:
+            # The next lease only clears what it visited itself
+            driver.execute_cdp_cmd("Page.resetNavigationHistory", {})
+        except (WebDriverException, AttributeError):
+            pass
+
+    def checkout(self, timeout: Optional[float] = None) -> PooledDriver:
+        """
+        Takes a warm driver out of the pool, blocking until one is available
+        Raises TimeoutError if none becomes available within `timeout` seconds
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._cond:
+                while not self._idle:
+                    if self._closed:
+                        raise RuntimeError("DriverPool is closed")
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a pooled driver")
+                    self._cond.wait(remaining)
+                item = self._idle.pop()
+
+            if self._expired(item):
+                logger.info("Recycling expired pooled driver")
+                self._discard(item)
+                continue
+
+            item.uses += 1
+            return item
+
+    def checkin(self, item: PooledDriver, healthy: bool = True):
+        """Resets a leased driver and returns it to the pool, or recycles it if it is broken, expired or bloated"""
+        if healthy and not self._closed and not self._expired(item):
+            try:
+                # Renderer memory only grows over a session's life, recycle before the host runs out
+                if self.initializer.over_memory_limit(item.driver):
+                    logger.info("Recycling pooled driver over the memory limit")
+                    healthy = False
+                else:
+                    self.reset_driver(item.driver)
+            except Exception as e:
+                logger.warning(f"Failed to reset pooled driver, recycling it: {e}")
+                healthy = False
+        else:
+            healthy = False
+
+        if not healthy:
+            self._discard(item)
+            return
+
+        with self._cond:
+            self._idle.append(item)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[Tuple[webdriver.Chrome, WebDriverWait]]:
+        """
+        Context manager that yields a (WebDriver, WebDriverWait) pair from the pool
+        The driver is reset and returned to the pool when the block exits
+        """
+        item = self.checkout(timeout)
+        healthy = True
+        try:
+            yield item.driver, item.wait
+        except WebDriverException:
+            # The browser may be in an unknown state after a WebDriver failure
+            healthy = False
+            raise
+        finally:
+            self.checkin(item, healthy=healthy)
+
+    def close(self):
+        """Quits every idle driver and stops the refill thread. Leased drivers are quit on checkin"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+            self._cond.notify_all()
+        self._refill_needed.set()
+
+        for item in idle:
+            self._quit(item)
+        logger.info("DriverPool closed")
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Optional, Dict, List, TYPE_CHECKING
+
+from init_selenium.cache import CACHE_DIR
+
+if TYPE_CHECKING:
+    import psutil
+    from selenium import webdriver
+
+
+logger = logging.getLogger(__name__)
+
+PIDS_DIR = os.path.join(CACHE_DIR, "pids")
+
+
+def _psutil():
+    """Imports psutil, which is only needed for process accounting"""
+    try:
+        import psutil
+    except ImportError:
+        raise ImportError("Process tracking requires psutil: pip install 'init-selenium[monitor]'")
+    return psutil
+
+
+class TrackedSession:
+    """Process tree of one driver: chromedriver, the browser and their children"""
+
+    def __init__(self, driver: webdriver.Chrome, root_pids: List[int]):
+        self.driver = driver
+        self.root_pids = root_pids
+        self.started = time.monotonic()
+        # pid -> create_time, used to tell our processes from recycled PIDs
+        self.known: Dict[int, float] = {}
+
+    def processes(self) -> List["psutil.Process"]:
+        """Returns the live processes of this session and remembers every PID seen"""
+        psutil = _psutil()
+        found = {}
+        for pid in self.root_pids:
+            try:
+                root = psutil.Process(pid)
+                for process in [root] + root.children(recursive=True):
+                    found[process.pid] = process
+            except psutil.Error:
+                continue
+
+        for pid, process in found.items():
+            try:
+                self.known.setdefault(pid, process.create_time())
+            except psutil.Error:
+                pass
+        return list(found.values())
+
+
+class SessionTracker:
+    """
+    Tracks the chromedriver and Chrome processes of every session a DriverInit launches
+    Samples RSS/CPU per session, records PIDs on disk so processes left behind by a crashed
+    worker can be reaped later, and kills whatever is still running on close
+    """
+
+    def __init__(self, pids_dir: str = PIDS_DIR, reap_on_start: bool = True):
+        self.pids_dir = pids_dir
+        # One file per tracker, several DriverInits in a process each have their own
+        self.pid_file = os.path.join(pids_dir, f"{os.getpid()}-{uuid.uuid4().hex}.json")
+        self.sessions: Dict[int, TrackedSession] = {}
+        self._lock = threading.Lock()
+        os.makedirs(pids_dir, exist_ok=True)
+
+        if reap_on_start:
+            self.reap_orphans()
+        atexit.register(self.close)
+
+    @staticmethod
+    def _root_pids(driver: webdriver.Chrome) -> List[int]:
+        pids = []
+        service = getattr(driver, "service", None)
+        if service is not None and getattr(service, "process", None):
+            pids.append(service.process.pid)
+        # undetected_chromedriver launches the browser itself
+        browser_pid = getattr(driver, "browser_pid", None)
+        if browser_pid:
+            pids.append(browser_pid)
+        return pids
+
+    def register(self, driver: webdriver.Chrome) -> TrackedSession:
+        session = TrackedSession(driver, self._root_pids(driver))
+        session.processes()
+        with self._lock:
+            self.sessions[id(driver)] = session
+        self._save()
+        return session
+
+    def unregister(self, driver: webdriver.Chrome, kill: bool = True):
+        """Stops tracking a driver, killing whatever quit left running unless kill=False"""
+        with self._lock:
+            session = self.sessions.pop(id(driver), None)
+        if session is not None and kill:
+            session.processes()
+            killed = self._kill(session.known)
+            if killed:
+                logger.info(f"Killed {killed} processes left running after quit")
+        self._save()
+
+    def session(self, driver: webdriver.Chrome) -> Optional[TrackedSession]:
+        with self._lock:
+            return self.sessions.get(id(driver))
+
+    def sample(self, driver: webdriver.Chrome, cpu_interval: Optional[float] = None) -> Dict[str, float]:
+        """
+        Returns {"rss": bytes, "cpu_percent": percent, "processes": count} for a session
+        CPU is measured since the previous sample unless cpu_interval is given
+        """
+        psutil = _psutil()
+        session = self.session(driver)
+        if session is None:
+            raise KeyError("Driver is not tracked")
+
+        rss, cpu, count = 0, 0.0, 0
+        for process in session.processes():
+            try:
+                rss += process.memory_info().rss
+                cpu += process.cpu_percent(cpu_interval)
+                count += 1
+            except psutil.Error:
+                continue
+        self._save()
+        return {"rss": rss, "cpu_percent": cpu, "processes": count}
+
+    def over_limit(self, driver: webdriver.Chrome, max_rss: int) -> bool:
+        """True if the session's process tree uses more than max_rss bytes"""
+        rss = self.sample(driver)["rss"]
+        if rss > max_rss:
+            logger.info(f"Session over memory limit: {rss / 2 ** 20:.0f} MB > {max_rss / 2 ** 20:.0f} MB")
+            return True
+        return False
+
+    def _save(self):
+        """Writes every known PID of this tracker's sessions to its PID file"""
+        with self._lock:
+            known = {pid: created for session in self.sessions.values() for pid, created in session.known.items()}
+            tmp_path = f"{self.pid_file}.tmp"
+            with open(tmp_path, "w") as pid_file:
+                json.dump({str(pid): created for pid, created in known.items()}, pid_file)
+            os.replace(tmp_path, self.pid_file)
+
+    @staticmethod
+    def _kill(processes: Dict[int, float]) -> int:
+        """Kills processes whose create_time still matches. Returns number of killed processes"""
+        psutil = _psutil()
+        victims = []
+        for pid, created in processes.items():
+            try:
+                process = psutil.Process(pid)
+                if abs(process.create_time() - created) < 1:
+                    victims.append(process)
+            except psutil.Error:
+                continue
+
+        for process in victims:
+            try:
+                process.kill()
+            except psutil.Error:
+                pass
+        psutil.wait_procs(victims, timeout=5)
+        return len(victims)
+
+    def reap_orphans(self) -> int:
+        """
+        Kills the processes recorded by trackers whose owner process is gone
+        Returns number of killed processes
+        """
+        psutil = _psutil()
+        killed = 0
+        for name in os.listdir(self.pids_dir):
+            if not name.endswith(".json"):
+                continue
+            # "<owner pid>-<tracker id>.json"
+            try:
+                owner = int(name[:-len(".json")].split("-", 1)[0])
+            except ValueError:
+                continue
+            if owner == os.getpid() or psutil.pid_exists(owner):
+                continue
+
+            path = os.path.join(self.pids_dir, name)
+            try:
+                with open(path) as pid_file:
+                    recorded = {int(pid): created for pid, created in json.load(pid_file).items()}
+            except (OSError, ValueError):
+                recorded = {}
+            killed += self._kill(recorded)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        if killed:
+            logger.info(f"Reaped {killed} orphaned chrome/chromedriver processes")
+        return killed
+
+    def close(self):
+        """Kills every process still running from the tracked sessions and removes the PID file"""
+        with self._lock:
+            sessions, self.sessions = list(self.sessions.values()), {}
+        known: Dict[int, float] = {}
+        for session in sessions:
+            session.processes()
+            known.update(session.known)
+        if known:
+            killed = self._kill(known)
+            if killed:
+                logger.info(f"Killed {killed} leftover chrome/chromedriver processes")
+        try:
+            os.remove(self.pid_file)
+        except OSError:
+            pass
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass, fields, asdict, replace
+from functools import cached_property, lru_cache
+from typing import Optional, Tuple, Dict, Iterable, List, Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from selenium.webdriver.chrome.options import Options
+
+
+logger = logging.getLogger(__name__)
+
+# Constants for window sizes and language preferences
+WINDOW_MIN = "min"
+WINDOW_MAX = "max"
+# Headless launch tuned for throughput on servers and containers
+WINDOW_FAST = "fast"
+SPANISH = ("es-ES", "es")
+ENGLISH_USA = ("en", "en_US")
+
+# Resource categories accepted by create_driver(block_resources=...)
+BLOCK_IMAGES = "images"
+BLOCK_FONTS = "fonts"
+BLOCK_MEDIA = "media"
+BLOCK_STYLESHEETS = "stylesheets"
+BLOCK_ADS = "ads"
+
+# Page load strategies accepted by create_driver(page_load_strategy=...)
+PAGE_LOAD_NORMAL = "normal"
+PAGE_LOAD_EAGER = "eager"
+PAGE_LOAD_NONE = "none"
+
+RESOURCE_EXTENSIONS = {
+    BLOCK_IMAGES: ("png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp"),
+    BLOCK_FONTS: ("woff", "woff2", "ttf", "otf", "eot"),
+    BLOCK_MEDIA: ("mp4", "webm", "mp3", "ogg", "wav", "m4a", "mov", "avi", "m3u8"),
+    BLOCK_STYLESHEETS: ("css",),
+}
+
+# Common ad and analytics hosts blocked by BLOCK_ADS
+AD_HOST_PATTERNS = (
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*googleadservices.com*",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*googletagservices.com*",
+    "*adservice.google.*",
+    "*facebook.net*",
+    "*connect.facebook.com*",
+    "*scorecardresearch.com*",
+    "*hotjar.com*",
+    "*criteo.com*",
+    "*taboola.com*",
+    "*outbrain.com*",
+    "*amazon-adsystem.com*",
+)
+
+# Basic security and performance options
+CHROME_ARGUMENTS = (
+    "--disable-extensions",
+    "--disable-notifications",
+    "--ignore-certificate-errors",
+    "--log-level=3",
+    "--allow-running-insecure-content",
+    "--no-default-browser-check",
+    "--no-first-run",
+)
+
+# Fixed viewport of WINDOW_FAST launches, small enough to keep raster and layout cheap
+FAST_VIEWPORT = (1280, 720)
+
+# WINDOW_FAST: new headless mode without the subsystems a scraper never uses
+FAST_ARGUMENTS = (
+    "--headless=new",
+    "--disable-gpu",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--disable-features=Translate",
+    # /dev/shm is 64 MB in most containers, Chrome crashes tabs once it fills up
+    "--disable-dev-shm-usage",
+    "--hide-scrollbars",
+    "--mute-audio",
+    f"--window-size={FAST_VIEWPORT[0]},{FAST_VIEWPORT[1]}",
+)
+
+EXCLUDED_SWITCHES = (
+    "enable-automation",
+    "ignore-certificate-errors",
+    "enable-logging",
+)
+
+
+def blocked_url_patterns(block_resources: Iterable[str]) -> List[str]:
+    """
+    Expands resource categories (BLOCK_IMAGES, BLOCK_FONTS, ...) into URL patterns
+    Entries that are not a known category are used as URL patterns as they are
+    """
+    patterns = []
+    for entry in block_resources:
+        if entry in RESOURCE_EXTENSIONS:
+            for extension in RESOURCE_EXTENSIONS[entry]:
+                patterns += [f"*.{extension}", f"*.{extension}?*"]
+        elif entry == BLOCK_ADS:
+            patterns += AD_HOST_PATTERNS
+        else:
+            patterns.append(entry)
+    # Keep order but drop duplicates
+    return list(dict.fromkeys(patterns))
+
+
+@dataclass(frozen=True)
+class LaunchProfile:
+    """
+    Immutable, hashable set of browser launch options
+    Validation and the Chrome arguments, prefs and blocked URL lists are computed
+    once per profile, so launching many identical sessions skips that work.
+    Profiles can be pickled or serialised to JSON and compared with diff().
+    """
+
+    window_size: str = WINDOW_MAX
+    window_position: Tuple[int, int] = (0, 0)
+    sandbox_enabled: bool = True
+    wait_time: int = 20
+    notification_level: int = 2
+    save_passwords: bool = False
+    camouflage: bool = True
+    web_security: bool = False
+    undetectable: bool = False
+    block_resources: Tuple[str, ...] = ()
+    page_load_strategy: Optional[str] = None
+    user_agent: Optional[str] = None
+    language: Tuple[str, ...] = ENGLISH_USA
+    proxy_server: Optional[str] = None
+
+    def __post_init__(self):
+        # Normalise sequences to tuples so the profile stays hashable
+        object.__setattr__(self, "window_position", tuple(self.window_position))
+        object.__setattr__(self, "block_resources", tuple(self.block_resources or ()))
+        object.__setattr__(self, "language", tuple(self.language))
+
+        # Validate notification level
+        if self.notification_level not in [0, 1, 2]:
+            logger.error(f"Invalid notification level: {self.notification_level}")
+            raise ValueError("Notification level must be 0, 1, or 2")
+
+        if self.page_load_strategy not in [None, PAGE_LOAD_NORMAL, PAGE_LOAD_EAGER, PAGE_LOAD_NONE]:
+            logger.error(f"Invalid page load strategy: {self.page_load_strategy}")
+            raise ValueError("Page load strategy must be 'normal', 'eager' or 'none'")
+
+        # Parses the window size up front so invalid values fail on creation
+        _ = self.window_dimensions
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def cached(**kwargs) -> "LaunchProfile":
+        """Returns a shared profile for these options, building it only on the first call"""
+        return LaunchProfile(**kwargs)
+
+    @cached_property
+    def window_dimensions(self) -> Tuple[Optional[int], Optional[int]]:
+        if self.window_size in [WINDOW_MAX, WINDOW_MIN, WINDOW_FAST] or "x" not in self.window_size:
+            return None, None
+        try:
+            width, height = map(int, self.window_size.split("x"))
+        except ValueError:
+            logger.error(f"Invalid window size format: {self.window_size}")
+            raise ValueError("Window size must be 'max', 'min', 'fast' or 'WIDTHxHEIGHT'")
+        return width, height
+
+    @cached_property
+    def arguments(self) -> Tuple[str, ...]:
+        """Chrome command line arguments for this profile"""
+        arguments = []
+
+        # Configure window size
+        if self.window_size == WINDOW_MAX:
+            arguments.append("--start-maximized")
+        elif self.window_size == WINDOW_MIN:
+            arguments.append("--headless")
+        elif self.window_size == WINDOW_FAST:
+            arguments += FAST_ARGUMENTS
+
+        if self.user_agent:
+            arguments.append(f"user-agent={self.user_agent}")
+
+        if not self.web_security:
+            arguments.append("--disable-web-security")
+        if not self.sandbox_enabled:
+            arguments.append("--no-sandbox")
+
+        arguments += CHROME_ARGUMENTS
+
+        if self.proxy_server:
+            arguments.append(f"--proxy-server={self.proxy_server}")
+            # Chrome sends loopback hosts direct by default, local sites go through the proxy too
+            arguments.append("--proxy-bypass-list=<-loopback>")
+        else:
+            arguments.append("--no-proxy-server")
+
+        # Anti-detection measures
+        if self.camouflage:
+            arguments.append("--disable-blink-features=AutomationControlled")
+        return tuple(arguments)
+
+    @cached_property
+    def prefs(self) -> Dict[str, Any]:
+        """Browser preferences, only applied to plain (not undetectable) drivers"""
+        prefs = {
+            "profile.default_content_setting_values.notifications": self.notification_level,
+            "intl.accept_languages": list(self.language),
+            "credentials_enable_service": self.save_passwords
+        }
+        if BLOCK_IMAGES in self.block_resources:
+            prefs["profile.managed_default_content_settings.images"] = 2
+        return prefs
+
+    @cached_property
+    def blocked_urls(self) -> Tuple[str, ...]:
+        return tuple(blocked_url_patterns(self.block_resources))
+
+    def build_options(self) -> Options:
+        """Returns a new Options object for this profile. Options are mutable, so one is built per launch"""
+        from selenium.webdriver.chrome.options import Options
+
+        options = Options()
+        for arg in self.arguments:
+            options.add_argument(arg)
+
+        if self.page_load_strategy:
+            options.page_load_strategy = self.page_load_strategy
+
+        if not self.undetectable:
+            options.add_experimental_option("excludeSwitches", list(EXCLUDED_SWITCHES))
+            options.add_experimental_option("prefs", dict(self.prefs))
+        return options
+
+    def replace(self, **changes) -> "LaunchProfile":
+        """Returns a copy of this profile with some options changed"""
+        return replace(self, **changes)
+
+    def diff(self, other: "LaunchProfile") -> Dict[str, Tuple[Any, Any]]:
+        """Returns {option: (this value, other value)} for every option that differs"""
+        return {
+            field.name: (getattr(self, field.name), getattr(other, field.name))
+            for field in fields(self)
+            if getattr(self, field.name) != getattr(other, field.name)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LaunchProfile":
+        return cls(**data)
+
+    @classmethod
+    def from_json(cls, data: str) -> "LaunchProfile":
+        return cls.from_dict(json.loads(data))
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Only the options are pickled, compiled values are rebuilt on demand
+        return self.to_dict()
+
+    def __setstate__(self, state: Dict[str, Any]):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
@@ -0,0 +1,171 @@
+import logging
+import os
+import sys
+import threading
+import time
+from functools import wraps
+from typing import Optional, Dict, List, Tuple, Any
+
+from init_selenium.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Frames from these files and packages are wrappers or library internals, never reported as call sites
+_INTERNAL_FILES = tuple(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name) for name in ("profiler.py", "metrics.py")
+)
+_LIBRARY_PACKAGES = ("selenium", "undetected_chromedriver")
+
+SORT_KEYS = ("total", "count", "mean", "max")
+
+
+def _is_internal(filename: str) -> bool:
+    if filename.startswith(_INTERNAL_FILES):
+        return True
+    parts = filename.replace("\\", "/").split("/")
+    return any(package in parts for package in _LIBRARY_PACKAGES)
+
+
+class CommandStats:
+    """Count and latency of one command, overall or from one call site"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class CommandProfiler:
+    """
+    Times every WebDriver command a driver sends through its remote connection
+    Latency is aggregated per command (with percentiles), per (command, call site)
+    and per call stack, and exported as a top-N report or folded stacks for flame graphs.
+    Attach it with DriverInit(profiler=...) or profiler.attach(driver).
+    """
+
+    def __init__(self, stack_depth: int = 8, window: int = 10000):
+        self.stack_depth = stack_depth
+        self.window = window
+        self.commands: Dict[str, Histogram] = {}
+        self.sites: Dict[Tuple[str, str], CommandStats] = {}
+        self.stacks: Dict[Tuple[str, ...], CommandStats] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def command_name(driver_command: str, params: Optional[Dict[str, Any]]) -> str:
+        """CDP commands are reported by their CDP method, e.g. executeCdpCommand:Network.setCookies"""
+        if params and driver_command in ("executeCdpCommand", "executeCdp") and "cmd" in params:
+            return f"{driver_command}:{params['cmd']}"
+        return driver_command
+
+    def _caller_stack(self) -> Tuple[Tuple[str, ...], str]:
+        """
+        Returns (stack, call site): the innermost stack_depth functions outside selenium and this
+        module, outermost first, and the file:line of the innermost one
+        """
+        frames = []
+        site = "<unknown>"
+        frame = sys._getframe(1)
+        while frame is not None and len(frames) < self.stack_depth:
+            code = frame.f_code
+            if not _is_internal(code.co_filename):
+                filename = os.path.basename(code.co_filename)
+                if not frames:
+                    site = f"{code.co_name} ({filename}:{frame.f_lineno})"
+                frames.append(f"{code.co_name} ({filename})")
+            frame = frame.f_back
+        return tuple(reversed(frames)), site
+
+    def record(self, command: str, seconds: float, stack: Tuple[str, ...] = (), site: str = "<unknown>"):
+        with self._lock:
+            histogram = self.commands.get(command)
+            if histogram is None:
+                histogram = self.commands[command] = Histogram(window=self.window)
+            self.sites.setdefault((command, site), CommandStats()).observe(seconds)
+            self.stacks.setdefault(stack + (command,), CommandStats()).observe(seconds)
+        histogram.observe(seconds)
+
+    def attach(self, driver):
+        """Wraps driver.command_executor.execute on this instance so every command is timed"""
+        executor = driver.command_executor
+        original_execute = executor.execute
+
+        @wraps(original_execute)
+        def timed_execute(driver_command: str, params: Optional[Dict[str, Any]] = None):
+            stack, site = self._caller_stack()
+            start = time.perf_counter()
+            try:
+                return original_execute(driver_command, params)
+            finally:
+                self.record(self.command_name(driver_command, params), time.perf_counter() - start, stack, site)
+
+        executor.execute = timed_execute
+        return driver
+
+    def reset(self):
+        with self._lock:
+            self.commands.clear()
+            self.sites.clear()
+            self.stacks.clear()
+
+    def top(self, n: int = 20, by: str = "total", per_site: bool = False) -> List[Dict[str, Any]]:
+        """
+        Returns the n most expensive commands (or command/call site pairs) sorted by
+        "total", "count", "mean" or "max", as dicts with count, total, mean and max seconds
+        """
+        if by not in SORT_KEYS:
+            raise ValueError(f"by must be one of {', '.join(SORT_KEYS)}")
+
+        rows = []
+        with self._lock:
+            if per_site:
+                for (command, site), stats in self.sites.items():
+                    rows.append({"command": command, "site": site, "count": stats.count,
+                                 "total": stats.total, "mean": stats.mean, "max": stats.max})
+            else:
+                for command, histogram in self.commands.items():
+                    summary = histogram.summary()
+                    rows.append({"command": command, "count": summary["count"], "total": summary["sum"],
+                                 "mean": summary["mean"], "max": max(histogram.samples, default=0.0),
+                                 "p50": summary["p50"], "p95": summary["p95"]})
+        rows.sort(key=lambda row: row[by], reverse=True)
+        return rows[:n]
+
+    def report(self, n: int = 20, by: str = "total") -> str:
+        """Human readable top-n tables, per command and per call site"""
+        lines = [f"{'command':<44} {'count':>7} {'total s':>9} {'mean ms':>9} {'p95 ms':>8}"]
+        for row in self.top(n, by):
+            lines.append(f"{row['command'][:44]:<44} {row['count']:>7} {row['total']:>9.3f} "
+                         f"{row['mean'] * 1000:>9.2f} {(row['p95'] or 0) * 1000:>8.2f}")
+        lines.append("")
+        lines.append(f"{'command':<32} {'call site':<48} {'count':>7} {'total s':>9} {'mean ms':>9}")
+        for row in self.top(n, by, per_site=True):
+            lines.append(f"{row['command'][:32]:<32} {row['site'][:48]:<48} {row['count']:>7} "
+                         f"{row['total']:>9.3f} {row['mean'] * 1000:>9.2f}")
+        return "\n".join(lines)
+
+    def folded(self) -> str:
+        """
+        Folded stacks ("frame;frame;command microseconds" per line) for flamegraph.pl,
+        speedscope or inferno, weighted by time spent waiting on the driver
+        """
+        with self._lock:
+            items = sorted(self.stacks.items())
+        return "\n".join(
+            f"{';'.join(frame.replace(';', ':') for frame in stack)} {int(stats.total * 1_000_000)}"
+            for stack, stats in items
+        ) + "\n"
+
+    def write_folded(self, path: str):
+        with open(path, "w") as folded_file:
+            folded_file.write(self.folded())
+        logger.info(f"Folded command stacks written to {path}")
@@ -0,0 +1,942 @@
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import http.client
+import ipaddress
+import json
+import logging
+import os
+import selectors
+import socket
+import sqlite3
+import ssl
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, List, Tuple, Union, NamedTuple
+from urllib.parse import urlsplit
+
+from init_selenium.cache import CACHE_DIR, FileLock
+
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, "http")
+# Local certificate authority used to intercept HTTPS
+CA_DIR = os.path.join(CACHE_DIR, "ca")
+
+# Per-host actions
+CACHE = "cache"    # store responses the origin allows to be cached, for as long as it allows
+FORCE = "force"    # store every successful GET for the rule's ttl, whatever the origin says
+BYPASS = "bypass"  # forward without reading or writing the cache
+BLOCK = "block"    # answer 403 without contacting the origin
+HOST_ACTIONS = (CACHE, FORCE, BYPASS, BLOCK)
+
+CACHEABLE_STATUSES = (200, 203, 301, 308, 410)
+# Headers that describe one connection and are never forwarded
+HOP_BY_HOP_HEADERS = frozenset((
+    "connection", "proxy-connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "trailers", "transfer-encoding", "upgrade",
+))
+# An idle HTTPS tunnel or streamed response is closed after this many seconds
+TUNNEL_IDLE_TIMEOUT = 300
+# How long a CONNECT tunnel waits for the browser's first byte to tell TLS from plain protocols
+CLIENT_HELLO_TIMEOUT = 5
+# First byte of a TLS handshake record, which carries the ClientHello
+TLS_HANDSHAKE = b"\x16"
+# Request headers meant for the proxy itself, not forwarded through an upgraded connection
+PROXY_HEADERS = frozenset(("proxy-connection", "proxy-authorization", "keep-alive"))
+
+Headers = List[Tuple[str, str]]
+
+
+class HostRule(NamedTuple):
+    """What the proxy does for a host: `action` is CACHE, FORCE, BYPASS or BLOCK, `ttl` is used by FORCE"""
+    action: str = CACHE
+    ttl: Optional[float] = None
+
+
+class CachedResponse(NamedTuple):
+    status: int
+    headers: Headers
+    body: bytes
+    expires: float
+
+
+class ContentStore:
+    """
+    On-disk HTTP cache shared by every proxy pointed at the same directory
+    Bodies are stored once per sha256 digest, so the same bundle served from several URLs
+    takes the space of one. The index lives in SQLite, which several processes can update
+    safely, and the least recently used entries are evicted once bodies exceed max_bytes
+    """
+
+    def __init__(self, root: str = HTTP_CACHE_DIR, max_bytes: int = 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._db: Optional[sqlite3.Connection] = None
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+            db = sqlite3.connect(os.path.join(self.root, "index.sqlite3"), timeout=30, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY, digest TEXT NOT NULL, status INTEGER NOT NULL,
+                    headers TEXT NOT NULL, expires REAL NOT NULL, accessed REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest);
+                CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+                CREATE TABLE IF NOT EXISTS objects (digest TEXT PRIMARY KEY, size INTEGER NOT NULL);
+            """)
+            self._db = db
+        return self._db
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    @property
+    def size(self) -> int:
+        """Bytes used by stored bodies"""
+        with self._lock:
+            return self._total_size()
+
+    def _total_size(self) -> int:
+        return self._connect().execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            db = self._connect()
+            row = db.execute("SELECT digest, status, headers, expires FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            digest, status, headers, expires = row
+            try:
+                with open(self._object_path(digest), "rb") as body_file:
+                    body = body_file.read()
+            except FileNotFoundError:
+                # Evicted by another process between its index update and ours
+                db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                db.commit()
+                return None
+            db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+        return CachedResponse(status, [tuple(header) for header in json.loads(headers)], body, expires)
+
+    def put(self, key: str, status: int, headers: Headers, body: bytes, expires: float):
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written under a unique name and renamed, readers never see a partial body
+            temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(temporary, "wb") as body_file:
+                body_file.write(body)
+            os.replace(temporary, path)
+
+        with self._lock:
+            db = self._connect()
+            now = time.time()
+            db.execute("INSERT OR IGNORE INTO objects (digest, size) VALUES (?, ?)", (digest, len(body)))
+            previous = db.execute("SELECT digest FROM entries WHERE key = ?", (key,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, digest, status, headers, expires, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, digest, status, json.dumps(headers), expires, now)
+            )
+            if previous and previous[0] != digest:
+                self._drop_unreferenced(db, previous[0])
+            db.commit()
+
+            # Approximate between evictions, other processes sharing the store also add bodies
+            if self._size is None:
+                self._size = self._total_size()
+            else:
+                self._size += len(body)
+            if self._size > self.max_bytes:
+                self._size = self._evict(db)
+
+    def _drop_unreferenced(self, db: sqlite3.Connection, digest: str) -> int:
+        """Deletes a body no entry points at anymore, returns the bytes freed"""
+        if db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+            return 0
+        row = db.execute("SELECT size FROM objects WHERE digest = ?", (digest,)).fetchone()
+        db.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+        try:
+            os.remove(self._object_path(digest))
+        except FileNotFoundError:
+            pass
+        return row[0] if row else 0
+
+    def _evict(self, db: sqlite3.Connection) -> int:
+        """Drops least recently used entries until bodies fit in max_bytes, returns the new size"""
+        size = self._total_size()
+        evicted = 0
+        while size > self.max_bytes:
+            rows = db.execute("SELECT key, digest FROM entries ORDER BY accessed LIMIT 64").fetchall()
+            if not rows:
+                break
+            for key, digest in rows:
+                db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                size -= self._drop_unreferenced(db, digest)
+                evicted += 1
+                if size <= self.max_bytes:
+                    break
+            db.commit()
+        if evicted:
+            logger.info(f"Evicted {evicted} cached responses, HTTP cache now uses {size} bytes")
+        return size
+
+    def clear(self):
+        with self._lock:
+            db = self._connect()
+            for (digest,) in db.execute("SELECT digest FROM objects").fetchall():
+                try:
+                    os.remove(self._object_path(digest))
+                except FileNotFoundError:
+                    pass
+            db.execute("DELETE FROM entries")
+            db.execute("DELETE FROM objects")
+            db.commit()
+            self._size = 0
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            self._size = None
+
+    def __getstate__(self) -> Dict[str, object]:
+        # The SQLite connection belongs to one process, every process opens its own
+        return {"root": self.root, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: Dict[str, object]):
+        self.__init__(**state)
+
+
+def _cryptography():
+    """Imports cryptography, which is only needed to intercept HTTPS"""
+    try:
+        import cryptography.x509
+    except ImportError:
+        raise ImportError("HTTPS interception requires cryptography: pip install 'init-selenium[mitm]'")
+    return cryptography
+
+
+def _has_cryptography() -> bool:
+    try:
+        _cryptography()
+        return True
+    except ImportError:
+        return False
+
+
+class CertificateAuthority:
+    """
+    Local certificate authority for HTTPS interception
+    The CA key and certificate are created once under root and shared by every process,
+    certificates for intercepted hosts are issued in memory on first use. Chrome sessions
+    skip certificate checks (--ignore-certificate-errors), other clients must trust ca_path
+    """
+
+    def __init__(self, root: str = CA_DIR):
+        self.root = root
+        self._ca = None
+        self._host_key = None
+        self._contexts: Dict[str, ssl.SSLContext] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ca_path(self) -> str:
+        """PEM certificate of the CA, created if it does not exist yet"""
+        with self._lock:
+            self._load()
+        return self._certificate_path
+
+    @property
+    def _certificate_path(self) -> str:
+        return os.path.join(self.root, "ca.pem")
+
+    def _load(self):
+        """Loads the CA, creating it on first use. Callers hold the lock"""
+        if self._ca is not None:
+            return self._ca
+        _cryptography()
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from cryptography.x509.oid import NameOID
+
+        key_path = os.path.join(self.root, "ca-key.pem")
+        with FileLock(os.path.join(self.root, "ca.lock")):
+            if not (os.path.exists(key_path) and os.path.exists(self._certificate_path)):
+                key = ec.generate_private_key(ec.SECP256R1())
+                name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "init-selenium local CA")])
+                now = datetime.now(timezone.utc)
+                certificate = (
+                    x509.CertificateBuilder()
+                    .subject_name(name)
+                    .issuer_name(name)
+                    .public_key(key.public_key())
+                    .serial_number(x509.random_serial_number())
+                    .not_valid_before(now - timedelta(days=1))
+                    .not_valid_after(now + timedelta(days=3650))
+                    .add_extension(x509.BasicConstraints(ca=True, path_length=0), critical=True)
+                    .add_extension(x509.KeyUsage(
+                        digital_signature=True, key_cert_sign=True, crl_sign=True, content_commitment=False,
+                        key_encipherment=False, data_encipherment=False, key_agreement=False,
+                        encipher_only=False, decipher_only=False,
+                    ), critical=True)
+                    .add_extension(x509.SubjectKeyIdentifier.from_public_key(key.public_key()), critical=False)
+                    .sign(key, hashes.SHA256())
+                )
+                # The key never leaves this machine and is only readable by its owner
+                fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, "wb") as key_file:
+                    key_file.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                                     serialization.NoEncryption()))
+                with open(self._certificate_path, "wb") as certificate_file:
+                    certificate_file.write(certificate.public_bytes(serialization.Encoding.PEM))
+                logger.info(f"Created local certificate authority {self._certificate_path}")
+
+            with open(key_path, "rb") as key_file:
+                key = serialization.load_pem_private_key(key_file.read(), password=None)
+            with open(self._certificate_path, "rb") as certificate_file:
+                certificate = x509.load_pem_x509_certificate(certificate_file.read())
+
+        self._ca = (certificate, key)
+        # Every host certificate of this process shares one key, issuing one is then only a signature
+        self._host_key = ec.generate_private_key(ec.SECP256R1())
+        return self._ca
+
+    def context_for(self, host: str) -> ssl.SSLContext:
+        """Server-side TLS context presenting a certificate for host"""
+        with self._lock:
+            context = self._contexts.get(host)
+            if context is None:
+                context = self._contexts[host] = self._issue(host)
+            return context
+
+    def _issue(self, host: str) -> ssl.SSLContext:
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.x509.oid import NameOID, ExtendedKeyUsageOID
+
+        ca_certificate, ca_key = self._load()
+        try:
+            alternative_name = x509.IPAddress(ipaddress.ip_address(host))
+        except ValueError:
+            alternative_name = x509.DNSName(host)
+        now = datetime.now(timezone.utc)
+        certificate = (
+            x509.CertificateBuilder()
+            .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, host[:64])]))
+            .issuer_name(ca_certificate.subject)
+            .public_key(self._host_key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - timedelta(days=1))
+            .not_valid_after(now + timedelta(days=397))
+            .add_extension(x509.SubjectAlternativeName([alternative_name]), critical=False)
+            .add_extension(x509.BasicConstraints(ca=False, path_length=None), critical=True)
+            .add_extension(x509.ExtendedKeyUsage([ExtendedKeyUsageOID.SERVER_AUTH]), critical=False)
+            .add_extension(x509.AuthorityKeyIdentifier.from_issuer_public_key(ca_key.public_key()), critical=False)
+            .sign(ca_key, hashes.SHA256())
+        )
+
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        # load_cert_chain only reads files, the chain is written to a private temporary one
+        fd, chain_path = tempfile.mkstemp(suffix=".pem")
+        try:
+            with os.fdopen(fd, "wb") as chain_file:
+                chain_file.write(certificate.public_bytes(serialization.Encoding.PEM))
+                chain_file.write(ca_certificate.public_bytes(serialization.Encoding.PEM))
+                chain_file.write(self._host_key.private_bytes(
+                    serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+                ))
+            context.load_cert_chain(chain_path)
+        finally:
+            os.remove(chain_path)
+        return context
+
+    def __getstate__(self) -> Dict[str, object]:
+        # Keys and TLS contexts stay in the process that made them, others load the CA from root
+        return {"root": self.root}
+
+    def __setstate__(self, state: Dict[str, object]):
+        self.__init__(**state)
+
+
+def _cache_control(headers: Headers) -> Dict[str, Optional[str]]:
+    directives = {}
+    for name, value in headers:
+        if name.lower() != "cache-control":
+            continue
+        for directive in value.split(","):
+            directive_name, _, argument = directive.strip().partition("=")
+            directives[directive_name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def _header(headers: Headers, name: str) -> Optional[str]:
+    name = name.lower()
+    return next((value for key, value in headers if key.lower() == name), None)
+
+
+def _validators(headers: Headers) -> Headers:
+    """Conditional request headers that revalidate a stored response"""
+    validators = []
+    etag = _header(headers, "ETag")
+    if etag:
+        validators.append(("If-None-Match", etag))
+    last_modified = _header(headers, "Last-Modified")
+    if last_modified:
+        validators.append(("If-Modified-Since", last_modified))
+    return validators
+
+
+def _updated_headers(stored: Headers, updates: Headers) -> Headers:
+    """Stored headers with those of a 304 response replacing them (RFC 9111 4.3.4)"""
+    updated = {name.lower() for name, _ in updates}
+    return [(name, value) for name, value in stored if name.lower() not in updated] + list(updates)
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    # Idle keep-alive connections from the browser are closed after this many seconds
+    timeout = 120
+    proxy: CachingProxy
+    # Set inside an intercepted CONNECT: the scheme and authority of the origin-form requests that follow
+    origin: Optional[str] = None
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def do_CONNECT(self):
+        """
+        HTTPS. With interception, TLS is terminated with a certificate from the local CA and the
+        requests inside are served like plain HTTP ones, through the cache. Tunnels whose first
+        byte is not a TLS ClientHello (ws:// to port 80), BYPASS hosts and every tunnel without
+        interception are opaque and never cached
+        """
+        host, _, port = self.path.rpartition(":")
+        host = host.strip("[]")
+        rule = self.proxy.rule_for(host)
+        if rule.action == BLOCK:
+            self.proxy._count("blocked")
+            return self._respond(403, [], b"")
+        if self.proxy.intercept_https and rule.action != BYPASS and port.isdigit():
+            self.send_response_only(200, "Connection Established")
+            self.end_headers()
+            self.close_connection = True
+            first = self._peek()
+            if first == TLS_HANDSHAKE:
+                return self._intercept(host, int(port))
+            if first is None:
+                # The browser closed the tunnel without sending anything
+                return
+            try:
+                upstream = socket.create_connection((host, int(port)), timeout=self.proxy.timeout)
+            except OSError as e:
+                logger.warning(f"Tunnel to {self.path} failed: {e}")
+                return
+            return self._splice(upstream)
+
+        try:
+            upstream = socket.create_connection((host, int(port)), timeout=self.proxy.timeout)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Tunnel to {self.path} failed: {e}")
+            return self.send_error(502)
+        self.send_response_only(200, "Connection Established")
+        self.end_headers()
+        self.close_connection = True
+        self._splice(upstream)
+
+    def _peek(self) -> Optional[bytes]:
+        """
+        First byte the browser sends in a tunnel, left unread. None if it closed the tunnel, b"" if
+        it sent nothing in time: protocols where the server speaks first are tunnelled as they are
+        """
+        self.connection.settimeout(CLIENT_HELLO_TIMEOUT)
+        try:
+            return self.connection.recv(1, socket.MSG_PEEK) or None
+        except socket.timeout:
+            return b""
+        except OSError:
+            return None
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def _splice(self, upstream: socket.socket):
+        """Pipes the browser connection and an upstream one into each other until either closes"""
+        self.proxy._count("tunnels")
+        try:
+            self._pipe(self.connection, upstream)
+        finally:
+            upstream.close()
+
+    def _intercept(self, host: str, port: int):
+        try:
+            context = self.proxy.authority.context_for(host)
+        except Exception as e:
+            logger.warning(f"Could not issue a certificate for {host}: {e}")
+            return
+
+        try:
+            connection = context.wrap_socket(self.connection, server_side=True)
+        except (ssl.SSLError, OSError) as e:
+            logger.debug(f"TLS handshake with the browser for {host} failed: {e}")
+            return
+        self.proxy._count("intercepted")
+
+        # The requests inside the tunnel are read from and answered on the TLS connection
+        self.connection = connection
+        self.rfile = connection.makefile("rb", self.rbufsize)
+        self.wfile = connection.makefile("wb")
+        self.origin = f"https://{host}" if port == 443 else f"https://{host}:{port}"
+        try:
+            self.close_connection = False
+            while not self.close_connection:
+                self.handle_one_request()
+        finally:
+            self.close_connection = True
+            connection.close()
+
+    @staticmethod
+    def _pipe(client: socket.socket, upstream: socket.socket):
+        with selectors.DefaultSelector() as selector:
+            selector.register(client, selectors.EVENT_READ, upstream)
+            selector.register(upstream, selectors.EVENT_READ, client)
+            while True:
+                events = selector.select(TUNNEL_IDLE_TIMEOUT)
+                if not events:
+                    return
+                for key, _ in events:
+                    try:
+                        data = key.fileobj.recv(65536)
+                        if not data:
+                            return
+                        key.data.sendall(data)
+                        # TLS sockets can hold decrypted bytes that select() does not report
+                        pending = getattr(key.fileobj, "pending", None)
+                        while pending is not None and pending():
+                            key.data.sendall(key.fileobj.recv(65536))
+                    except OSError:
+                        return
+
+    def do_GET(self):
+        url = f"{self.origin}{self.path}" if self.origin else self.path
+        parts = urlsplit(url)
+        if parts.scheme != ("https" if self.origin else "http") or not parts.hostname:
+            return self.send_error(400, "Only absolute http:// URLs can be proxied")
+
+        proxy = self.proxy
+        rule = proxy.rule_for(parts.hostname)
+        if rule.action == BLOCK:
+            proxy._count("blocked")
+            return self._respond(403, [], b"")
+        if self.headers.get("Upgrade") and "upgrade" in self.headers.get("Connection", "").lower():
+            return self._upgrade(parts)
+
+        length = int(self.headers.get("Content-Length") or 0)
+        request_body = self.rfile.read(length) if length else None
+
+        # Responses to authenticated requests are private to the session that made them
+        use_cache = (self.command in ("GET", "HEAD") and rule.action != BYPASS
+                     and "Authorization" not in self.headers)
+        key = f"{self.headers.get('Accept-Encoding', '')}|{url}"
+        cached = None
+        validators: Headers = []
+        if use_cache:
+            cached = proxy.store.get(key)
+            if cached is not None and cached.expires > time.time():
+                proxy._count("hits", len(cached.body))
+                return self._respond(cached.status, cached.headers, cached.body, "HIT")
+            # A stale response with a validator is revalidated instead of downloaded again
+            validators = _validators(cached.headers) if cached is not None else []
+        else:
+            proxy._count("bypassed")
+
+        try:
+            connection, response = self._fetch(parts, request_body, validators)
+        except (OSError, http.client.HTTPException) as e:
+            logger.warning(f"Proxy request to {url} failed: {e}")
+            return self.send_error(502)
+
+        try:
+            status = response.status
+            # HEAD answers keep the origin's Content-Length, bodies get their own framing
+            keep_length = self.command == "HEAD"
+            headers = [(name, value) for name, value in response.getheaders()
+                       if name.lower() not in HOP_BY_HOP_HEADERS and (keep_length or name.lower() != "content-length")]
+            if validators and status == 304:
+                proxy._count("revalidated", len(cached.body))
+                status, headers, body = cached.status, _updated_headers(cached.headers, headers), cached.body
+                if self.command == "GET":
+                    self._store(key, url, status, headers, body, proxy.expiry(rule, status, headers, len(body)))
+                return self._respond(status, headers, body, "REVALIDATED")
+            cache_state = "MISS" if use_cache else "BYPASS"
+            if use_cache:
+                proxy._count("misses")
+
+            expires = None
+            if use_cache and self.command == "GET":
+                # http.client knows the length when the origin sent one, the body read below is checked too
+                expires = proxy.expiry(rule, status, headers, response.length or 0)
+            if expires is None:
+                # Not stored: sent on as it arrives, so event streams and long polls are not held back
+                return self._stream(connection, response, status, headers, cache_state)
+
+            try:
+                body = response.read(proxy.max_object_bytes + 1)
+            except (OSError, http.client.HTTPException) as e:
+                logger.warning(f"Proxy request to {url} failed: {e}")
+                return self.send_error(502)
+            if len(body) > proxy.max_object_bytes:
+                return self._stream(connection, response, status, headers, cache_state, body)
+            self._store(key, url, status, headers, body, expires)
+            self._respond(status, headers, body, cache_state)
+        finally:
+            connection.close()
+
+    def _store(self, key: str, url: str, status: int, headers: Headers, body: bytes, expires: Optional[float]):
+        if expires is None:
+            return
+        try:
+            self.proxy.store.put(key, status, headers, body, expires)
+            self.proxy._count("stored")
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Could not cache {url}: {e}")
+
+    do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = do_GET
+
+    def _fetch(self, parts, request_body: Optional[bytes], validators: Headers = ()
+               ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """
+        Forwards the request to the origin, validators replace the browser's own conditional headers
+        Returns the connection, which the caller closes, and the response with its body still unread
+        """
+        if parts.scheme == "https":
+            connection = http.client.HTTPSConnection(parts.hostname, parts.port or 443, timeout=self.proxy.timeout,
+                                                     context=self.proxy.upstream_context())
+        else:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=self.proxy.timeout)
+        skipped = HOP_BY_HOP_HEADERS | {"content-length"}
+        if validators:
+            skipped |= {"if-none-match", "if-modified-since"}
+        try:
+            connection.putrequest(self.command, self._target(parts), skip_host=True, skip_accept_encoding=True)
+            for name, value in list(self.headers.items()) + list(validators):
+                if name.lower() not in skipped or (name, value) in validators:
+                    connection.putheader(name, value)
+            if request_body is not None:
+                connection.putheader("Content-Length", str(len(request_body)))
+            connection.endheaders(request_body)
+            return connection, connection.getresponse()
+        except BaseException:
+            connection.close()
+            raise
+
+    @staticmethod
+    def _target(parts) -> str:
+        """Origin-form request target of a URL"""
+        path = parts.path or "/"
+        if parts.query:
+            path += f"?{parts.query}"
+        return path
+
+    def _upgrade(self, parts):
+        """
+        Upgrade requests (WebSocket) are sent to the origin as they are and the connection
+        becomes an opaque tunnel, whatever the origin answers is relayed byte for byte
+        """
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        try:
+            upstream = socket.create_connection((parts.hostname, port), timeout=self.proxy.timeout)
+        except OSError as e:
+            logger.warning(f"Upgrade to {parts.geturl()} failed: {e}")
+            return self.send_error(502)
+        try:
+            if parts.scheme == "https":
+                upstream = self.proxy.upstream_context().wrap_socket(upstream, server_hostname=parts.hostname)
+            lines = [f"{self.command} {self._target(parts)} HTTP/1.1"]
+            lines += [f"{name}: {value}" for name, value in self.headers.items() if name.lower() not in PROXY_HEADERS]
+            upstream.sendall(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        except OSError as e:
+            upstream.close()
+            logger.warning(f"Upgrade to {parts.geturl()} failed: {e}")
+            return self.send_error(502)
+
+        self.proxy._count("upgraded")
+        self.close_connection = True
+        # The browser waits for the origin's 101 before sending frames, nothing is left in rfile
+        try:
+            self._pipe(self.connection, upstream)
+        finally:
+            upstream.close()
+
+    def _stream(self,
+                connection: http.client.HTTPConnection,
+                response: http.client.HTTPResponse,
+                status: int,
+                headers: Headers,
+                cache_state: str,
+                prefix: bytes = b""):
+        """Relays a response while it is read from the origin, after `prefix` if part of it was read already"""
+        has_body = status >= 200 and status not in (204, 304) and self.command != "HEAD"
+        # http.client counts down the bytes left of a response with a Content-Length
+        length = None if response.length is None else len(prefix) + response.length
+        chunked = has_body and length is None and self.request_version != "HTTP/1.0"
+        self.send_response_only(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("X-Cache", cache_state)
+        if has_body and length is not None:
+            self.send_header("Content-Length", str(length))
+        elif chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        elif has_body:
+            # HTTP/1.0 clients read the body until the connection closes
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.flush()
+        if not has_body:
+            return
+
+        if connection.sock is not None:
+            connection.sock.settimeout(TUNNEL_IDLE_TIMEOUT)
+        try:
+            data = prefix
+            while True:
+                if data:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data) if chunked else data)
+                    self.wfile.flush()
+                data = response.read1(65536)
+                if not data:
+                    break
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+        except (OSError, http.client.HTTPException) as e:
+            # The headers are out, the browser sees a truncated response
+            logger.debug(f"Streaming {self.path} stopped: {e}")
+            self.close_connection = True
+
+    def _respond(self, status: int, headers: Headers, body: bytes, cache_state: Optional[str] = None):
+        self.send_response_only(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        if cache_state:
+            self.send_header("X-Cache", cache_state)
+        has_body = status >= 200 and status not in (204, 304)
+        # HEAD answers forwarded from the origin keep the origin's Content-Length
+        if has_body and not (self.command == "HEAD" and not body):
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if has_body and self.command != "HEAD":
+            self.wfile.write(body)
+
+
+class _ProxyServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class CachingProxy:
+    """
+    Local HTTP proxy with a shared on-disk cache, started by DriverInit(proxy=...) on the
+    first launch. Every session of that DriverInit goes through it, so static assets are
+    downloaded once and served from disk afterwards.
+
+    rules maps host patterns ("*.cdn.example.com") to CACHE, FORCE, BYPASS, BLOCK or a
+    HostRule, the first matching pattern wins and other hosts use CACHE.
+
+    HTTPS is cached too when intercept_https is on (the default when cryptography is
+    installed): CONNECT tunnels are terminated with certificates from authority, which
+    Chrome accepts through --ignore-certificate-errors, and upstream certificates are checked
+    against verify (True, False or a CA bundle path). Without interception, and for BYPASS
+    hosts, HTTPS goes through an opaque tunnel and only plain HTTP assets are cached.
+    Stale responses with an ETag or Last-Modified are revalidated with a conditional request.
+    Responses that are not stored are relayed as they arrive, WebSocket upgrades are tunnelled
+    """
+
+    def __init__(self,
+                 store: Optional[ContentStore] = None,
+                 rules: Optional[Dict[str, Union[str, HostRule]]] = None,
+                 default_ttl: float = 3600,
+                 max_object_bytes: int = 50 * 1024 ** 2,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 timeout: float = 30,
+                 intercept_https: Optional[bool] = None,
+                 authority: Optional[CertificateAuthority] = None,
+                 verify: Union[bool, str] = True,
+                 ):
+        if intercept_https is None:
+            intercept_https = _has_cryptography()
+        elif intercept_https:
+            _cryptography()
+        self.store = store or ContentStore()
+        self.rules: Dict[str, HostRule] = {}
+        for pattern, rule in (rules or {}).items():
+            rule = HostRule(rule) if isinstance(rule, str) else rule
+            if rule.action not in HOST_ACTIONS:
+                raise ValueError(f"Host rule action must be one of {', '.join(HOST_ACTIONS)}")
+            self.rules[pattern.lower()] = rule
+        self.default_ttl = default_ttl
+        self.max_object_bytes = max_object_bytes
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.intercept_https = intercept_https
+        self.authority = authority or (CertificateAuthority() if intercept_https else None)
+        self.verify = verify
+        self.stats: Dict[str, int] = dict.fromkeys(
+            ("hits", "misses", "revalidated", "stored", "bypassed", "blocked", "tunnels", "intercepted",
+             "upgraded", "bytes_from_cache"), 0
+        )
+        self._stats_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._server: Optional[_ProxyServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._upstream_context: Optional[ssl.SSLContext] = None
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    @property
+    def url(self) -> str:
+        """Proxy URL for --proxy-server, only valid once started"""
+        if self._server is None:
+            raise RuntimeError("CachingProxy is not running")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "CachingProxy":
+        """Starts serving on a background thread, does nothing if already running"""
+        with self._start_lock:
+            if self._server is not None:
+                return self
+            handler = type("ProxyHandler", (_ProxyHandler,), {"proxy": self})
+            self._server = _ProxyServer((self.host, self.port), handler)
+            self._thread = threading.Thread(target=self._server.serve_forever, name="CachingProxy", daemon=True)
+            self._thread.start()
+        logger.info(f"Caching proxy listening on {self.url}, cache in {self.store.root}")
+        return self
+
+    def close(self):
+        with self._start_lock:
+            server, self._server = self._server, None
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+                self._thread.join()
+            self.store.close()
+
+    def upstream_context(self) -> ssl.SSLContext:
+        """Client-side TLS context for intercepted requests to HTTPS origins"""
+        if self._upstream_context is None:
+            if self.verify is False:
+                context = ssl.create_default_context()
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            else:
+                context = ssl.create_default_context(cafile=self.verify if isinstance(self.verify, str) else None)
+            self._upstream_context = context
+        return self._upstream_context
+
+    def rule_for(self, host: str) -> HostRule:
+        host = host.lower()
+        for pattern, rule in self.rules.items():
+            if fnmatch.fnmatchcase(host, pattern):
+                return rule
+        return HostRule(CACHE)
+
+    def expiry(self, rule: HostRule, status: int, headers: Headers, size: int) -> Optional[float]:
+        """Time until which a response stays fresh, None if it must not be stored"""
+        if status not in CACHEABLE_STATUSES or size > self.max_object_bytes:
+            return None
+        now = time.time()
+        if rule.action == FORCE:
+            return now + (rule.ttl if rule.ttl is not None else self.default_ttl)
+
+        directives = _cache_control(headers)
+        if directives.keys() & {"no-store", "no-cache", "private"}:
+            return None
+        # The key only covers Accept-Encoding, responses varying on anything else are not shared
+        vary = _header(headers, "Vary")
+        if vary and {field.strip().lower() for field in vary.split(",")} - {"accept-encoding"}:
+            return None
+        if _header(headers, "Set-Cookie") is not None:
+            return None
+
+        ttl = None
+        for directive in ("s-maxage", "max-age"):
+            if directives.get(directive):
+                try:
+                    ttl = float(directives[directive])
+                    break
+                except ValueError:
+                    return None
+        if ttl is None:
+            date = _http_date(_header(headers, "Date")) or now
+            expires = _http_date(_header(headers, "Expires"))
+            last_modified = _http_date(_header(headers, "Last-Modified"))
+            if expires is not None:
+                ttl = expires - date
+            elif last_modified is not None:
+                # Heuristic freshness (RFC 9111): a tenth of the time since the last change
+                ttl = min((date - last_modified) / 10, self.default_ttl)
+        if not ttl or ttl <= 0:
+            return None
+        return now + ttl
+
+    def _count(self, name: str, cached_bytes: int = 0):
+        with self._stats_lock:
+            self.stats[name] += 1
+            self.stats["bytes_from_cache"] += cached_bytes
+
+    def __enter__(self) -> "CachingProxy":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getstate__(self) -> Dict[str, object]:
+        # A running server belongs to one process, unpickled copies start their own on the same store
+        state = self.__dict__.copy()
+        for name in ("_server", "_thread", "_stats_lock", "_start_lock", "_upstream_context"):
+            del state[name]
+        state["stats"] = dict.fromkeys(self.stats, 0)
+        return state
+
+    def __setstate__(self, state: Dict[str, object]):
+        self.__dict__.update(state)
+        self._stats_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self._upstream_context = None
+
+    def __repr__(self) -> str:
+        return f"CachingProxy({self.url if self.running else 'stopped'}, store={self.store.root!r})"
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from typing import Optional, Dict, List, Any, Iterable, TYPE_CHECKING
+
+from init_selenium.backends import driver_supports_cdp
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+
+logger = logging.getLogger(__name__)
+
+# Fields accepted by the CDP Network.setCookies CookieParam type
+COOKIE_PARAM_FIELDS = (
+    "name", "value", "url", "domain", "path", "secure", "httpOnly", "sameSite",
+    "expires", "priority", "sameParty", "sourceScheme", "sourcePort", "partitionKey",
+)
+
+# Fields accepted by WebDriver add_cookie, used by drivers without CDP
+WEBDRIVER_COOKIE_FIELDS = ("name", "value", "path", "domain", "secure", "httpOnly", "expiry", "sameSite")
+
+# localStorage key holding the id of the restore that seeded an origin, so every later document,
+# in any tab or popup, keeps the values the site wrote since instead of seeding them again
+RESTORED_FLAG = "__init_selenium_restored"
+
+LOCAL_STORAGE_RESTORE_SCRIPT = """
+(function (data, restoreId) {
+    try {
+        var items = data[window.location.origin];
+        if (!items || window.localStorage.getItem("%s") === restoreId) {
+            return;
+        }
+        for (var key in items) {
+            window.localStorage.setItem(key, items[key]);
+        }
+        window.localStorage.setItem("%s", restoreId);
+    } catch (e) {}
+})(%%s, %%s);
+""" % (RESTORED_FLAG, RESTORED_FLAG)
+
+
+def to_cookie_params(cookies: Iterable[Dict[str, Any]], default_url: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Converts WebDriver or CDP cookie dicts into CDP CookieParam dicts
+    Cookies without a domain are bound to default_url
+    """
+    params = []
+    for cookie in cookies:
+        param = {key: cookie[key] for key in COOKIE_PARAM_FIELDS if key in cookie}
+
+        # WebDriver uses "expiry", CDP uses "expires". Session cookies have no expiry
+        if "expiry" in cookie and "expires" not in param:
+            param["expires"] = cookie["expiry"]
+        if cookie.get("session") or param.get("expires", 0) < 0:
+            param.pop("expires", None)
+
+        if "domain" not in param and "url" not in param:
+            if not default_url:
+                raise ValueError(f"Cookie '{cookie.get('name')}' needs a domain or url")
+            param["url"] = default_url
+        params.append(param)
+    return params
+
+
+def set_cookies(driver: webdriver.Chrome,
+                cookies: Iterable[Dict[str, Any]],
+                default_url: Optional[str] = None,
+                cdp: Optional[bool] = None):
+    """
+    Sets every cookie in a single CDP Network.setCookies call
+    Drivers without CDP (Firefox) fall back to one add_cookie call per cookie, for the current domain only.
+    cdp defaults to what the session's capabilities say
+    """
+    if cdp is None:
+        cdp = driver_supports_cdp(driver)
+    if not cdp:
+        for cookie in cookies:
+            driver.add_cookie({key: value for key, value in cookie.items() if key in WEBDRIVER_COOKIE_FIELDS})
+        return
+    driver.execute_cdp_cmd("Network.setCookies", {"cookies": to_cookie_params(cookies, default_url)})
+
+
+class SessionSnapshot:
+    """
+    Cookies for every domain plus localStorage per origin, saved to and loaded from a JSON file
+    Restoring sets all cookies in one CDP batch and seeds localStorage before the first navigation
+    """
+
+    def __init__(self,
+                 cookies: Optional[List[Dict[str, Any]]] = None,
+                 local_storage: Optional[Dict[str, Dict[str, str]]] = None
+                 ):
+        self.cookies = cookies or []
+        self.local_storage = local_storage or {}
+
+    @classmethod
+    def capture(cls, driver: webdriver.Chrome, origins: Optional[Iterable[str]] = None) -> "SessionSnapshot":
+        """
+        Captures every cookie in the browser and the localStorage of the current page
+        Other origins are captured through CDP DOMStorage when a frame for them is open
+        """
+        from selenium.common.exceptions import WebDriverException
+
+        cookies = driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+        local_storage = {}
+
+        current_origin = driver.execute_script("return window.location.origin;")
+        if current_origin and current_origin != "null":
+            local_storage[current_origin] = driver.execute_script(
+                "var items = {};"
+                "for (var i = 0; i < window.localStorage.length; i++) {"
+                "    var key = window.localStorage.key(i);"
+                "    if (key !== arguments[0]) items[key] = window.localStorage.getItem(key);"
+                "}"
+                "return items;",
+                RESTORED_FLAG,
+            )
+
+        for origin in origins or []:
+            if origin in local_storage:
+                continue
+            try:
+                driver.execute_cdp_cmd("DOMStorage.enable", {})
+                entries = driver.execute_cdp_cmd("DOMStorage.getDOMStorageItems", {
+                    "storageId": {"securityOrigin": origin, "isLocalStorage": True}
+                })["entries"]
+                local_storage[origin] = {key: value for key, value in entries if key != RESTORED_FLAG}
+            except WebDriverException as e:
+                logger.warning(f"Could not capture localStorage for {origin}: {e}")
+
+        logger.info(f"Captured {len(cookies)} cookies and localStorage for {len(local_storage)} origins")
+        return cls(cookies, local_storage)
+
+    def restore(self, driver: webdriver.Chrome):
+        """Restores the snapshot into a driver, must run before navigating to the saved sites"""
+        if self.cookies:
+            set_cookies(driver, self.cookies)
+
+        if self.local_storage:
+            driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+                "source": LOCAL_STORAGE_RESTORE_SCRIPT % (json.dumps(self.local_storage), json.dumps(uuid.uuid4().hex))
+            })
+        logger.info(f"Restored {len(self.cookies)} cookies and localStorage for {len(self.local_storage)} origins")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"cookies": self.cookies, "local_storage": self.local_storage}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SessionSnapshot":
+        return cls(data.get("cookies"), data.get("local_storage"))
+
+    def save(self, path: str):
+        with open(path, "w") as snapshot_file:
+            json.dump(self.to_dict(), snapshot_file)
+
+    @classmethod
+    def load(cls, path: str) -> "SessionSnapshot":
+        with open(path, "r") as snapshot_file:
+            return cls.from_dict(json.load(snapshot_file))
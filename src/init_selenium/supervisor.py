@@ -0,0 +1,393 @@
+from __future__ import annotations
+
+import logging
+import os
+import signal
+import threading
+import time
+from functools import wraps
+from typing import Optional, Dict, Any, Tuple, TYPE_CHECKING
+
+from selenium.common.exceptions import WebDriverException
+
+from init_selenium.init_driver import DriverInit
+from init_selenium.procs import SessionTracker
+from init_selenium.session import SessionSnapshot
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from init_selenium.wait import AdaptiveWait
+
+
+logger = logging.getLogger(__name__)
+
+CRASH = "crash"
+HANG = "hang"
+
+# Commands that load a page or run page scripts, bounded by navigation_timeout instead of command_timeout
+LONG_COMMANDS = frozenset(("get", "refresh", "goBack", "goForward", "w3cExecuteScript", "w3cExecuteScriptAsync"))
+# Errors chromedriver reports once the browser or the tab is gone for good
+CRASH_MESSAGES = (
+    "invalid session id",
+    "session deleted",
+    "chrome not reachable",
+    "disconnected: not connected to devtools",
+    "tab crashed",
+    "target crashed",
+    "page crash",
+)
+
+
+class SessionRestarted(WebDriverException):
+    """The supervised session crashed or hung during this command and was relaunched, the command did not complete"""
+
+
+def _kill_tree(pids) -> int:
+    """Kills processes and their children, psutil finds the children, without it only the roots die"""
+    killed = 0
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    for pid in pids:
+        if psutil is None:
+            try:
+                os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+                killed += 1
+            except OSError:
+                pass
+            continue
+        try:
+            root = psutil.Process(pid)
+            processes = root.children(recursive=True) + [root]
+        except psutil.Error:
+            continue
+        for process in processes:
+            try:
+                process.kill()
+                killed += 1
+            except psutil.Error:
+                pass
+    return killed
+
+
+class SupervisedDriver:
+    """
+    Stands in for the driver of a Supervisor: attributes and methods are those of the current
+    session, so code keeps working on the relaunched browser after a failover.
+    quit() closes the supervisor
+    """
+
+    def __init__(self, supervisor: Supervisor):
+        object.__setattr__(self, "_supervisor", supervisor)
+
+    def __getattr__(self, name: str):
+        return getattr(self._supervisor.current_driver(), name)
+
+    def __setattr__(self, name: str, value):
+        setattr(self._supervisor.current_driver(), name, value)
+
+    def quit(self):
+        self._supervisor.close()
+
+    def __repr__(self) -> str:
+        return f"SupervisedDriver({self._supervisor.current_driver()!r})"
+
+
+class Supervisor:
+    """
+    Keeps one browser session alive through crashes and hangs
+    Every WebDriver command gets a deadline: command_timeout, or navigation_timeout plus a
+    grace period for page loads and scripts (the driver's own page load and script timeouts
+    are set to navigation_timeout, so they normally fire first). A watchdog thread kills the
+    session's process tree once a deadline passes or chromedriver dies, and an idle session
+    is probed every probe_interval seconds. A failed session is killed and relaunched with
+    the last checkpoint() restored and the last page reloaded; the failed command raises
+    SessionRestarted, except navigations, which are retried once on the new session.
+
+    Use supervisor.driver and supervisor.wait in place of create_driver's pair; counters are
+    in supervisor.stats. Deadlines are enforced by killing local processes, so for remote
+    sessions hangs are only detected by probes and the grid's own timeouts
+    """
+
+    def __init__(self,
+                 initializer: DriverInit,
+                 command_timeout: float = 30,
+                 navigation_timeout: float = 60,
+                 grace: float = 10,
+                 probe_interval: float = 10,
+                 probe_timeout: float = 5,
+                 max_restarts: Optional[int] = None,
+                 resume: bool = True,
+                 **create_driver_kwargs
+                 ):
+        self.initializer = initializer
+        self.command_timeout = command_timeout
+        self.navigation_timeout = navigation_timeout
+        self.grace = grace
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.max_restarts = max_restarts
+        self.resume = resume
+        self.create_driver_kwargs = create_driver_kwargs
+
+        self.snapshot: Optional[SessionSnapshot] = create_driver_kwargs.pop("session", None)
+        if isinstance(self.snapshot, str):
+            self.snapshot = SessionSnapshot.load(self.snapshot)
+        self.last_url: Optional[str] = None
+        self.stats: Dict[str, float] = dict.fromkeys(
+            ("crashes", "hangs", "restarts", "probes", "failed_probes", "retried_navigations", "restart_seconds"), 0
+        )
+        # Counters are updated from the watchdog, the prober and every caller thread
+        self._stats_lock = threading.Lock()
+
+        self.driver = SupervisedDriver(self)
+        self.wait: Optional[AdaptiveWait] = None
+        self._driver: Optional[webdriver.Chrome] = None
+        self._generation = 0
+        self._closed = False
+        # Held while the session is replaced, callers of current_driver() wait for the new one
+        self._lock = threading.RLock()
+        # token -> (deadline, generation, command) of every command in flight
+        self._inflight: Dict[object, Tuple[float, int, str]] = {}
+        # tokens whose command the watchdog killed, with the reason
+        self._killed: Dict[object, str] = {}
+        self._inflight_lock = threading.Lock()
+        self._last_activity = time.monotonic()
+        self._prober_ident: Optional[int] = None
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._probe_now = threading.Event()
+        self._threads = []
+
+    def __enter__(self) -> "Supervisor":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self) -> "Supervisor":
+        """Launches the session and the watchdog and probe threads"""
+        from init_selenium.wait import AdaptiveWait
+
+        with self._lock:
+            if self._driver is not None:
+                return self
+            wait_time = self._launch()
+            self.wait = AdaptiveWait(self.driver, wait_time, latencies=self.initializer.wait_latencies)
+        self._threads = [
+            threading.Thread(target=self._watchdog, name="Supervisor-watchdog", daemon=True),
+            threading.Thread(target=self._prober, name="Supervisor-probe", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def current_driver(self) -> webdriver.Chrome:
+        with self._lock:
+            if self._driver is None:
+                raise WebDriverException("Supervised session is not running")
+            return self._driver
+
+    def checkpoint(self) -> SessionSnapshot:
+        """Captures cookies and localStorage, restored into the session that replaces a failed one"""
+        self.snapshot = SessionSnapshot.capture(self.current_driver())
+        return self.snapshot
+
+    def _count(self, name: str, amount: float = 1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def _launch(self) -> float:
+        """Starts a new session and supervises it, callers hold the lock. Returns the wait timeout"""
+        kwargs = dict(self.create_driver_kwargs)
+        if self.snapshot is not None:
+            kwargs["session"] = self.snapshot
+        driver, wait = self.initializer.create_driver(**kwargs)
+        driver.set_page_load_timeout(self.navigation_timeout)
+        driver.set_script_timeout(self.navigation_timeout)
+        self._generation += 1
+        self._supervise(driver, self._generation)
+        self._driver = driver
+        return wait._timeout
+
+    def _deadline_for(self, command: str) -> float:
+        if threading.get_ident() == self._prober_ident:
+            return self.probe_timeout
+        if command in LONG_COMMANDS:
+            return self.navigation_timeout + self.grace
+        return self.command_timeout
+
+    def _supervise(self, driver: webdriver.Chrome, generation: int):
+        """Wraps driver.command_executor.execute on this instance with deadlines and failover"""
+        executor = driver.command_executor
+        original_execute = executor.execute
+
+        @wraps(original_execute)
+        def supervised_execute(driver_command: str, params: Optional[Dict[str, Any]] = None):
+            # Commands of a replaced session, such as its quit, are not supervised anymore
+            if generation != self._generation or self._closed:
+                return original_execute(driver_command, params)
+
+            token = object()
+            with self._inflight_lock:
+                self._inflight[token] = (time.monotonic() + self._deadline_for(driver_command), generation, driver_command)
+            try:
+                response = original_execute(driver_command, params)
+                if driver_command == "get" and params:
+                    self.last_url = params.get("url")
+                return response
+            except Exception as e:
+                with self._inflight_lock:
+                    kind = self._killed.pop(token, None)
+                kind = kind or self._classify(e)
+                # Failures while a session is being restored are left to the next command or probe
+                if kind is None or self._closed or getattr(self._local, "recovering", False):
+                    raise
+                retry = (driver_command == "get" and params and not getattr(self._local, "retrying", False)
+                         and threading.get_ident() != self._prober_ident)
+                self._recover(generation, kind, e, resume=not retry)
+                if not retry:
+                    raise SessionRestarted(f"Session {kind} during {driver_command}, relaunched: {e}") from e
+
+                # Navigations are retried once, a page that crashes the browser every time still raises
+                self._count("retried_navigations")
+                driver = self.current_driver()
+                self._local.retrying = True
+                try:
+                    return driver.command_executor.execute(driver_command, {**params, "sessionId": driver.session_id})
+                finally:
+                    self._local.retrying = False
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(token, None)
+                    self._killed.pop(token, None)
+                self._last_activity = time.monotonic()
+
+        executor.execute = supervised_execute
+
+    @staticmethod
+    def _classify(error: Exception) -> Optional[str]:
+        """CRASH or HANG for errors that mean the session is lost, None for ordinary command errors"""
+        import urllib3
+
+        if isinstance(error, (TimeoutError, urllib3.exceptions.TimeoutError)):
+            return HANG
+        if isinstance(error, (OSError, urllib3.exceptions.HTTPError)):
+            return CRASH
+        if isinstance(error, WebDriverException) and not isinstance(error, SessionRestarted):
+            message = (error.msg or "").lower()
+            if any(fragment in message for fragment in CRASH_MESSAGES):
+                return CRASH
+        return None
+
+    def _kill(self, driver: webdriver.Chrome) -> int:
+        """Kills a session's processes: its tracked tree if the DriverInit has a tracker"""
+        tracker = self.initializer.tracker
+        tracked = tracker.session(driver) if tracker else None
+        if tracked is not None:
+            tracked.processes()
+            return SessionTracker._kill(tracked.known)
+        return _kill_tree(SessionTracker._root_pids(driver))
+
+    def _recover(self, generation: int, kind: str, error: Optional[Exception] = None, resume: bool = True):
+        """Replaces the session of this generation, unless another thread already did"""
+        with self._lock:
+            if generation != self._generation or self._closed:
+                return
+            self._local.recovering = True
+            try:
+                self._replace(kind, error, resume)
+            finally:
+                self._local.recovering = False
+
+    def _replace(self, kind: str, error: Optional[Exception], resume: bool):
+        """Kills the current session and launches its successor, callers hold the lock"""
+        start = time.monotonic()
+        self._count("crashes" if kind == CRASH else "hangs")
+        logger.warning(f"Supervised session {kind} ({error}), relaunching")
+
+        old, self._driver = self._driver, None
+        # Old commands stop being supervised before the old session is torn down
+        self._generation += 1
+        self._kill(old)
+        try:
+            # Runs the quit hooks (tracker, user data clone), the processes are already gone
+            old.quit()
+        except Exception as e:
+            logger.debug(f"Quitting the failed session raised: {e}")
+
+        if self.max_restarts is not None and self.stats["restarts"] >= self.max_restarts:
+            raise WebDriverException(f"Supervised session failed again after {self.max_restarts} restarts")
+
+        self._launch()
+        self._count("restarts")
+        if resume and self.resume and self.last_url:
+            try:
+                self._driver.get(self.last_url)
+            except Exception as e:
+                logger.warning(f"Could not reload {self.last_url} after relaunch: {e}")
+        self._count("restart_seconds", time.monotonic() - start)
+        logger.info(f"Supervised session relaunched in {time.monotonic() - start:.2f}s")
+
+    def _watchdog(self):
+        """Kills sessions whose commands run past their deadline or whose chromedriver died"""
+        while not self._stop.wait(0.1):
+            now = time.monotonic()
+            with self._inflight_lock:
+                expired = [(token, command) for token, (deadline, generation, command) in self._inflight.items()
+                           if now > deadline and generation == self._generation and token not in self._killed]
+                for token, _ in expired:
+                    self._killed[token] = HANG
+
+            driver = self._driver
+            if driver is None:
+                continue
+            if expired:
+                logger.warning(f"{expired[0][1]} ran past its deadline, killing the session")
+                self._kill(driver)
+                continue
+
+            service = getattr(driver, "service", None)
+            process = getattr(service, "process", None)
+            if process is not None and process.poll() is not None:
+                # The next probe finds the session gone and fails over without waiting for a caller
+                self._probe_now.set()
+
+    def _prober(self):
+        self._prober_ident = threading.get_ident()
+        while not self._stop.is_set():
+            self._probe_now.wait(self.probe_interval)
+            if self._stop.is_set():
+                return
+            forced = self._probe_now.is_set()
+            self._probe_now.clear()
+            with self._inflight_lock:
+                busy = bool(self._inflight)
+            if busy or (not forced and time.monotonic() - self._last_activity < self.probe_interval):
+                continue
+
+            self._count("probes")
+            try:
+                self.current_driver().current_window_handle
+            except SessionRestarted:
+                self._count("failed_probes")
+            except WebDriverException as e:
+                logger.debug(f"Probe failed without losing the session: {e}")
+
+    def close(self):
+        """Stops supervising and quits the current session"""
+        self._stop.set()
+        self._probe_now.set()
+        with self._lock:
+            self._closed = True
+            driver, self._driver = self._driver, None
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join()
+        if driver is not None:
+            try:
+                driver.quit()
+            except WebDriverException as e:
+                logger.warning(f"Failed to quit supervised driver: {e}")
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Any, Callable, Iterator, TypeVar, Tuple, Type, TYPE_CHECKING
+
+from selenium.common.exceptions import WebDriverException, TimeoutException, NoSuchElementException
+
+from init_selenium.init_driver import DriverInit
+from init_selenium.backends import driver_supports_cdp
+from init_selenium.profile import PAGE_LOAD_NONE
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from selenium.webdriver.remote.webelement import WebElement
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+BLANK_PAGE = "about:blank"
+
+# The marker is set on the old document before navigating, so the old page's "complete"
+# state is never mistaken for the new one
+MARK_STALE_SCRIPT = "window.__initSeleniumStale = true;"
+READY_STATE_SCRIPT = "return window.__initSeleniumStale ? 'loading' : document.readyState;"
+
+
+class Tab:
+    """
+    One logical session inside a TabPool browser: a tab with its own cookies, storage and
+    cache when the pool isolates tabs. Every method runs under the pool's command lock,
+    after switching WebDriver to this tab
+    """
+
+    def __init__(self, pool: TabPool, handle: str, context_id: Optional[str]):
+        self.pool = pool
+        self.handle = handle
+        self.context_id = context_id
+        self.identity = None
+        self.closed = False
+
+    def run(self, action: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Runs action(driver, *args, **kwargs) with the driver switched to this tab
+        Elements found inside the action belong to this tab, use them inside the action only
+        """
+        if self.closed:
+            raise WebDriverException(f"Tab {self.handle} is closed")
+        with self.pool._lock:
+            self.pool._switch(self.handle)
+            return action(self.pool.driver, *args, **kwargs)
+
+    def execute_script(self, script: str, *args) -> Any:
+        return self.run(lambda driver: driver.execute_script(script, *args))
+
+    def execute_cdp_cmd(self, cmd: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return self.run(lambda driver: driver.execute_cdp_cmd(cmd, params or {}))
+
+    def get(self, url: str, timeout: Optional[float] = None):
+        """
+        Navigates this tab and waits for the page to load
+        The lock is only held to start the navigation and for each readyState probe,
+        so other tabs keep working while this page loads. This relies on the "none" page
+        load strategy TabPool launches with: under "normal" or "eager", chromedriver holds
+        the probe until the navigation settles, and every other tab with it
+        """
+        def navigate(driver: webdriver.Chrome):
+            driver.execute_script(MARK_STALE_SCRIPT)
+            result = driver.execute_cdp_cmd("Page.navigate", {"url": url})
+            if result.get("errorText"):
+                raise WebDriverException(f"Navigation to {url} failed: {result['errorText']}")
+
+        self.run(navigate)
+        self.until(lambda driver: driver.execute_script(READY_STATE_SCRIPT) == "complete",
+                   timeout=timeout if timeout is not None else self.pool.page_timeout,
+                   message=f"Timed out loading {url}")
+
+    def until(self, condition: Callable[[webdriver.Chrome], T], timeout: Optional[float] = None,
+              message: str = "",
+              ignored_exceptions: Tuple[Type[Exception], ...] = (NoSuchElementException,)) -> T:
+        """
+        WebDriverWait.until for a tab: polls condition(driver) on this tab until it returns a truthy value
+        Like WebDriverWait, ignored_exceptions raised by condition count as a falsy value.
+        The lock is released between polls, so waiting tabs do not block the others
+        """
+        timeout = timeout if timeout is not None else self.pool.wait_time
+        deadline = time.monotonic() + timeout
+        screen = stacktrace = None
+        while True:
+            try:
+                value = self.run(condition)
+                if value:
+                    return value
+            except ignored_exceptions as exc:
+                screen = getattr(exc, "screen", None)
+                stacktrace = getattr(exc, "stacktrace", None)
+            if time.monotonic() >= deadline:
+                raise TimeoutException(message or f"Condition not met on tab {self.handle} after {timeout}s",
+                                       screen, stacktrace)
+            time.sleep(self.pool.poll_interval)
+
+    @property
+    def capabilities(self) -> Dict[str, Any]:
+        return self.pool.driver.capabilities
+
+    def find_element(self, by: str, value: str) -> WebElement:
+        return self.run(lambda driver: driver.find_element(by, value))
+
+    def find_elements(self, by: str, value: str) -> List[WebElement]:
+        return self.run(lambda driver: driver.find_elements(by, value))
+
+    @property
+    def title(self) -> str:
+        return self.run(lambda driver: driver.title)
+
+    @property
+    def current_url(self) -> str:
+        return self.run(lambda driver: driver.current_url)
+
+    @property
+    def page_source(self) -> str:
+        return self.run(lambda driver: driver.page_source)
+
+    def get_cookies(self) -> List[Dict[str, Any]]:
+        """Every cookie of this tab's browser context"""
+        params = {"browserContextId": self.context_id} if self.context_id else {}
+        return self.execute_cdp_cmd("Storage.getCookies", params)["cookies"]
+
+    def set_cookies(self, cookies: List[Dict[str, Any]]):
+        """Sets CDP cookie dicts (name, value, domain or url, ...) in this tab's browser context"""
+        params = {"cookies": cookies}
+        if self.context_id:
+            params["browserContextId"] = self.context_id
+        self.execute_cdp_cmd("Storage.setCookies", params)
+
+    def close(self):
+        self.pool._close_tab(self)
+
+    def __enter__(self) -> "Tab":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"Tab({self.handle}, context={self.context_id})"
+
+
+class TabPool:
+    """
+    Many logical sessions in one browser: tabs are opened on one driver launched through a
+    DriverInit, each in its own CDP browser context (separate cookies, storage and cache)
+    unless isolate=False. WebDriver talks to one tab at a time, so tabs share a command
+    lock and switch windows on demand; page loads and waits release the lock, so loads
+    in different tabs overlap.
+
+    Needs a CDP capable backend. The browser is launched with the "none" page load strategy
+    unless create_driver_kwargs pick one, Tab.get waits for readyState itself. Chrome
+    throttles timers in background tabs, so pages that depend on them render slower than
+    in a browser of their own
+    """
+
+    def __init__(self,
+                 initializer: DriverInit,
+                 max_tabs: int = 16,
+                 isolate: bool = True,
+                 page_timeout: float = 30,
+                 poll_interval: float = 0.05,
+                 **create_driver_kwargs
+                 ):
+        if max_tabs < 1:
+            raise ValueError("max_tabs must be at least 1")
+
+        self.initializer = initializer
+        self.max_tabs = max_tabs
+        self.isolate = isolate
+        self.page_timeout = page_timeout
+        self.poll_interval = poll_interval
+        # A blocking page load strategy would make readyState probes wait out navigations under the lock
+        create_driver_kwargs.setdefault("page_load_strategy", PAGE_LOAD_NONE)
+        self.create_driver_kwargs = create_driver_kwargs
+
+        self.driver: Optional[webdriver.Chrome] = None
+        self.wait_time: float = 20
+        self.tabs: List[Tab] = []
+        self._home: Optional[str] = None
+        self._current: Optional[str] = None
+        # Serialises WebDriver commands, which always target the current window
+        self._lock = threading.RLock()
+        self._slots = threading.BoundedSemaphore(max_tabs)
+        self._start_lock = threading.Lock()
+
+    def __enter__(self) -> "TabPool":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self) -> "TabPool":
+        """Launches the browser, open_tab() calls it on first use"""
+        with self._start_lock:
+            if self.driver is not None:
+                return self
+            driver, wait = self.initializer.create_driver(**self.create_driver_kwargs)
+            if not driver_supports_cdp(driver):
+                driver.quit()
+                raise ValueError("TabPool needs a CDP capable backend")
+            if driver.capabilities.get("pageLoadStrategy", PAGE_LOAD_NONE) != PAGE_LOAD_NONE:
+                logger.warning("TabPool driver does not use the 'none' page load strategy, "
+                               "tabs loading pages will block the others")
+            self.wait_time = wait._timeout
+            self._home = self._current = driver.current_window_handle
+            self.driver = driver
+        return self
+
+    def _switch(self, handle: str):
+        """Makes handle the current window, callers hold the lock"""
+        if self._current != handle:
+            self.driver.switch_to.window(handle)
+            self._current = handle
+
+    def open_tab(self, url: Optional[str] = None, timeout: Optional[float] = None) -> Tab:
+        """
+        Opens a tab, waiting up to timeout seconds (forever by default) while max_tabs are open
+        With url, the tab navigates to it before it is returned, within page_timeout.
+        If the DriverInit has identities, the tab gets the next one
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No tab slot freed up within {timeout}s")
+        try:
+            self.start()
+            with self._lock:
+                self._switch(self._home)
+                context_id = None
+                if self.isolate:
+                    context_id = self.driver.execute_cdp_cmd(
+                        "Target.createBrowserContext", {"disposeOnDetach": True}
+                    )["browserContextId"]
+                params = {"url": BLANK_PAGE, "background": True}
+                if context_id:
+                    params["browserContextId"] = context_id
+                # chromedriver uses the DevTools target id as the window handle
+                handle = self.driver.execute_cdp_cmd("Target.createTarget", params)["targetId"]
+                tab = Tab(self, handle, context_id)
+                self.tabs.append(tab)
+            logger.debug(f"Opened {tab}, {len(self.tabs)} tabs open")
+        except Exception:
+            self._slots.release()
+            raise
+
+        try:
+            if self.initializer.identities:
+                tab.identity = self.initializer.identities.next().apply(tab)
+            if url:
+                tab.get(url)
+        except Exception:
+            tab.close()
+            raise
+        return tab
+
+    @contextmanager
+    def tab(self, url: Optional[str] = None, timeout: Optional[float] = None) -> Iterator[Tab]:
+        """Opens a tab for the duration of the block"""
+        tab = self.open_tab(url, timeout)
+        try:
+            yield tab
+        finally:
+            tab.close()
+
+    def _close_tab(self, tab: Tab):
+        with self._lock:
+            if tab.closed:
+                return
+            tab.closed = True
+            self.tabs.remove(tab)
+            try:
+                self._switch(self._home)
+                self.driver.execute_cdp_cmd("Target.closeTarget", {"targetId": tab.handle})
+                if tab.context_id:
+                    self.driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": tab.context_id})
+            except WebDriverException as e:
+                logger.warning(f"Failed to close {tab}: {e}")
+            finally:
+                self._slots.release()
+
+    def close(self):
+        """Closes every tab and quits the browser"""
+        with self._lock:
+            for tab in list(self.tabs):
+                self._close_tab(tab)
+            driver, self.driver = self.driver, None
+            if driver is not None:
+                try:
+                    driver.quit()
+                except WebDriverException as e:
+                    logger.warning(f"Failed to quit tab pool driver: {e}")
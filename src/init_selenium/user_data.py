@@ -0,0 +1,225 @@
+import hashlib
+import logging
+import os
+import shutil
+import stat
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional, Iterator, Callable
+
+from init_selenium.cache import CACHE_DIR, FileLock
+from init_selenium.profile import LaunchProfile
+
+
+logger = logging.getLogger(__name__)
+
+# Chrome lock files that must never be copied into a clone
+PROFILE_LOCK_FILES = {"SingletonLock", "SingletonSocket", "SingletonCookie", "lockfile"}
+
+
+def _pid_alive(pid: int) -> Optional[bool]:
+    """Whether a process exists, None when that cannot be told"""
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        # os.kill with signal 0 is not supported on Windows, psutil can tell
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.pid_exists(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class UserDataStore:
+    """
+    Managed Chrome user-data-dir profiles
+    Keeps one golden profile per key (by default one per LaunchProfile) and hands
+    out per-session clones. Clones use reflinks when the filesystem supports them and are
+    plain copies otherwise: Chrome's cache opens its entry files read-write, so no file can be
+    shared between profiles. Clones are removed on release and stale ones from dead processes
+    are garbage-collected.
+    """
+
+    def __init__(self, root: str = os.path.join(CACHE_DIR, "user_data")):
+        self.root = root
+        self.golden_root = os.path.join(root, "golden")
+        self.clones_root = os.path.join(root, "clones")
+        os.makedirs(self.golden_root, exist_ok=True)
+        os.makedirs(self.clones_root, exist_ok=True)
+        self._reflink: Optional[bool] = None
+
+    @staticmethod
+    def key_for(profile: LaunchProfile) -> str:
+        """Golden profile key for a LaunchProfile, the language is part of the profile"""
+        return hashlib.sha1(profile.to_json().encode()).hexdigest()[:16]
+
+    def golden_path(self, key: str) -> str:
+        return os.path.join(self.golden_root, key)
+
+    def _lock(self, key: str) -> FileLock:
+        return FileLock(os.path.join(self.golden_root, f"{key}.lock"), timeout=None)
+
+    def _generation(self, key: str) -> str:
+        """Changes whenever a refresh of the golden profile starts or ends"""
+        try:
+            with open(os.path.join(self.golden_root, f"{key}.generation")) as generation_file:
+                return generation_file.read()
+        except FileNotFoundError:
+            return ""
+
+    def _new_generation(self, key: str):
+        path = os.path.join(self.golden_root, f"{key}.generation")
+        temporary = f"{path}.{uuid.uuid4().hex}"
+        with open(temporary, "w") as generation_file:
+            generation_file.write(uuid.uuid4().hex)
+        os.replace(temporary, path)
+
+    def _supports_reflink(self) -> bool:
+        """Probes once whether `cp --reflink=always` works inside the store"""
+        if self._reflink is None:
+            self._reflink = False
+            if sys.platform.startswith("linux") and shutil.which("cp"):
+                probe = os.path.join(self.root, f".reflink-probe-{uuid.uuid4().hex}")
+                try:
+                    with open(probe, "wb") as probe_file:
+                        probe_file.write(b"probe")
+                    result = subprocess.run(["cp", "--reflink=always", probe, probe + ".copy"],
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                    self._reflink = result.returncode == 0
+                finally:
+                    for path in (probe, probe + ".copy"):
+                        if os.path.exists(path):
+                            os.remove(path)
+            logger.info(f"Reflink clones {'enabled' if self._reflink else 'not supported, using copies'}")
+        return self._reflink
+
+    def seed(self,
+             key: str,
+             launch: Callable[[str], object],
+             prepare: Optional[Callable[[object], None]] = None):
+        """
+        Builds or refreshes the golden profile for a key
+        launch(user_data_dir) must return a driver using that directory, prepare(driver)
+        can warm it up (visit sites, log in) before the driver is quit
+        """
+        golden = self.golden_path(key)
+        with self._lock(key):
+            # Clones copying while the profile changes see the new generation and start over
+            self._new_generation(key)
+            try:
+                os.makedirs(golden, exist_ok=True)
+
+                driver = launch(golden)
+                try:
+                    if prepare:
+                        prepare(driver)
+                finally:
+                    driver.quit()
+            finally:
+                self._new_generation(key)
+        logger.info(f"Golden profile ready: {golden}")
+
+    def _copy_tree(self, source: str, target: str):
+        if self._supports_reflink():
+            subprocess.run(["cp", "-a", "--reflink=always", source, target], check=True)
+            for directory, _, files in os.walk(target):
+                for name in PROFILE_LOCK_FILES.intersection(files):
+                    os.remove(os.path.join(directory, name))
+        else:
+            for directory, _, files in os.walk(source):
+                relative = os.path.relpath(directory, source)
+                target_dir = os.path.normpath(os.path.join(target, relative))
+                os.makedirs(target_dir, exist_ok=True)
+                for name in files:
+                    if name not in PROFILE_LOCK_FILES:
+                        shutil.copy2(os.path.join(directory, name), os.path.join(target_dir, name))
+
+    def clone(self, key: str) -> str:
+        """
+        Returns a new user-data-dir for one session, cloned from the golden profile if it exists
+        The lock is only waited for while the golden profile is being refreshed, clones copy
+        concurrently and start over if a refresh began during their copy
+        """
+        golden = self.golden_path(key)
+        while True:
+            clone = os.path.join(self.clones_root, f"{os.getpid()}-{uuid.uuid4().hex}")
+            with self._lock(key):
+                generation = self._generation(key)
+                exists = os.path.isdir(golden)
+            if not exists:
+                logger.info(f"No golden profile for {key}, starting from an empty profile")
+                os.makedirs(clone)
+                return clone
+
+            try:
+                self._copy_tree(golden, clone)
+            except (OSError, subprocess.SubprocessError):
+                if self._generation(key) == generation:
+                    self._discard(clone)
+                    raise
+            if self._generation(key) == generation:
+                return clone
+            logger.info(f"Golden profile {key} changed while cloning, cloning again")
+            self._discard(clone)
+
+    def release(self, clone: str):
+        """Removes a session clone"""
+        def on_error(func, path, exc_info):
+            # Windows refuses to delete read-only files
+            os.chmod(path, stat.S_IWUSR | stat.S_IREAD)
+            func(path)
+
+        shutil.rmtree(clone, onerror=on_error)
+
+    def _discard(self, clone: str):
+        """Removes a clone that may be incomplete, ignoring errors"""
+        try:
+            self.release(clone)
+        except OSError:
+            pass
+
+    @contextmanager
+    def session_dir(self, key: str) -> Iterator[str]:
+        """Context manager yielding a session clone that is removed on exit"""
+        clone = self.clone(key)
+        try:
+            yield clone
+        finally:
+            self.release(clone)
+
+    def gc(self, max_age: float = 6 * 60 * 60) -> int:
+        """
+        Removes clones whose owner process is gone. Clones in use by a running Chrome are never
+        removed, max_age seconds only decides for owners that cannot be checked (Windows without psutil)
+        Returns number of removed clones
+        """
+        removed = 0
+        now = time.time()
+        for name in os.listdir(self.clones_root):
+            path = os.path.join(self.clones_root, name)
+            try:
+                pid = int(name.split("-", 1)[0])
+            except ValueError:
+                continue
+            if pid == os.getpid():
+                continue
+            alive = _pid_alive(pid)
+            if alive is False or (alive is None and now - os.path.getmtime(path) > max_age):
+                try:
+                    self.release(path)
+                    removed += 1
+                except OSError as e:
+                    logger.warning(f"Could not remove stale profile clone {path}: {e}")
+        if removed:
+            logger.info(f"Removed {removed} stale profile clones")
+        return removed
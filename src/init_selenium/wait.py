@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Optional, Callable, Any, TypeVar
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.support.wait import WebDriverWait
+
+from init_selenium.metrics import HostLatencies
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Longest single in-page wait, well under the default 30 s script timeout
+SCRIPT_SLICE = 10
+
+# Commands after which the page may be on another host. Scripts that assign location are not
+# counted: at worst a learned wait is attributed to the previous host
+NAVIGATION_COMMANDS = frozenset({
+    Command.GET, Command.GO_BACK, Command.GO_FORWARD, Command.REFRESH, Command.CLICK_ELEMENT,
+    Command.SEND_KEYS_TO_ELEMENT, Command.W3C_ACTIONS, Command.SWITCH_TO_WINDOW, Command.NEW_WINDOW,
+    Command.CLOSE, "executeCdpCommand",
+})
+
+# Error messages of scripts interrupted by a navigation, the condition is checked again on the new page
+UNLOAD_ERRORS = ("document unloaded", "execution context", "navigat")
+
+# Resolves true on the next DOM mutation, false after arguments[0] milliseconds
+MUTATION_SCRIPT = """
+const [ms, done] = arguments;
+const observer = new MutationObserver(() => { observer.disconnect(); clearTimeout(timer); done(true); });
+observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+const timer = setTimeout(() => { observer.disconnect(); done(false); }, ms);
+"""
+
+# Resolves with the first truthy value of a JS expression (awaited if it is a promise),
+# re-evaluated on every DOM mutation and every interval, or null after the timeout.
+# The expression is spliced into the script rather than passed to new Function, which CSP can forbid
+CONDITION_SCRIPT = """
+const [timeoutMs, intervalMs, done] = arguments;
+const condition = () => (__EXPRESSION__);
+let finished = false, observer = null, ticker = null, timer = null;
+function finish(value) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearInterval(ticker);
+    clearTimeout(timer);
+    done(value === undefined ? null : value);
+}
+async function check() {
+    if (finished) return;
+    try {
+        const value = await condition();
+        if (value) finish(value);
+    } catch (e) {}
+}
+observer = new MutationObserver(check);
+observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+ticker = setInterval(check, intervalMs);
+timer = setTimeout(() => finish(null), timeoutMs);
+check();
+"""
+
+
+def _track_navigations(driver):
+    """Counts commands that may navigate in command_executor.navigations, wrapping each executor once"""
+    executor = driver.command_executor
+    if not hasattr(executor, "navigations"):
+        original_execute = executor.execute
+        executor.navigations = 0
+
+        def tracked_execute(driver_command: str, params: Optional[dict] = None):
+            if driver_command in NAVIGATION_COMMANDS:
+                executor.navigations += 1
+            return original_execute(driver_command, params)
+
+        executor.execute = tracked_execute
+    return executor
+
+
+def _interrupted_by_navigation(error: WebDriverException) -> bool:
+    message = (error.msg or "").lower()
+    return any(marker in message for marker in UNLOAD_ERRORS)
+
+
+class AdaptiveWait(WebDriverWait):
+    """
+    Drop-in WebDriverWait returned by create_driver
+    Polls start at min_poll and back off exponentially up to poll_frequency, so conditions met
+    quickly return in milliseconds instead of half a second. With `latencies`, the timeout of
+    a host whose waits are slow grows up to max_timeout (3x timeout by default), the host is
+    read once per navigation. With observe_mutations, the pause between polls ends early on
+    the next DOM change
+    """
+
+    def __init__(self,
+                 driver,
+                 timeout: float,
+                 poll_frequency: float = 0.5,
+                 ignored_exceptions=None,
+                 min_poll: float = 0.01,
+                 backoff: float = 2.0,
+                 max_timeout: Optional[float] = None,
+                 latencies: Optional[HostLatencies] = None,
+                 observe_mutations: bool = False,
+                 ):
+        super().__init__(driver, timeout, poll_frequency, ignored_exceptions)
+        self.min_poll = min(min_poll, self._poll)
+        self.backoff = backoff
+        self.max_timeout = max_timeout if max_timeout is not None else self._timeout * 3
+        self.latencies = latencies
+        self.observe_mutations = observe_mutations
+        self._cached_host = ""
+        self._navigation = None
+
+    def _host(self) -> str:
+        """Host of the current page, current_url is only read again after a navigation"""
+        if self.latencies is None:
+            return ""
+        try:
+            executor = _track_navigations(self._driver)
+            # A supervised driver swaps executors on failover, whose counts start over
+            navigation = (id(executor), executor.navigations)
+        except AttributeError:
+            # No command executor to watch, read the URL every time
+            navigation = None
+        if navigation is None or navigation != self._navigation:
+            try:
+                self._cached_host = urlsplit(self._driver.current_url).hostname or ""
+            except WebDriverException:
+                return ""
+            self._navigation = navigation
+        return self._cached_host
+
+    def timeout_for(self, host: str) -> float:
+        if self.latencies is None or not host:
+            return self._timeout
+        return self.latencies.timeout_for(host, self._timeout, self.max_timeout)
+
+    def _pause(self, seconds: float):
+        """Sleeps between polls, in the page until the next DOM mutation with observe_mutations"""
+        if self.observe_mutations and seconds >= 0.05:
+            try:
+                self._driver.execute_async_script(MUTATION_SCRIPT, int(seconds * 1000))
+                return
+            except WebDriverException:
+                # Navigations interrupt the script, the next poll sees the new page
+                return
+        time.sleep(seconds)
+
+    def _wait(self, method: Callable[[Any], T], message: str, negate: bool) -> T:
+        host = self._host()
+        timeout = self.timeout_for(host)
+        screen = stacktrace = None
+        start = time.monotonic()
+        end_time = start + timeout
+        poll = self.min_poll
+        while True:
+            try:
+                value = method(self._driver)
+                if bool(value) != negate:
+                    if host:
+                        self.latencies.observe(host, time.monotonic() - start)
+                    return value
+            except self._ignored_exceptions as exc:
+                if negate:
+                    return True
+                screen = getattr(exc, "screen", None)
+                stacktrace = getattr(exc, "stacktrace", None)
+            remaining = end_time - time.monotonic()
+            if remaining <= 0:
+                break
+            self._pause(min(poll, remaining))
+            poll = min(poll * self.backoff, self._poll)
+        if negate:
+            raise TimeoutException(message)
+        raise TimeoutException(message, screen, stacktrace)
+
+    def until(self, method: Callable[[Any], T], message: str = "") -> T:
+        return self._wait(method, message, negate=False)
+
+    def until_not(self, method: Callable[[Any], T], message: str = "") -> T:
+        return self._wait(method, message, negate=True)
+
+    def until_script(self, expression: str, message: str = "", interval: float = 0.1) -> Any:
+        """
+        Waits in the page until a JS expression returns a truthy value, and returns it
+        Promises are awaited. The expression is checked on every DOM mutation and every
+        interval seconds, with one round trip per slice of at most SCRIPT_SLICE seconds
+        so the driver's script timeout is never reached:
+        wait.until_script("document.querySelector('#results li')")
+        """
+        host = self._host()
+        timeout = self.timeout_for(host)
+        script = CONDITION_SCRIPT.replace("__EXPRESSION__", expression)
+        start = time.monotonic()
+        end_time = start + timeout
+        while True:
+            remaining = end_time - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutException(message or f"{expression} was not truthy after {timeout:.1f}s")
+            try:
+                value = self._driver.execute_async_script(
+                    script, int(min(remaining, SCRIPT_SLICE) * 1000), int(interval * 1000)
+                )
+            except WebDriverException as e:
+                # A navigation unloaded the page running the script, check again on the new one.
+                # Anything else, such as a syntax error in the expression, is raised
+                if not _interrupted_by_navigation(e):
+                    raise
+                value = None
+            if value is not None:
+                if host:
+                    self.latencies.observe(host, time.monotonic() - start)
+                return value